@@ -9,8 +9,63 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'easy_parking.settings')
+# ASGI da persistent ulanishlar ishlatilmaydi (Django hujjatlari tavsiyasi)
+os.environ.setdefault('DATABASE_CONN_MAX_AGE', '0')
+# Middleware zanjiri to'liq async bo'lishi uchun WhiteNoise zanjirdan chiqariladi (pastga qarang)
+os.environ.setdefault('STATIC_FILES_MIDDLEWARE', 'False')
 
-application = get_asgi_application()
+django.setup(set_prefix=False)
+
+from django.conf import settings  # noqa: E402
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler  # noqa: E402
+from django.core.handlers.asgi import ASGIHandler  # noqa: E402
+from django.http import Http404  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from whitenoise.middleware import WhiteNoiseMiddleware  # noqa: E402
+
+
+class ChangeFeedASGIHandler(ASGIHandler):
+    """
+    Runs long-poll and SSE requests without Django's per-request ThreadSensitiveContext.
+    Their only sync work (request signal receivers, cache reads) then goes to asgiref's
+    shared sync thread, so a waiting client does not pin an idle thread of its own.
+    """
+
+    def __init__(self):
+        super().__init__()
+        # Bu endpointlar ORM ishlatmaydi; ORM li so'rovlar odatdagidek o'z thread ida
+        self.shared_thread_paths = {reverse('async-parkingzone-changes'), reverse('async-parkingzone-stream')}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['path'] in self.shared_thread_paths:
+            await self.handle(scope, receive, send)
+        else:
+            await super().__call__(scope, receive, send)
+
+
+class WhiteNoiseStaticFilesHandler(ASGIStaticFilesHandler):
+    """
+    Serves STATIC_URL through WhiteNoise (hashed names, compressed variants, cache
+    headers) before the middleware chain, so only static requests use a worker thread.
+    """
+
+    def __init__(self, application):
+        super().__init__(application)
+        self.whitenoise = WhiteNoiseMiddleware(get_response=self.not_found)
+
+    @staticmethod
+    def not_found(request):
+        raise Http404(request.path)
+
+    def serve(self, request):
+        return self.whitenoise(request)
+
+
+django_application = ChangeFeedASGIHandler()
+if settings.STATIC_FILES_MIDDLEWARE:
+    application = django_application
+else:
+    application = WhiteNoiseStaticFilesHandler(django_application)
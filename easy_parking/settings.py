@@ -1,3 +1,4 @@
+from datetime import timedelta
 from pathlib import Path
 import os
 
@@ -8,7 +9,10 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', 'your-default-secret-key')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.environ.get('DJANGO_DEBUG', 'True') == 'True'
+
+# Deploy qilingan kod versiyasi (Render RENDER_GIT_COMMIT ni o'zi o'rnatadi)
+APP_VERSION = os.environ.get('APP_VERSION') or os.environ.get('RENDER_GIT_COMMIT', 'dev')
 
 ALLOWED_HOSTS = ['*']
 
@@ -35,7 +39,6 @@ INSTALLED_APPS = DJANGO_APPS +  DOWNLOAD_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -44,6 +47,26 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# WhiteNoiseMiddleware faqat sinxron: zanjirda bo'lsa ASGI da har so'rov thread orqali o'tadi,
+# shuning uchun asgi.py uni o'chirib, static fayllarni middleware zanjiridan tashqarida beradi
+STATIC_FILES_MIDDLEWARE = os.environ.get('STATIC_FILES_MIDDLEWARE', 'True') == 'True'
+if STATIC_FILES_MIDDLEWARE:
+    MIDDLEWARE.insert(1, 'whitenoise.middleware.WhiteNoiseMiddleware')
+
+# Endpoint metrikalari (/metrics/, Prometheus formatida); eng tashqi middleware bo'lishi kerak
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True') == 'True'
+if METRICS_ENABLED:
+    MIDDLEWARE.insert(0, 'models.metrics.MetricsMiddleware')
+# Latency histogram chegaralari (sekund)
+METRICS_LATENCY_BUCKETS = [
+    float(bound) for bound in
+    os.environ.get('METRICS_LATENCY_BUCKETS', '0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10').split(',')
+]
+# Shundan sekin so'rovlar SQL bilan logga yoziladi; bo'sh bo'lsa o'chirilgan
+METRICS_SLOW_REQUEST = float(os.environ['METRICS_SLOW_REQUEST']) if os.environ.get('METRICS_SLOW_REQUEST') else None
+# Berilsa /metrics/ faqat "Authorization: Bearer <token>" bilan ochiladi; berilmasa DEBUG o'chiq bo'lganda faqat staff
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
 ROOT_URLCONF = 'easy_parking.urls'
 
 TEMPLATES = [
@@ -64,13 +87,121 @@ TEMPLATES = [
 WSGI_APPLICATION = 'easy_parking.wsgi.application'
 
 # Database
+SQLITE_BUSY_TIMEOUT = float(os.environ.get('SQLITE_BUSY_TIMEOUT', 20))
+SQLITE_PRAGMAS = os.environ.get('SQLITE_PRAGMAS', ';'.join([
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA cache_size=-20000',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA mmap_size=134217728',
+]))
+
+
+def sqlite_database(name):
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+        # Ulanishlar so'rovlar orasida qayta ishlatiladi; ASGI da 0 (asgi.py o'rnatadi): har so'rov
+        # boshqa thread da ishlaydi va thread ga bog'langan ulanish yopilmay qolardi
+        'CONN_MAX_AGE': int(os.environ.get('DATABASE_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': SQLITE_BUSY_TIMEOUT,
+            # Yozuvchi tranzaksiya boshidanoq lock oladi: "database is locked" o'rniga busy timeout kutadi
+            'transaction_mode': os.environ.get('SQLITE_TRANSACTION_MODE', 'IMMEDIATE'),
+            'init_command': SQLITE_PRAGMAS,
+        },
+    }
+
+
 DATABASES = {
+    'default': sqlite_database(os.environ.get('DATABASE_NAME', BASE_DIR / 'db.sqlite3')),
+}
+
+# Read-only viewset actionlari (list/retrieve va h.k.) replica ga yo'naltiriladi
+if os.environ.get('DATABASE_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        **sqlite_database(os.environ['DATABASE_REPLICA_NAME']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['models.routers.ReplicaRouter']
+
+# Cache (standart: local-memory; production uchun CACHE_BACKEND/CACHE_LOCATION orqali Redis va h.k.)
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
     }
 }
 
+# Zona versiyalari, changefeed, throttling va Idempotency-Key lock lari workerlar orasida umumiy cache talab qiladi:
+# DEBUG o'chiq bo'lsa LocMem/Dummy cache bilan ishga tushmaydi (bitta worker li deploy uchun True qilinadi)
+ALLOW_PROCESS_LOCAL_CACHE = os.environ.get('ALLOW_PROCESS_LOCAL_CACHE', 'False') == 'True'
+
+# Parking zona javoblari cache da saqlanadigan vaqt (sekund); versiya o'zgarsa darhol yangilanadi
+ZONE_CACHE_TIMEOUT = int(os.environ.get('ZONE_CACHE_TIMEOUT', 300))
+
+# Yaqin parking zonalarni qidirish uchun lat/lon grid (0.01° ~ 1.1 km)
+ZONE_GRID_CELL_DEGREES = float(os.environ.get('ZONE_GRID_CELL_DEGREES', 0.01))
+ZONE_NEARBY_MAX_RINGS = int(os.environ.get('ZONE_NEARBY_MAX_RINGS', 64))
+ZONE_NEARBY_MAX_K = 50
+
+# Zona o'zgarishlari feed i (/api/async/parking-zones/changes/ va /stream/)
+# CacheBroker workerlar orasida CACHES orqali ishlaydi; LocMemBroker bitta jarayon (testlar) uchun
+CHANGEFEED_BROKER = os.environ.get('CHANGEFEED_BROKER', 'models.changefeed.CacheBroker')
+CHANGEFEED_RETENTION = int(os.environ.get('CHANGEFEED_RETENTION', 10_000))
+CHANGEFEED_EVENT_TIMEOUT = int(os.environ.get('CHANGEFEED_EVENT_TIMEOUT', 3600))
+CHANGEFEED_POLL_INTERVAL = float(os.environ.get('CHANGEFEED_POLL_INTERVAL', 0.5))
+CHANGEFEED_MAX_WAIT = 25
+CHANGEFEED_STREAM_TIMEOUT = int(os.environ.get('CHANGEFEED_STREAM_TIMEOUT', 300))
+CHANGEFEED_HEARTBEAT = 15
+
+# Admission control (models.throttling): token bucket scope -> (so'rov/sekund, burst), user yoki IP bo'yicha
+THROTTLE_STORE = os.environ.get('THROTTLE_STORE', 'models.throttling.CacheBucketStore')
+THROTTLE_BUCKETS = {
+    'bookings': (float(os.environ.get('THROTTLE_BOOKINGS_RATE', 2)), int(os.environ.get('THROTTLE_BOOKINGS_BURST', 20))),
+    'register': (float(os.environ.get('THROTTLE_REGISTER_RATE', 0.1)), int(os.environ.get('THROTTLE_REGISTER_BURST', 5))),
+}
+# Worker dagi bir scope uchun parallel so'rovlar / o'rtacha kechikish (sekund) chegarasi; oshsa 429
+LOAD_SHED_MAX_IN_FLIGHT = int(os.environ.get('LOAD_SHED_MAX_IN_FLIGHT', 16))
+LOAD_SHED_LATENCY = float(os.environ.get('LOAD_SHED_LATENCY', 2.0))
+LOAD_SHED_RETRY_AFTER = 1
+
+# Idempotency-Key: birinchi javob shu cache da IDEMPOTENCY_TTL sekund saqlanadi va takrorlarga qaytariladi
+IDEMPOTENCY_CACHE = os.environ.get('IDEMPOTENCY_CACHE', 'default')
+IDEMPOTENCY_TTL = int(os.environ.get('IDEMPOTENCY_TTL', 24 * 60 * 60))
+# Parallel takror asl so'rovni shuncha sekund kutadi; lock asl so'rov yiqilsa shu muddatda bo'shaydi
+IDEMPOTENCY_WAIT = float(os.environ.get('IDEMPOTENCY_WAIT', 10))
+IDEMPOTENCY_LOCK_TIMEOUT = int(os.environ.get('IDEMPOTENCY_LOCK_TIMEOUT', 30))
+
+# /occupancy/ bir so'rovda qaytaradigan maksimal soat/kun oraliqlari
+OCCUPANCY_MAX_BUCKETS = 24 * 31
+
+# OpenAPI sxemasi DEBUG bo'lmaganda APP_VERSION bo'yicha bir marta generatsiya qilinib cache da saqlanadi
+SCHEMA_CACHE_TIMEOUT = int(os.environ.get('SCHEMA_CACHE_TIMEOUT', 7 * 24 * 60 * 60))
+
+# Bronning eng uzun davomiyligi (soat): rollup har soat/kun uchun qator yozadi, cheksiz bron minglab qator ochardi
+MAX_BOOKING_DURATION = timedelta(hours=int(os.environ.get('MAX_BOOKING_DURATION_HOURS', 7 * 24)))
+
+# Zona uchun TariffRule bo'lmasa qo'llaniladigan jarima qoidasi
+PENALTY_SHORT_BOOKING_MINUTES = int(os.environ.get('PENALTY_SHORT_BOOKING_MINUTES', 30))
+PENALTY_SHORT_BOOKING_AMOUNT = float(os.environ.get('PENALTY_SHORT_BOOKING_AMOUNT', 50.0))
+
+# SMS (RegisterView xabarlarni outbox ga yozadi, send_sms_outbox yuboradi)
+SMS_BACKEND = os.environ.get('SMS_BACKEND', 'models.sms.TwilioBackend')
+SMS_BATCH_SIZE = int(os.environ.get('SMS_BATCH_SIZE', 50))
+SMS_MAX_ATTEMPTS = int(os.environ.get('SMS_MAX_ATTEMPTS', 5))
+SMS_RETRY_BASE_DELAY = int(os.environ.get('SMS_RETRY_BASE_DELAY', 30))
+SMS_RETRY_MAX_DELAY = int(os.environ.get('SMS_RETRY_MAX_DELAY', 3600))
+# Provayder so'rovi timeout i (sekund); usiz sekin so'rov ijaradan uzoq davom etib, xabar ikki marta ketishi mumkin edi
+SMS_SEND_TIMEOUT = int(os.environ.get('SMS_SEND_TIMEOUT', 10))
+# Batch ijarasi: batch_size * SMS_SEND_TIMEOUT + shu zaxira (sekund), ya'ni har doim butun batch yuborilishidan uzun
+SMS_LEASE_SECONDS = int(os.environ.get('SMS_LEASE_SECONDS', 60))
+TWILIO_ACCOUNT_SID = os.environ.get('TWILIO_ACCOUNT_SID', 'your_account_sid')
+TWILIO_AUTH_TOKEN = os.environ.get('TWILIO_AUTH_TOKEN', 'your_auth_token')
+TWILIO_PHONE_NUMBER = os.environ.get('TWILIO_PHONE_NUMBER', 'your_twilio_phone_number')
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -107,13 +238,27 @@ CSRF_TRUSTED_ORIGINS = [
 
 
 # settings.py
+# API autentifikatorlari shu tartibda sinanadi; ro'yxatda yo'qlari umuman chaqirilmaydi.
+# 'jwt' foydalanuvchini token claimlaridan quradi (DB so'rovisiz), 'jwt-db' har so'rovda User ni o'qiydi.
+# 'token' uchun INSTALLED_APPS ga 'rest_framework.authtoken' qo'shilishi kerak.
+API_AUTHENTICATORS = {
+    'jwt': 'models.authentication.StatelessJWTAuthentication',
+    'jwt-db': 'rest_framework_simplejwt.authentication.JWTAuthentication',
+    'token': 'rest_framework.authentication.TokenAuthentication',
+    'session': 'rest_framework.authentication.SessionAuthentication',
+}
+API_AUTHENTICATION = [name.strip() for name in os.environ.get('API_AUTHENTICATION', 'jwt,session').split(',')]
+
+# Claimlari yo'q eski tokenlar uchun User kesh muddati (sekund)
+AUTH_USER_CACHE_TIMEOUT = int(os.environ.get('AUTH_USER_CACHE_TIMEOUT', 60))
+# LoginView JWT bilan birga session ham ochadimi (session DB ga yoziladi)
+AUTH_LOGIN_SESSION = os.environ.get('AUTH_LOGIN_SESSION', 'True') == 'True'
+
 REST_FRAMEWORK = {
-    'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
-        'rest_framework.authentication.SessionAuthentication',
-    ),
+    'DEFAULT_AUTHENTICATION_CLASSES': tuple(API_AUTHENTICATORS[name] for name in API_AUTHENTICATION),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
-    )
+    ),
+    'DEFAULT_PAGINATION_CLASS': 'models.pagination.KeysetPagination',
+    'PAGE_SIZE': int(os.environ.get('API_PAGE_SIZE', 50)),
 }
\ No newline at end of file
@@ -1,27 +1,55 @@
+from functools import lru_cache
+
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-
-schema_view = get_schema_view(
-   openapi.Info(
-      title="Sizning Loyiha Nomi API",
-      default_version='v1',
-      description="Sizning loyihangiz API si uchun test tavsifi",
-      terms_of_service="https://www.google.com/policies/terms/", # O'zingiznikini qo'ying
-      contact=openapi.Contact(email="contact@sizningloyiha.local"), # O'zingiznikini qo'ying
-      license=openapi.License(name="BSD License"), # O'zingiznikini qo'ying
-   ),
-   public=True,
-   permission_classes=(permissions.AllowAny,),
-)
+
+
+@lru_cache(maxsize=None)
+def get_schema_view():
+    # drf_yasg birinchi so'rovda import qilinadi, worker ishga tushishi va manage.py buyruqlari uchun emas
+    from drf_yasg.views import get_schema_view
+    from drf_yasg import openapi
+
+    return get_schema_view(
+       openapi.Info(
+          title="Sizning Loyiha Nomi API",
+          default_version='v1',
+          description="Sizning loyihangiz API si uchun test tavsifi",
+          terms_of_service="https://www.google.com/policies/terms/", # O'zingiznikini qo'ying
+          contact=openapi.Contact(email="contact@sizningloyiha.local"), # O'zingiznikini qo'ying
+          license=openapi.License(name="BSD License"), # O'zingiznikini qo'ying
+       ),
+       public=True,
+       permission_classes=(permissions.AllowAny,),
+    )
+
+
+# DEBUG da sxema har so'rovda qayta quriladi
+SCHEMA_CACHE_TIMEOUT = 0 if settings.DEBUG else settings.SCHEMA_CACHE_TIMEOUT
+SCHEMA_CACHE_KWARGS = {'key_prefix': f'openapi-{settings.APP_VERSION}'}
+
+
+def lazy_schema_view(renderer=None):
+    @lru_cache(maxsize=None)
+    def build():
+        schema_view = get_schema_view()
+        kwargs = {'cache_timeout': SCHEMA_CACHE_TIMEOUT, 'cache_kwargs': SCHEMA_CACHE_KWARGS}
+        if renderer is None:
+            return schema_view.without_ui(**kwargs)
+        return schema_view.with_ui(renderer, **kwargs)
+
+    def view(request, *args, **view_kwargs):
+        return build()(request, *args, **view_kwargs)
+    return view
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('models.urls')),
 
-    path('swagger<format>/', schema_view.without_ui(cache_timeout=0), name='schema-json'),
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    path('swagger<format>/', lazy_schema_view(), name='schema-json'),
+    path('swagger/', lazy_schema_view('swagger'), name='schema-swagger-ui'),
+    path('redoc/', lazy_schema_view('redoc'), name='schema-redoc'),
 ]
\ No newline at end of file
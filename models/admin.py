@@ -1,30 +1,196 @@
+import re
+from datetime import datetime
+
+from django import forms
 from django.contrib import admin
-from .models import Profile, Car, ParkingZone, Booking
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.db.models import QuerySet
+from django.utils import timezone
+from .models import Profile, Car, ParkingZone, Booking, SmsMessage, TariffRule, normalize_plate
+from .pagination import EstimatedCountPaginator
+
+
+class AutocompleteFilter(admin.FieldListFilter):
+    """
+    Foreign key filter with a select2 search box instead of one link per related row.
+    The related model's admin must define search_fields.
+    """
+    template = 'admin/autocomplete_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = f'{field_path}__{field.target_field.name}__exact'
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.model_admin = model_admin
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def get_facet_counts(self, pk_attname, filtered_qs):
+        return {}
+
+    def choices(self, changelist):
+        value = self.used_parameters.get(self.lookup_kwarg, [None])[-1]
+        choice_field = forms.ModelChoiceField(
+            queryset=self.field.remote_field.model._default_manager.all(), required=False,
+            widget=AutocompleteSelect(self.field, self.model_admin.admin_site, attrs={'data-width': '100%'}),
+        )
+        yield {
+            'selected': value is not None,
+            'widget': choice_field.widget.render(self.lookup_kwarg, value),
+        }
+
+
+class IndexedDatetimesQuerySet(QuerySet):
+    """
+    datetimes() for date_hierarchy without SELECT DISTINCT over every row: an index seek
+    for the first value, then one seek per period that has rows for the first value after
+    it, so empty years, months or days between bookings cost nothing.
+    """
+
+    def datetimes(self, field_name, kind, order='ASC', tzinfo=None):
+        if kind not in ('year', 'month', 'day'):
+            return super().datetimes(field_name, kind, order, tzinfo)
+        tzinfo = tzinfo or timezone.get_current_timezone()
+        values = self.values_list(field_name, flat=True).order_by(field_name)
+
+        periods = []
+        value = values.first()
+        while value is not None:
+            value = timezone.localtime(value, tzinfo)
+            start = datetime(value.year, value.month if kind != 'year' else 1, value.day if kind == 'day' else 1)
+            periods.append(timezone.make_aware(start, tzinfo))
+            try:
+                if kind == 'year':
+                    end = start.replace(year=start.year + 1)
+                elif kind == 'month':
+                    end = start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+                else:
+                    end = datetime.fromordinal(start.toordinal() + 1)
+            except (ValueError, OverflowError):
+                # 9999-yildan keyingi davr yo'q
+                break
+            value = values.filter(**{f'{field_name}__gte': timezone.make_aware(end, tzinfo)}).first()
+        return periods if order == 'ASC' else periods[::-1]
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist for big tables: no full COUNT(*) and select2 filters instead of full choice lists."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if not self.date_hierarchy:
+            return queryset
+        return IndexedDatetimesQuerySet(model=queryset.model, query=queryset.query, using=queryset._db,
+                                        hints=queryset._hints)
+
+    @property
+    def media(self):
+        # AutocompleteFilter vidjeti sahifa media siga qo'shiladi (field faqat atributlar uchun kerak)
+        return (super().media + AutocompleteSelect(None, self.admin_site).media
+                + forms.Media(js=['admin/js/autocomplete_filter.js']))
+
+
+# Normalizatsiyadan keyingi davlat raqami boshi: "01A123BC" (jismoniy) yoki "01123ABC" (yuridik shaxs)
+PLATE_PREFIX = re.compile(r'\d{2}(?:[A-Z]\d{1,3}[A-Z]{0,2}|\d{3}[A-Z]{0,3})')
+
+
+class PlateSearchMixin:
+    """
+    A search term shaped like the start of a plate also matches as a prefix of the indexed
+    normalized plate; it is ORed with the normal search_fields, so a term such as "12345"
+    still finds user names and zone names that contain it.
+    """
+    plate_search_field = 'normalized_plate'
+
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        plate = normalize_plate(search_term)
+        if PLATE_PREFIX.fullmatch(plate):
+            results |= queryset.filter(**{f'{self.plate_search_field}__startswith': plate})
+        return results, may_have_duplicates
 
 # Profile admin
-class ProfileAdmin(admin.ModelAdmin):
+class ProfileAdmin(LargeTableAdmin):
     list_display = ('user', 'phone_number', 'is_verified')
+    list_select_related = ('user',)
     search_fields = ('user__username', 'phone_number')
+    autocomplete_fields = ('user',)
+    ordering = ('-id',)
 
 # Car admin
-class CarAdmin(admin.ModelAdmin):
+class CarAdmin(PlateSearchMixin, LargeTableAdmin):
     list_display = ('user', 'make', 'model', 'plate_number')
+    list_select_related = ('user',)
     search_fields = ('make', 'model', 'plate_number')
-    list_filter = ('user',)
+    list_filter = (('user', AutocompleteFilter),)
+    autocomplete_fields = ('user',)
+    ordering = ('-id',)
+
+class ParkingZoneAdminForm(forms.ModelForm):
+    """Posts the available_spots the page was rendered with, so an edit is applied as a delta."""
+
+    class Meta:
+        model = ParkingZone
+        fields = '__all__'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['available_spots'].show_hidden_initial = True
+
+    def rendered_available_spots(self):
+        field = self.fields['available_spots']
+        try:
+            return field.to_python(self.data.get(self.add_initial_prefix(self.add_prefix('available_spots'))))
+        except forms.ValidationError:
+            return None
+
 
 # ParkingZone admin
 class ParkingZoneAdmin(admin.ModelAdmin):
-    list_display = ('name', 'location', 'total_spots', 'available_spots')
+    form = ParkingZoneAdminForm
+    list_display = ('name', 'location', 'total_spots', 'available_spots', 'counter_shards')
     search_fields = ('name', 'location')
+    ordering = ('name',)
+
+    def save_model(self, request, obj, form, change):
+        if change:
+            rendered = form.rendered_available_spots()
+            if 'available_spots' in form.changed_data and rendered is not None:
+                # Sahifa ochilgandan beri qilingan bronlar saqlanadi: faqat forma dagi o'zgarish qo'llanadi
+                obj._loaded_available_spots = rendered
+            else:
+                obj.available_spots = obj._loaded_available_spots
+        super().save_model(request, obj, form, change)
 
 # Booking admin
-class BookingAdmin(admin.ModelAdmin):
+class BookingAdmin(PlateSearchMixin, LargeTableAdmin):
     list_display = ('user', 'parking_zone', 'car', 'start_time', 'end_time', 'penalty')
+    list_select_related = ('user', 'parking_zone', 'car')
     search_fields = ('user__username', 'car__plate_number', 'parking_zone__name')
-    list_filter = ('parking_zone', 'user')
+    plate_search_field = 'car__normalized_plate'
+    list_filter = (('parking_zone', AutocompleteFilter), ('user', AutocompleteFilter))
+    autocomplete_fields = ('user', 'parking_zone', 'car')
+    # date_hierarchy start_time oralig'i va tartib booking_start_time_idx (start_time, id) dan o'qiladi
+    date_hierarchy = 'start_time'
+    ordering = ('-start_time', '-id')
+
+# TariffRule admin
+class TariffRuleAdmin(admin.ModelAdmin):
+    list_display = ('parking_zone', 'short_booking_minutes', 'short_booking_penalty')
+    search_fields = ('parking_zone__name',)
+
+# SmsMessage admin
+class SmsMessageAdmin(admin.ModelAdmin):
+    list_display = ('phone_number', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    search_fields = ('phone_number',)
+    list_filter = ('status',)
 
 # Register models with admin
 admin.site.register(Profile, ProfileAdmin)
 admin.site.register(Car, CarAdmin)
 admin.site.register(ParkingZone, ParkingZoneAdmin)
-admin.site.register(Booking, BookingAdmin)
\ No newline at end of file
+admin.site.register(Booking, BookingAdmin)
+admin.site.register(TariffRule, TariffRuleAdmin)
+admin.site.register(SmsMessage, SmsMessageAdmin)
\ No newline at end of file
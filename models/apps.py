@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class ModelsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'models'
+
+    def ready(self):
+        # Production da process-local cache bilan ishga tushilmaydi
+        from .caching import check_shared_cache
+        check_shared_cache()
+        # User o'zgarganda auth keshini tozalovchi signal
+        from . import authentication  # noqa: F401
+        # Har bir yangi DB ulanishiga metrika execute wrapper i qo'shiladi
+        from django.db.backends.signals import connection_created
+        from .metrics import install_query_wrapper
+        connection_created.connect(install_query_wrapper, dispatch_uid='models.metrics')
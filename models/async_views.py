@@ -0,0 +1,212 @@
+"""
+Native async read endpoints for ASGI deployments. They return the same bodies as the
+DRF viewsets but await the async ORM and cache API, so a request waiting on the
+database does not hold a worker thread the way a sync view behind ASGI does.
+"""
+import asyncio
+import json
+import math
+import time
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.exceptions import APIException, MethodNotAllowed, NotAuthenticated, NotFound
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from .availability import apeak_occupancy
+from .caching import ZONE_LIST_VERSION_KEY, aget_version, zone_version_key
+from .changefeed import get_broker, latest_per_zone
+from .models import Booking, ParkingZone
+from .pagination import BookingPagination
+from .serializers import BookingSerializer, ParkingZoneSerializer
+from .views import parse_window
+
+
+def json_response(data, status=status.HTTP_200_OK):
+    # DRF JSONRenderer bilan bir xil ixcham JSON
+    return JsonResponse(data, status=status, encoder=JSONEncoder, safe=False,
+                        json_dumps_params={'separators': (',', ':')})
+
+
+def async_read_view(view):
+    # DRF Request faqat query_params va autentifikatsiya uchun; foydalanuvchi kerak bo'lganda aniqlanadi
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+        try:
+            if request.method not in ('GET', 'HEAD'):
+                raise MethodNotAllowed(request.method)
+            return await view(request, *args, **kwargs)
+        except APIException as exc:
+            return json_response({'detail': exc.detail}, status=exc.status_code)
+    return wrapper
+
+
+async def cached_json(request, version_key, render):
+    """Async counterpart of views.cached_response, sharing its ETag versions."""
+    etag = f'"{await aget_version(version_key)}"'
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match and (etag in parse_etags(if_none_match) or if_none_match.strip() == '*'):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    cache_key = f'response:{request.build_absolute_uri()}:{etag}'
+    data = await cache.aget(cache_key)
+    if data is None:
+        data = await render()
+        await cache.aset(cache_key, data, settings.ZONE_CACHE_TIMEOUT)
+    response = json_response(data)
+    response['ETag'] = etag
+    return response
+
+
+async def paginate(request, queryset, serializer_class, pagination_class=api_settings.DEFAULT_PAGINATION_CLASS):
+    paginator = pagination_class()
+    page_queryset = paginator.get_page_queryset(queryset, request)
+    if page_queryset is None:
+        return serializer_class([obj async for obj in queryset], many=True).data
+    paginator.set_page([obj async for obj in page_queryset])
+    return paginator.get_paginated_response(serializer_class(paginator.page, many=True).data).data
+
+
+async def get_zone(pk):
+    try:
+        return await ParkingZone.objects.aget(pk=pk)
+    except ParkingZone.DoesNotExist:
+        raise NotFound("No ParkingZone matches the given query.")
+
+
+@async_read_view
+async def zone_list(request):
+    async def render():
+        return await paginate(request, ParkingZone.objects.all(), ParkingZoneSerializer)
+    return await cached_json(request, ZONE_LIST_VERSION_KEY, render)
+
+
+@async_read_view
+async def zone_detail(request, pk):
+    async def render():
+        return ParkingZoneSerializer(await get_zone(pk)).data
+    return await cached_json(request, zone_version_key(pk), render)
+
+
+@async_read_view
+async def zone_availability(request, pk):
+    parking_zone = await get_zone(pk)
+    try:
+        start, end = parse_window(request)
+    except ValueError as exc:
+        return json_response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    occupied = await apeak_occupancy(parking_zone, start, end)
+    return json_response({
+        'parking_zone': parking_zone.id,
+        'from': start,
+        'to': end,
+        'total_spots': parking_zone.total_spots,
+        'occupied_spots': occupied,
+        'available_spots': max(parking_zone.total_spots - occupied, 0),
+    })
+
+
+@async_read_view
+async def my_bookings(request):
+    # JWT/Token autentifikatorlari sinxron: foydalanuvchi bir marta thread da aniqlanadi
+    user = await sync_to_async(lambda: request.user)()
+    if not user.is_authenticated:
+        raise NotAuthenticated()
+    queryset = Booking.objects.filter(user=user)
+    return json_response(await paginate(request, queryset, BookingSerializer, BookingPagination))
+
+
+def parse_sequence(value):
+    if value is None:
+        return None
+    sequence = int(value)
+    if sequence < 0:
+        raise ValueError
+    return sequence
+
+
+def parse_wait(value):
+    # nan/inf deadline ni buzadi (nan bilan so'rov hech qachon tugamaydi); manfiy qiymat 0 ga
+    wait = float(value)
+    if not math.isfinite(wait):
+        raise ValueError
+    return min(max(wait, 0), settings.CHANGEFEED_MAX_WAIT)
+
+
+@async_read_view
+async def zone_changes(request):
+    """
+    Long-poll change feed: ?since=<sequence>&wait=<seconds>. Returns the latest state of
+    each zone changed after since, waiting up to wait seconds for one. Without since it
+    returns the current sequence to start from; reset=true means reload the zone list.
+    """
+    broker = get_broker()
+    try:
+        since = parse_sequence(request.query_params.get('since'))
+        wait = parse_wait(request.query_params.get('wait', 0))
+    except ValueError:
+        return json_response({'error': "'since' must be a non-negative integer and 'wait' a number"},
+                             status=status.HTTP_400_BAD_REQUEST)
+    if since is None:
+        return json_response({'sequence': await broker.acurrent(), 'reset': False, 'changes': []})
+
+    deadline = time.monotonic() + wait
+    while True:
+        sequence, events = await broker.aread(since)
+        if events is None:
+            return json_response({'sequence': sequence, 'reset': True, 'changes': []})
+        if events or time.monotonic() >= deadline:
+            return json_response({'sequence': sequence, 'reset': False, 'changes': latest_per_zone(events)})
+        await asyncio.sleep(settings.CHANGEFEED_POLL_INTERVAL)
+
+
+def sse(event, data, sequence):
+    return f"id: {sequence}\nevent: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+async def stream_events(broker, since):
+    yield f"retry: {int(settings.CHANGEFEED_POLL_INTERVAL * 1000)}\n\n"
+    began = last_sent = time.monotonic()
+    while time.monotonic() - began < settings.CHANGEFEED_STREAM_TIMEOUT:
+        sequence, events = await broker.aread(since)
+        if events is None:
+            yield sse('reset', {'sequence': sequence}, sequence)
+        for event in latest_per_zone(events or []):
+            yield sse('zone', event, event['sequence'])
+        if events is None or events:
+            since = sequence
+            last_sent = time.monotonic()
+        elif time.monotonic() - last_sent >= settings.CHANGEFEED_HEARTBEAT:
+            yield ': keepalive\n\n'
+            last_sent = time.monotonic()
+        await asyncio.sleep(settings.CHANGEFEED_POLL_INTERVAL)
+
+
+@async_read_view
+async def zone_stream(request):
+    """
+    Server-Sent Events version of zone_changes, resumable through Last-Event-ID. Needs
+    ASGI: under WSGI Django buffers async streams, so WSGI clients should long-poll.
+    """
+    broker = get_broker()
+    try:
+        since = parse_sequence(request.headers.get('Last-Event-ID', request.query_params.get('since')))
+    except ValueError:
+        return json_response({'error': "'since' must be a non-negative integer"}, status=status.HTTP_400_BAD_REQUEST)
+    if since is None:
+        since = await broker.acurrent()
+    response = StreamingHttpResponse(stream_events(broker, since), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
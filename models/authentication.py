@@ -0,0 +1,95 @@
+"""
+Stateless JWT authentication: request.user is built from signed token claims, so an
+authenticated request needs no database round trip to identify the user.
+"""
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# Token ichiga yoziladigan User ustunlari (refresh da bazadagi User dan qayta yoziladi)
+CLAIM_FIELDS = ('username', 'is_staff', 'is_superuser', 'is_active')
+
+
+def set_claims(token, user):
+    for field in CLAIM_FIELDS:
+        token[field] = getattr(user, field)
+    return token
+
+
+def issue_tokens(user):
+    refresh = set_claims(RefreshToken.for_user(user), user)
+    return {'refresh': str(refresh), 'access': str(refresh.access_token)}
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Re-reads the user on refresh and writes CLAIM_FIELDS from it into the new tokens.
+    Copying them from the refresh token would keep a demoted admin's is_staff for the
+    whole refresh lifetime.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user = User.objects.filter(**{jwt_settings.USER_ID_FIELD: refresh.get(jwt_settings.USER_ID_CLAIM)}).first()
+        if user is None or not jwt_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        # Rotatsiya/blacklist simplejwt dagidek: yangilangan claimli token bilan davom etadi
+        return super().validate({**attrs, 'refresh': str(set_claims(refresh, user))})
+
+
+def claims_user(token):
+    """
+    A User instance carrying only the id and CLAIM_FIELDS. It can be assigned to foreign
+    keys as is; any other field is loaded from the database on first access.
+    """
+    claims = {'id': token[jwt_settings.USER_ID_CLAIM], **{field: token[field] for field in CLAIM_FIELDS}}
+    field_names = [field.attname for field in User._meta.concrete_fields if field.attname in claims]
+    return User.from_db(DEFAULT_DB_ALIAS, field_names, [claims[name] for name in field_names])
+
+
+def user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def get_cached_user(user_id):
+    """The full User, cached for AUTH_USER_CACHE_TIMEOUT seconds and dropped when it is saved."""
+    user = cache.get(user_cache_key(user_id))
+    if user is None:
+        user = User.objects.filter(pk=user_id).first()
+        if user is None:
+            raise AuthenticationFailed("User not found", code='user_not_found')
+        cache.set(user_cache_key(user_id), user, settings.AUTH_USER_CACHE_TIMEOUT)
+    return user
+
+
+@receiver([post_save, post_delete], sender=User)
+def drop_cached_user(sender, instance, **kwargs):
+    cache.delete(user_cache_key(instance.pk))
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication without the per-request User query. Tokens issued before the
+    claims were added fall back to the TTL-cached User. Claims are re-read from the
+    database on refresh, so a demotion or deactivation takes effect within
+    ACCESS_TOKEN_LIFETIME; a password change does not revoke issued tokens.
+    """
+
+    def get_user(self, validated_token):
+        if jwt_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken("Token contained no recognizable user identification")
+        if all(field in validated_token for field in CLAIM_FIELDS):
+            user = claims_user(validated_token)
+        else:
+            user = get_cached_user(validated_token[jwt_settings.USER_ID_CLAIM])
+        if not user.is_active:
+            raise AuthenticationFailed("User is inactive", code='user_inactive')
+        return user
@@ -0,0 +1,40 @@
+from .models import Booking
+
+
+def overlapping_bookings(parking_zone, start, end):
+    # (parking_zone, end_time, start_time) indeksi: tugagan bronlar skan qilinmaydi
+    return Booking.objects.filter(
+        parking_zone=parking_zone, end_time__gt=start, start_time__lt=end
+    )
+
+
+def peak_occupancy(parking_zone, start, end):
+    """Maximum number of bookings that overlap at any instant of [start, end)."""
+    return peak_of(overlapping_intervals(parking_zone, start, end), start, end)
+
+
+async def apeak_occupancy(parking_zone, start, end):
+    return peak_of([interval async for interval in overlapping_intervals(parking_zone, start, end)], start, end)
+
+
+def overlapping_intervals(parking_zone, start, end):
+    return overlapping_bookings(parking_zone, start, end).values_list('start_time', 'end_time')
+
+
+def peak_of(intervals, start, end):
+    events = []
+    for booking_start, booking_end in intervals:
+        events.append((max(booking_start, start), 1))
+        events.append((min(booking_end, end), -1))
+    # Bir vaqtda tugagan bron yangi boshlanganidan oldin hisoblanadi
+    events.sort()
+
+    occupied = peak = 0
+    for _, delta in events:
+        occupied += delta
+        peak = max(peak, occupied)
+    return peak
+
+
+def free_spots(parking_zone, start, end):
+    return max(parking_zone.total_spots - peak_occupancy(parking_zone, start, end), 0)
@@ -0,0 +1,74 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+
+from .changefeed import publish_zone_changes
+
+ZONE_LIST_VERSION_KEY = 'parking-zones:version'
+TARIFFS_KEY = 'tariffs:rules'
+
+PROCESS_LOCAL_CACHE_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def check_shared_cache():
+    """
+    Zone versions, the change feed, token buckets and idempotency locks must be seen by
+    every worker; refuses to start outside DEBUG when they would live in one process.
+    """
+    if settings.DEBUG or settings.ALLOW_PROCESS_LOCAL_CACHE:
+        return
+    for alias in {'default', settings.IDEMPOTENCY_CACHE}:
+        backend = settings.CACHES[alias]['BACKEND']
+        if backend in PROCESS_LOCAL_CACHE_BACKENDS:
+            raise ImproperlyConfigured(
+                f"CACHES['{alias}'] uses {backend}, which is not shared between workers: cached zone "
+                f"ETags, throttling and Idempotency-Key locks would diverge. Set CACHE_BACKEND/CACHE_LOCATION "
+                f"to a shared cache (Redis, Memcached, database) or ALLOW_PROCESS_LOCAL_CACHE=True for a "
+                f"single worker."
+            )
+
+
+def zone_version_key(pk):
+    return f'parking-zone:{pk}:version'
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        # Versiya cache dan o'chib ketgan bo'lsa, eski ETag lar bilan to'qnashmaydigan yangi qiymat
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_version(key):
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_zone_versions(*zone_ids):
+    for key in [ZONE_LIST_VERSION_KEY, *map(zone_version_key, zone_ids)]:
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Kalit yo'q: keyingi get_version yangi versiya yaratadi
+            pass
+
+
+def invalidate_zones(*zone_ids):
+    transaction.on_commit(lambda: bump_zone_versions(*zone_ids))
+    # Feed ga yozishdagi xato allaqachon commit bo'lgan so'rovni buzmasligi kerak
+    transaction.on_commit(lambda: publish_zone_changes(zone_ids), robust=True)
+
+
+def invalidate_tariffs():
+    transaction.on_commit(lambda: cache.delete(TARIFFS_KEY))
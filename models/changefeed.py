@@ -0,0 +1,135 @@
+"""
+Zone availability change feed.
+
+Every committed change to a zone (booking create/move/delete, expiry sweep, zone edit)
+is published to a broker under a monotonically increasing sequence number. Clients
+take the current sequence from /changes/, load /api/parking-zones/ once and then ask
+only for the zones that changed after that sequence. A read whose sequence is no
+longer retained comes back as a reset, and the client reloads the full list.
+"""
+import threading
+from collections import deque
+from functools import lru_cache
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+
+class LocMemBroker:
+    """Single-process broker for tests and runserver."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sequence = 0
+        self.events = deque(maxlen=settings.CHANGEFEED_RETENTION)
+
+    def publish(self, changes):
+        with self.lock:
+            for change in changes:
+                self.sequence += 1
+                self.events.append({**change, 'sequence': self.sequence})
+            return self.sequence
+
+    def read(self, since):
+        """Returns (sequence, events after since); events is None when since can't be served."""
+        with self.lock:
+            oldest = self.events[0]['sequence'] if self.events else self.sequence + 1
+            if since > self.sequence or since < oldest - 1:
+                return self.sequence, None
+            return self.sequence, list(islice(self.events, since - oldest + 1, None))
+
+    async def aread(self, since):
+        return self.read(since)
+
+    async def acurrent(self):
+        return self.sequence
+
+
+class CacheBroker:
+    """Shares the feed between workers through the Django cache (Redis etc.)."""
+    sequence_key = 'changefeed:sequence'
+
+    def event_key(self, sequence):
+        return f'changefeed:event:{sequence}'
+
+    def publish(self, changes):
+        if not changes:
+            return None
+        try:
+            last = cache.incr(self.sequence_key, len(changes))
+        except ValueError:
+            cache.add(self.sequence_key, 0, timeout=None)
+            last = cache.incr(self.sequence_key, len(changes))
+        first = last - len(changes) + 1
+        cache.set_many(
+            {self.event_key(first + i): {**change, 'sequence': first + i} for i, change in enumerate(changes)},
+            timeout=settings.CHANGEFEED_EVENT_TIMEOUT,
+        )
+        return last
+
+    def read(self, since):
+        sequence = cache.get(self.sequence_key, 0)
+        keys = self.event_keys(since, sequence)
+        return self.collect(since, sequence, keys, cache.get_many(keys) if keys else {})
+
+    async def aread(self, since):
+        sequence = await cache.aget(self.sequence_key, 0)
+        keys = self.event_keys(since, sequence)
+        return self.collect(since, sequence, keys, await cache.aget_many(keys) if keys else {})
+
+    async def acurrent(self):
+        return await cache.aget(self.sequence_key, 0)
+
+    def event_keys(self, since, sequence):
+        if since < sequence <= since + settings.CHANGEFEED_RETENTION:
+            return [self.event_key(seq) for seq in range(since + 1, sequence + 1)]
+        return []
+
+    def collect(self, since, sequence, keys, found):
+        if since > sequence or sequence - since > settings.CHANGEFEED_RETENTION:
+            return sequence, None
+        events = []
+        for key in keys:
+            if key not in found:
+                # Keyingi hodisa bor, bu esa yo'q: muddati o'tgan -> reset; aks holda hali yozilmoqda
+                if any(later in found for later in keys[len(events):]):
+                    return sequence, None
+                break
+            events.append(found[key])
+        return since + len(events), events
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(settings.CHANGEFEED_BROKER)()
+
+
+def publish_zone_changes(zone_ids):
+    """Publishes the current availability of the given zones; deleted zones are flagged."""
+    from .models import ParkingZone
+
+    zone_ids = list(dict.fromkeys(zone_ids))
+    if not zone_ids:
+        return
+    zones = {
+        pk: (spots_left, total_spots)
+        for pk, spots_left, total_spots in ParkingZone.objects.filter(pk__in=zone_ids).values_list(
+            'pk', 'spots_left', 'total_spots'
+        )
+    }
+    changes = []
+    for pk in zone_ids:
+        if pk in zones:
+            available_spots, total_spots = zones[pk]
+            changes.append({'parking_zone': pk, 'available_spots': available_spots, 'total_spots': total_spots})
+        else:
+            changes.append({'parking_zone': pk, 'deleted': True})
+    get_broker().publish(changes)
+
+
+def latest_per_zone(events):
+    # Bir zona bir necha marta o'zgargan bo'lsa, faqat oxirgi holati yuboriladi
+    latest = {event['parking_zone']: event for event in events}
+    return sorted(latest.values(), key=lambda event: event['sequence'])
@@ -0,0 +1,57 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Booking
+
+EXPORT_COLUMNS = [
+    ('id', 'id'),
+    ('username', 'user__username'),
+    ('plate_number', 'car__plate_number'),
+    ('parking_zone', 'parking_zone__name'),
+    ('start_time', 'start_time'),
+    ('end_time', 'end_time'),
+    ('penalty', 'penalty'),
+]
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def export_queryset(start=None, end=None, penalties_only=False):
+    queryset = Booking.objects.order_by('start_time', 'id')
+    if start is not None:
+        queryset = queryset.filter(start_time__gte=start)
+    if end is not None:
+        queryset = queryset.filter(start_time__lt=end)
+    if penalties_only:
+        queryset = queryset.filter(penalty__gt=0)
+    return queryset.values_list(*(lookup for _, lookup in EXPORT_COLUMNS))
+
+
+class Echo:
+    """csv.writer target that hands each row back instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(queryset, chunk_size=2000):
+    writer = csv.writer(Echo())
+    yield writer.writerow([name for name, _ in EXPORT_COLUMNS])
+    for row in queryset.iterator(chunk_size=chunk_size):
+        yield writer.writerow([value.isoformat() if hasattr(value, 'isoformat') else value for value in row])
+
+
+def iter_ndjson(queryset, chunk_size=2000):
+    names = [name for name, _ in EXPORT_COLUMNS]
+    for row in queryset.iterator(chunk_size=chunk_size):
+        yield json.dumps(dict(zip(names, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+def iter_export(export_format, queryset, chunk_size=2000):
+    if export_format == 'csv':
+        return iter_csv(queryset, chunk_size)
+    return iter_ndjson(queryset, chunk_size)
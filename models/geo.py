@@ -0,0 +1,64 @@
+import heapq
+import math
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db.models import Q
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def cells_per_row():
+    return math.ceil(360 / settings.ZONE_GRID_CELL_DEGREES)
+
+
+def grid_position(latitude, longitude):
+    size = settings.ZONE_GRID_CELL_DEGREES
+    return int((latitude + 90) // size), min(int((longitude + 180) // size), cells_per_row() - 1)
+
+
+def grid_cell(latitude, longitude):
+    """Single integer id of the fixed-size lat/lon grid cell, row-major so a row of cells is one range."""
+    if latitude is None or longitude is None:
+        return None
+    row, column = grid_position(latitude, longitude)
+    return row * cells_per_row() + column
+
+
+def cell_ring_filter(latitude, longitude, rings):
+    # (2*rings+1) ta qator, har biri grid_cell indeksida bitta oraliq
+    row, column = grid_position(latitude, longitude)
+    width = cells_per_row()
+    first, last = max(column - rings, 0), min(column + rings, width - 1)
+    return reduce(or_, (
+        Q(grid_cell__range=(r * width + first, r * width + last))
+        for r in range(max(row - rings, 0), row + rings + 1)
+    ))
+
+
+def nearest_zones(queryset, latitude, longitude, k):
+    """
+    k nearest zones by expanding square rings of grid cells until the k-th result is
+    closer than the ring's guaranteed radius. Returns [(distance_km, zone)] sorted by distance.
+    """
+    size_km = settings.ZONE_GRID_CELL_DEGREES * KM_PER_DEGREE
+    rings = 1
+    while True:
+        zones = queryset.filter(cell_ring_filter(latitude, longitude, rings))
+        found = heapq.nsmallest(k, (
+            (haversine_km(latitude, longitude, zone.latitude, zone.longitude), zone.pk, zone) for zone in zones
+        ))
+        # Kvadrat ichidagi doira: nuqtadan shu masofagacha barcha zonalar ko'rib chiqilgan
+        widest_latitude = min(abs(latitude) + rings * settings.ZONE_GRID_CELL_DEGREES, 90)
+        covered_km = rings * size_km * math.cos(math.radians(widest_latitude))
+        if (len(found) == k and found[-1][0] <= covered_km) or rings >= settings.ZONE_NEARBY_MAX_RINGS:
+            return [(distance, zone) for distance, _, zone in found]
+        rings *= 2
@@ -0,0 +1,111 @@
+"""
+Idempotency-Key support for unsafe requests. The first response for a key is stored
+for IDEMPOTENCY_TTL seconds and replayed to retries without running the view again;
+a retry that arrives while the original is still running waits for its result. The
+key is resolved before throttling and admission control, so a retry neither spends a
+bucket token nor holds a load-shed slot.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http.request import RawPostDataException
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.throttling import BaseThrottle
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+
+class Replay(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+def error(message, status_code):
+    return Replay(Response({'error': message}, status=status_code))
+
+
+class IdempotencyMixin:
+    """
+    Honours the Idempotency-Key header on idempotent_actions (None: every unsafe method).
+    Keys are scoped to the user (or client IP) and the view; reusing a key with a
+    different request body is rejected with 422.
+    """
+    idempotent_actions = None
+
+    def initial(self, request, *args, **kwargs):
+        self.idempotency_key = None
+        super().initial(request, *args, **kwargs)
+
+    def check_throttles(self, request):
+        # Autentifikatsiyadan keyin, throttle va admission dan oldin: takror so'rov token ham, slot ham olmaydi
+        self.claim_idempotency_key(request)
+        super().check_throttles(request)
+
+    def claim_idempotency_key(self, request):
+        """Raises Replay with the stored (or awaited) response, or takes the key's lock."""
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None or request.method in ('GET', 'HEAD', 'OPTIONS'):
+            return
+        if self.idempotent_actions is not None and getattr(self, 'action', None) not in self.idempotent_actions:
+            return
+        if not 0 < len(key) <= 255:
+            raise error(f"'{IDEMPOTENCY_HEADER}' must be 1-255 characters", status.HTTP_400_BAD_REQUEST)
+
+        user = request.user
+        owner = f'user:{user.pk}' if user and user.is_authenticated else f'ip:{BaseThrottle().get_ident(request)}'
+        cache_key = f'idempotency:{type(self).__name__}:{owner}:{key}'
+        try:
+            body = request.body
+        except RawPostDataException:
+            body = repr(request.data).encode()
+        fingerprint = hashlib.sha256(f'{request.method} {request.path}\n'.encode() + body).hexdigest()
+        store = caches[settings.IDEMPOTENCY_CACHE]
+
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT
+        while True:
+            stored = store.get(cache_key)
+            if stored is not None:
+                stored_fingerprint, status_code, data = stored
+                if stored_fingerprint != fingerprint:
+                    raise error(f"'{IDEMPOTENCY_HEADER}' was already used for a different request",
+                                status.HTTP_422_UNPROCESSABLE_ENTITY)
+                raise Replay(Response(data, status=status_code, headers={'Idempotent-Replayed': 'true'}))
+            # Kalitni egallagan so'rov view ni bajaradi, qolganlari uning natijasini kutadi
+            if store.add(f'{cache_key}:lock', fingerprint, timeout=settings.IDEMPOTENCY_LOCK_TIMEOUT):
+                self.idempotency_key = (cache_key, fingerprint)
+                return
+            if time.monotonic() >= deadline:
+                raise error(f"A request with this '{IDEMPOTENCY_HEADER}' is still in progress",
+                            status.HTTP_409_CONFLICT)
+            time.sleep(0.05)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, Replay):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def raise_uncaught_exception(self, exc):
+        # View yiqildi: kutayotgan takrorlar o'zi bajarishi uchun kalit bo'shatiladi
+        self.release_idempotency_key()
+        super().raise_uncaught_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        # 5xx va 429 saqlanmaydi: qayta urinish haqiqatan qayta bajarilishi kerak
+        if response.status_code < 500 and response.status_code != status.HTTP_429_TOO_MANY_REQUESTS:
+            self.release_idempotency_key(response)
+        else:
+            self.release_idempotency_key()
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    def release_idempotency_key(self, response=None):
+        if getattr(self, 'idempotency_key', None) is None:
+            return
+        cache_key, fingerprint = self.idempotency_key
+        self.idempotency_key = None
+        store = caches[settings.IDEMPOTENCY_CACHE]
+        if response is not None:
+            store.set(cache_key, (fingerprint, response.status_code, response.data), settings.IDEMPOTENCY_TTL)
+        store.delete(f'{cache_key}:lock')
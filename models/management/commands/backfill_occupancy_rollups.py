@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from models.models import Booking, OccupancyRollup, ParkingZone
+from models.rollups import add_contribution, new_deltas
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds OccupancyRollup rows from the booking table, one zone at a time. "
+        "Run it while booking writes to the rebuilt zones are paused."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--zone', type=int, action='append', help="Only this zone (repeatable)")
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        zones = ParkingZone.objects.order_by('id')
+        if options['zone']:
+            zones = zones.filter(id__in=options['zone'])
+
+        began = time.perf_counter()
+        total = 0
+        for parking_zone_id in zones.values_list('id', flat=True).iterator():
+            # Bitta zonaning barcha oraliqlari xotirada yig'iladi, so'ng bulk_create
+            deltas = new_deltas()
+            count = 0
+            queryset = Booking.objects.filter(parking_zone_id=parking_zone_id).only(
+                'parking_zone_id', 'start_time', 'end_time', 'penalty'
+            )
+            for booking in queryset.iterator(chunk_size=options['chunk_size']):
+                add_contribution(deltas, booking)
+                count += 1
+
+            with transaction.atomic():
+                OccupancyRollup.objects.filter(parking_zone_id=parking_zone_id).delete()
+                OccupancyRollup.objects.bulk_create(
+                    (
+                        OccupancyRollup(parking_zone_id=zone_id, period=period, bucket_start=bucket_start,
+                                        bookings=bookings, occupied_minutes=minutes, penalty_total=penalty)
+                        for (zone_id, period, bucket_start), (bookings, minutes, penalty) in deltas.items()
+                    ),
+                    batch_size=options['chunk_size'],
+                )
+            total += count
+            if options['verbosity'] > 1:
+                self.stdout.write(f"  zone {parking_zone_id}: {count} bookings, {len(deltas)} buckets")
+
+        elapsed = time.perf_counter() - began
+        self.stdout.write(f"Backfilled rollups from {total} bookings in {elapsed:.1f}s")
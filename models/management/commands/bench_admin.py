@@ -0,0 +1,58 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from models.models import Booking, ParkingZone
+
+
+class Command(BaseCommand):
+    help = (
+        "Times the Booking, Car and Profile admin changelists (unfiltered, filtered, date drill-down, deep page) "
+        "and the booking add form. Uses existing rows (run seed_data first)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        booking = Booking.objects.order_by('-start_time').first()
+        if booking is None:
+            raise CommandError("No bookings; run seed_data first")
+        zone = ParkingZone.objects.order_by('id').first()
+        admin_user = User.objects.create_superuser(f"bench-admin-{time.time_ns()}", 'bench@example.com', None)
+        client = Client()
+        client.force_login(admin_user)
+        start = booking.start_time
+        urls = [
+            '/admin/models/booking/',
+            f'/admin/models/booking/?parking_zone__id__exact={zone.pk}',
+            f'/admin/models/booking/?user__id__exact={booking.user_id}',
+            f'/admin/models/booking/?start_time__year={start.year}',
+            f'/admin/models/booking/?start_time__year={start.year}&start_time__month={start.month}',
+            '/admin/models/booking/?p=500',
+            '/admin/models/booking/add/',
+            '/admin/models/car/',
+            '/admin/models/profile/',
+        ]
+        try:
+            self.stdout.write(f"largest booking id={Booking.objects.order_by('-id').values_list('id', flat=True).first()}")
+            for url in urls:
+                client.get(url)
+                timings = []
+                for _ in range(options['repeat']):
+                    with CaptureQueriesContext(connection) as queries:
+                        began = time.perf_counter()
+                        response = client.get(url)
+                        timings.append(time.perf_counter() - began)
+                    if response.status_code != 200:
+                        raise CommandError(f"{url} returned {response.status_code}")
+                self.stdout.write(
+                    f"{url:<72} {min(timings) * 1000:>8.1f}ms queries={len(queries):<3} "
+                    f"{len(response.content) / 1024:>7.0f}KB"
+                )
+        finally:
+            admin_user.delete()
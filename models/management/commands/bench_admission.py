@@ -0,0 +1,86 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+
+from models.authentication import issue_tokens
+from models.models import Car, ParkingZone
+from models.throttling import get_bucket_store, get_shedder
+
+NO_BUCKETS = {'bookings': (1e9, 10**9), 'register': (1e9, 10**9)}
+
+
+class Command(BaseCommand):
+    help = (
+        "Overloads POST /api/bookings/ from many threads and compares the latency of admitted requests "
+        "with and without load shedding; then checks a single client's token bucket."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=32)
+        parser.add_argument('--requests', type=int, default=600)
+        parser.add_argument('--max-in-flight', type=int, default=4)
+
+    def handle(self, *args, **options):
+        user = User.objects.create_user(username=f"bench-admission-{time.time_ns()}")
+        car = Car.objects.create(user=user, make='Bench', model='Admission', plate_number='ADMIT')
+        zone = ParkingZone.objects.create(name='Admission zone', location='-', total_spots=10**6, available_spots=10**6)
+        headers = {'Authorization': f"Bearer {issue_tokens(user)['access']}"}
+        payload = {'car': car.pk, 'parking_zone': zone.pk, 'start_time': '2031-01-01T10:00:00.000Z'}
+
+        try:
+            scenarios = [
+                ('unprotected', {'LOAD_SHED_MAX_IN_FLIGHT': 10**9, 'LOAD_SHED_LATENCY': float('inf')}),
+                ('load shedding', {'LOAD_SHED_MAX_IN_FLIGHT': options['max_in_flight']}),
+            ]
+            for name, overrides in scenarios:
+                with override_settings(THROTTLE_BUCKETS=NO_BUCKETS, **overrides):
+                    get_shedder.cache_clear()
+                    results = self.overload(payload, headers, options['threads'], options['requests'])
+                self.report(name, results)
+
+            with override_settings(THROTTLE_STORE='models.throttling.LocMemBucketStore',
+                                   THROTTLE_BUCKETS={'bookings': (1.0, 5)}):
+                get_bucket_store.cache_clear()
+                client = Client()
+                responses = [client.post('/api/bookings/', payload, content_type='application/json', headers=headers)
+                             for _ in range(8)]
+                get_bucket_store.cache_clear()
+            codes = [response.status_code for response in responses]
+            self.stdout.write(f"token bucket rate=1/s burst=5, 8 requests: {codes} "
+                              f"Retry-After={responses[-1].get('Retry-After')}")
+            if codes != [201] * 5 + [429] * 3:
+                raise CommandError("Token bucket did not enforce its burst")
+        finally:
+            user.delete()
+            zone.delete()
+
+    def overload(self, payload, headers, threads, total):
+        local = threading.local()
+
+        def request(_):
+            if not hasattr(local, 'client'):
+                local.client = Client()
+            began = time.perf_counter()
+            response = local.client.post('/api/bookings/', payload, content_type='application/json', headers=headers)
+            return response.status_code, time.perf_counter() - began
+
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            began = time.perf_counter()
+            results = list(pool.map(request, range(total)))
+            return results, time.perf_counter() - began
+
+    def report(self, name, results):
+        results, elapsed = results
+        admitted = sorted(latency for code, latency in results if code == 201)
+        shed = [latency for code, latency in results if code == 429]
+        other = len(results) - len(admitted) - len(shed)
+        p = lambda values, q: values[min(len(values) - 1, int(len(values) * q))] * 1000 if values else 0
+        self.stdout.write(
+            f"{name:<14} admitted={len(admitted):>4} ({len(admitted) / elapsed:.0f}/s) 429={len(shed):>4} other={other} "
+            f"admitted p50={p(admitted, 0.5):.1f}ms p99={p(admitted, 0.99):.1f}ms "
+            f"429 p99={p(sorted(shed), 0.99):.1f}ms"
+        )
@@ -0,0 +1,162 @@
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.utils import timezone
+
+from models.authentication import issue_tokens
+from models.models import Car, ParkingZone
+
+FLOWS = ('poll', 'list', 'create', 'login')
+NO_ADMISSION = {
+    'THROTTLE_BUCKETS': {},
+    'LOAD_SHED_MAX_IN_FLIGHT': 10**9,
+    'LOAD_SHED_LATENCY': float('inf'),
+}
+
+
+def percentile(values, q):
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs the main API flows in process against rows made by seed_data: zone polling (ETag), booking list, "
+        "booking create and login. Prints throughput and p50/p95/p99 per flow; --save/--compare turn a run "
+        "into a regression gate."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--flows', default=','.join(FLOWS), help=f"Comma-separated subset of {', '.join(FLOWS)}")
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=10.0, help="Seconds per flow")
+        parser.add_argument('--users', type=int, default=200, help="Seeded users the clients act as")
+        parser.add_argument('--prefix', default='seed')
+        parser.add_argument('--password', default='seed-password')
+        parser.add_argument('--admission', action='store_true', help="Keep throttling and load shedding on")
+        parser.add_argument('--save', help="Write the results to this JSON file")
+        parser.add_argument('--compare', help="Fail if worse than the results in this JSON file")
+        parser.add_argument('--tolerance', type=float, default=15.0, help="Allowed regression for --compare, %%")
+
+    def handle(self, *args, **options):
+        flows = [flow.strip() for flow in options['flows'].split(',')]
+        unknown = set(flows) - set(FLOWS)
+        if unknown:
+            raise CommandError(f"Unknown flows: {', '.join(sorted(unknown))}")
+
+        users = list(User.objects.filter(username__startswith=f"{options['prefix']}-")
+                     .order_by('id')[:options['users']])
+        cars = dict(Car.objects.filter(user__in=users).order_by('id').values_list('user_id', 'id'))
+        zone_ids = list(ParkingZone.objects.filter(name__startswith=f"{options['prefix']} ").values_list('id', flat=True))
+        if not users or not zone_ids:
+            raise CommandError(f"No rows with prefix '{options['prefix']}'; run seed_data first")
+        self.clients = [
+            {'user': user, 'car': cars.get(user.pk), 'headers': {'Authorization': f"Bearer {issue_tokens(user)['access']}"}}
+            for user in users
+        ]
+        self.zone_ids = zone_ids
+        self.password = options['password']
+        # Yaratilgan bronlar alohida zonaga tushadi: seed ma'lumotlari o'zgarmaydi, har run bir xil boshlanadi
+        self.create_zone = ParkingZone.objects.create(name='bench-api zone', location='-',
+                                                      total_spots=10**9, available_spots=10**9)
+        self.local = threading.local()
+
+        results = {}
+        try:
+            with override_settings(**({} if options['admission'] else NO_ADMISSION)):
+                for flow in flows:
+                    results[flow] = self.run(flow, options['concurrency'], options['duration'])
+                    self.report(flow, results[flow])
+        finally:
+            self.create_zone.delete()
+
+        if options['save']:
+            with open(options['save'], 'w') as fh:
+                json.dump({'concurrency': options['concurrency'], 'flows': results}, fh, indent=2)
+        if options['compare']:
+            self.compare(results, options['compare'], options['tolerance'])
+
+    def run(self, flow, concurrency, duration):
+        request = getattr(self, f'request_{flow}')
+        deadline = time.perf_counter() + duration
+
+        def worker(_):
+            self.local.client = Client()
+            self.local.etags = {}
+            samples = []
+            while time.perf_counter() < deadline:
+                began = time.perf_counter()
+                response = request(random.choice(self.clients))
+                samples.append((time.perf_counter() - began, response.status_code))
+            return samples
+
+        began = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = [sample for samples in pool.map(worker, range(concurrency)) for sample in samples]
+        elapsed = time.perf_counter() - began
+
+        latencies = sorted(latency for latency, _ in samples)
+        errors = sum(1 for _, status_code in samples if status_code >= 400)
+        return {
+            'requests': len(samples),
+            'errors': errors,
+            'rps': len(samples) / elapsed,
+            'p50': percentile(latencies, 0.50) * 1000,
+            'p95': percentile(latencies, 0.95) * 1000,
+            'p99': percentile(latencies, 0.99) * 1000,
+        }
+
+    def request_poll(self, client):
+        # Mijoz zonani ETag bilan so'raydi: o'zgarmagan bo'lsa 304
+        zone_id = random.choice(self.zone_ids)
+        etag = self.local.etags.get(zone_id)
+        response = self.local.client.get(f'/api/parking-zones/{zone_id}/',
+                                         headers={'If-None-Match': etag} if etag else {})
+        if response.has_header('ETag'):
+            self.local.etags[zone_id] = response['ETag']
+        return response
+
+    def request_list(self, client):
+        return self.local.client.get('/api/bookings/', headers=client['headers'])
+
+    def request_create(self, client):
+        start = timezone.now() + timedelta(days=random.randint(1, 30), minutes=random.randrange(1440))
+        payload = {
+            'car': client['car'], 'parking_zone': self.create_zone.pk,
+            'start_time': start.strftime('%Y-%m-%dT%H:%M:%S.%fZ'),
+        }
+        return self.local.client.post('/api/bookings/', payload, content_type='application/json',
+                                      headers=client['headers'])
+
+    def request_login(self, client):
+        return self.local.client.post('/auth/login/', {'username': client['user'].username, 'password': self.password},
+                                      content_type='application/json')
+
+    def report(self, flow, result):
+        self.stdout.write(
+            f"{flow:<7} requests={result['requests']:>6} errors={result['errors']:>4} {result['rps']:>8.1f} req/s "
+            f"p50={result['p50']:>7.2f}ms p95={result['p95']:>7.2f}ms p99={result['p99']:>7.2f}ms"
+        )
+
+    def compare(self, results, path, tolerance):
+        with open(path) as fh:
+            baseline = json.load(fh)['flows']
+        regressions = []
+        for flow, result in results.items():
+            before = baseline.get(flow)
+            if before is None:
+                continue
+            rps_change = (result['rps'] - before['rps']) / before['rps'] * 100
+            p95_change = (result['p95'] - before['p95']) / before['p95'] * 100
+            self.stdout.write(f"{flow:<7} vs baseline: throughput {rps_change:+.1f}% p95 {p95_change:+.1f}%")
+            if rps_change < -tolerance or p95_change > tolerance:
+                regressions.append(flow)
+        if regressions:
+            raise CommandError(f"Regression beyond {tolerance}%: {', '.join(regressions)}")
+        self.stdout.write(self.style.SUCCESS("OK: no regression against baseline"))
@@ -0,0 +1,190 @@
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import timedelta
+
+import aiohttp
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from models.models import Booking, Car, ParkingZone
+
+# (sinxron DRF yo'li, native async yo'l); {zone}, {window}, {since} va {wait} ishga tushganda to'ldiriladi
+ENDPOINTS = {
+    'zone-detail': ('/api/parking-zones/{zone}/', '/api/async/parking-zones/{zone}/'),
+    'availability': ('/api/parking-zones/{zone}/availability/?{window}',
+                     '/api/async/parking-zones/{zone}/availability/?{window}'),
+    'bookings': ('/api/bookings/?page_size=20', '/api/async/bookings/mine/?page_size=20'),
+    # Long-poll: sinxron varianti yo'q, har so'rov --wait sekund kutadi
+    'changes': (None, '/api/async/parking-zones/changes/?since={since}&wait={wait}'),
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Server:
+    """Runs the project under a real server in a subprocess sharing this process's settings."""
+
+    COMMANDS = {
+        # runserver: WSGI, har ulanish uchun alohida thread
+        'wsgi': lambda port: [sys.executable, 'manage.py', 'runserver', f'127.0.0.1:{port}', '--noreload'],
+        'asgi': lambda port: [sys.executable, '-m', 'uvicorn', 'easy_parking.asgi:application',
+                              '--port', str(port), '--log-level', 'warning'],
+    }
+
+    def __init__(self, kind):
+        self.port = free_port()
+        self.url = f'http://127.0.0.1:{self.port}'
+        self.process = subprocess.Popen(
+            self.COMMANDS[kind](self.port), cwd=settings.BASE_DIR, env=os.environ.copy(),
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        )
+        deadline = time.monotonic() + 30
+        while True:
+            if self.process.poll() is not None:
+                raise CommandError(f"{kind} server exited: {self.process.stderr.read().decode()[-2000:]}")
+            try:
+                socket.create_connection(('127.0.0.1', self.port), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    self.stop()
+                    raise CommandError(f"{kind} server did not start in 30s")
+                time.sleep(0.1)
+
+    def threads(self):
+        with open(f'/proc/{self.process.pid}/status') as status:
+            for line in status:
+                if line.startswith('Threads:'):
+                    return int(line.split()[1])
+        return 0
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+class ThreadSampler:
+    """Records the peak number of server threads while a scenario runs."""
+
+    def __init__(self, server):
+        self.server = server
+        self.peak = server.threads()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        while not self.stopped.wait(0.005):
+            self.peak = max(self.peak, self.server.threads())
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test of the read endpoints against real servers: sync views under WSGI (runserver, "
+        "thread per connection), the same sync views under ASGI (uvicorn) and the native async "
+        "views under ASGI. Reports req/s, p50/p99 latency and the server's peak thread count per "
+        "concurrency level. Needs uvicorn and a file-backed DATABASE_NAME."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), default='availability')
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 16, 64])
+        parser.add_argument('--requests', type=int, default=400, help="Requests per scenario")
+        parser.add_argument('--bookings', type=int, default=200)
+        parser.add_argument('--wait', type=float, default=1, help="Long-poll wait for --endpoint changes")
+
+    def handle(self, *args, **options):
+        user = User.objects.create_user(username=f"bench-asgi-{time.time_ns()}")
+        car = Car.objects.create(user=user, make='Bench', model='ASGI', plate_number='ASGI')
+        zone = ParkingZone.objects.create(name='ASGI zone', location='-', total_spots=1000, available_spots=1000)
+        now = timezone.now().replace(microsecond=0)
+        Booking.objects.bulk_create(
+            Booking(user=user, car=car, parking_zone=zone,
+                    start_time=now + timedelta(minutes=i), end_time=now + timedelta(minutes=i + 90))
+            for i in range(options['bookings'])
+        )
+        window = f"from={now.strftime('%Y-%m-%dT%H:%M:%SZ')}&to={(now + timedelta(days=1)).strftime('%Y-%m-%dT%H:%M:%SZ')}"
+        headers = {'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+
+        servers = {}
+        try:
+            servers['wsgi'] = Server('wsgi')
+            servers['asgi'] = Server('asgi')
+            # Feed ketma-ketligi server jarayonining cache idan olinadi
+            since = asyncio.run(self.fetch_json(servers['asgi'].url + '/api/async/parking-zones/changes/'))['sequence']
+            sync_url, async_url = (
+                url and url.format(zone=zone.pk, window=window, since=since, wait=options['wait'])
+                for url in ENDPOINTS[options['endpoint']]
+            )
+            for concurrency in options['concurrency']:
+                scenarios = [
+                    ('wsgi sync', servers['wsgi'], sync_url),
+                    ('asgi sync', servers['asgi'], sync_url),
+                    ('asgi async', servers['asgi'], async_url),
+                ]
+                for name, server, url in scenarios:
+                    if url is None:
+                        continue
+                    with ThreadSampler(server) as sampler:
+                        began = time.perf_counter()
+                        latencies = asyncio.run(
+                            self.run_load(server.url + url, headers, concurrency, options['requests'])
+                        )
+                        elapsed = time.perf_counter() - began
+                    self.report(name, concurrency, latencies, elapsed, sampler.peak)
+        finally:
+            for server in servers.values():
+                server.stop()
+            user.delete()
+            zone.delete()
+
+    async def fetch_json(self, url):
+        async with aiohttp.ClientSession() as session, session.get(url) as response:
+            return await response.json()
+
+    async def run_load(self, url, headers, concurrency, total):
+        connector = aiohttp.TCPConnector(limit=concurrency)
+        async with aiohttp.ClientSession(connector=connector, headers=headers) as session:
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def request():
+                async with semaphore:
+                    began = time.perf_counter()
+                    async with session.get(url) as response:
+                        body = await response.read()
+                    if response.status != 200:
+                        raise CommandError(f"{url}: {response.status} {body[:200]}")
+                    return time.perf_counter() - began
+
+            return await asyncio.gather(*(request() for _ in range(total)))
+
+    def report(self, name, concurrency, latencies, elapsed, peak_threads):
+        latencies = sorted(latencies)
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        self.stdout.write(
+            f"{name:<11} c={concurrency:<4} {len(latencies) / elapsed:>7.0f} req/s  "
+            f"p50={statistics.median(latencies) * 1000:>7.1f}ms p99={p99 * 1000:>7.1f}ms threads={peak_threads}"
+        )
@@ -0,0 +1,69 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from models.authentication import StatelessJWTAuthentication, issue_tokens, user_cache_key
+from models.models import ParkingZone
+
+
+class Command(BaseCommand):
+    help = "Queries and time per authenticated request for each authenticator, plus end-to-end with the configured chain."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+
+    def handle(self, *args, **options):
+        password = 'bench-auth-password'
+        user = User.objects.create_user(username=f"bench-auth-{time.time_ns()}", password=password)
+        zone = ParkingZone.objects.create(name='Auth zone', location='-', total_spots=1, available_spots=1)
+        claims_token = issue_tokens(user)['access']
+        plain_token = str(AccessToken.for_user(user))
+        factory = APIRequestFactory()
+        try:
+            scenarios = [
+                ('jwt-db', JWTAuthentication, claims_token),
+                ('jwt claims', StatelessJWTAuthentication, claims_token),
+                ('jwt no claims (TTL cache)', StatelessJWTAuthentication, plain_token),
+            ]
+            for name, authenticator, token in scenarios:
+                cache.delete(user_cache_key(user.pk))
+
+                def authenticate():
+                    request = factory.get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+                    return Request(request, authenticators=[authenticator()]).user
+
+                self.measure(name, authenticate, options['requests'])
+
+            # To'liq so'rov: zona kesh dan qaytadi, qolgan so'rovlar faqat autentifikatsiyaniki
+            client = Client()
+            url = f'/api/parking-zones/{zone.pk}/'
+            client.get(url)
+            self.measure('e2e bearer (configured chain)',
+                         lambda: client.get(url, headers={'Authorization': f'Bearer {claims_token}'}),
+                         options['requests'])
+            session_client = Client()
+            session_client.login(username=user.username, password=password)
+            self.measure('e2e session cookie', lambda: session_client.get(url), options['requests'])
+        finally:
+            user.delete()
+            zone.delete()
+
+    def measure(self, name, call, repeat):
+        call()
+        with CaptureQueriesContext(connection) as queries:
+            began = time.perf_counter()
+            for _ in range(repeat):
+                call()
+            elapsed = time.perf_counter() - began
+        self.stdout.write(
+            f"{name:<30} queries/request={len(queries) / repeat:.2f} {elapsed / repeat * 1e6:>7.0f}us/request"
+        )
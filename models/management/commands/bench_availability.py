@@ -0,0 +1,67 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from models.availability import overlapping_bookings, peak_occupancy
+from models.models import Car, ParkingZone, Booking
+
+
+class Command(BaseCommand):
+    help = "Seeds a large booking history and times time-windowed availability queries."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bookings', type=int, default=200_000)
+        parser.add_argument('--zones', type=int, default=20)
+        parser.add_argument('--days', type=int, default=365, help="History length the bookings are spread over")
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--chunk-size', type=int, default=10_000)
+        parser.add_argument('--keep', action='store_true', help="Keep the seeded rows")
+
+    def handle(self, *args, **options):
+        now = timezone.now().replace(minute=0, second=0, microsecond=0)
+        user = User.objects.create_user(username=f"bench-{time.time_ns()}")
+        car = Car.objects.create(user=user, make='Bench', model='Availability', plate_number='BENCH')
+        zones = ParkingZone.objects.bulk_create(
+            ParkingZone(name=f"Bench zone {i}", location='-', total_spots=500, available_spots=500)
+            for i in range(options['zones'])
+        )
+
+        began = time.perf_counter()
+        span = options['days'] * 24 * 60
+        remaining = options['bookings']
+        while remaining > 0:
+            batch = []
+            for _ in range(min(options['chunk_size'], remaining)):
+                start = now - timedelta(minutes=random.randrange(span)) + timedelta(days=1)
+                batch.append(Booking(
+                    user=user, car=car, parking_zone=random.choice(zones),
+                    start_time=start, end_time=start + timedelta(minutes=random.randint(15, 240)),
+                ))
+            Booking.objects.bulk_create(batch)
+            remaining -= len(batch)
+        self.stdout.write(f"seeded {options['bookings']} bookings in {time.perf_counter() - began:.1f}s")
+
+        self.stdout.write(overlapping_bookings(zones[0], now, now + timedelta(hours=2)).explain())
+
+        timings = []
+        for _ in range(options['queries']):
+            start = now + timedelta(minutes=random.randrange(-12 * 60, 12 * 60))
+            began = time.perf_counter()
+            peak_occupancy(random.choice(zones), start, start + timedelta(hours=2))
+            timings.append((time.perf_counter() - began) * 1000)
+        timings.sort()
+        self.stdout.write(
+            f"availability over {options['queries']} windows: "
+            f"p50={statistics.median(timings):.2f}ms "
+            f"p99={timings[int(len(timings) * 0.99) - 1]:.2f}ms max={timings[-1]:.2f}ms"
+        )
+
+        if not options['keep']:
+            Booking.objects.filter(user=user).delete()
+            ParkingZone.objects.filter(pk__in=[z.pk for z in zones]).delete()
+            user.delete()
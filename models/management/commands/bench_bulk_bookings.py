@@ -0,0 +1,73 @@
+import itertools
+import time
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from models.models import Car, ParkingZone
+from models.tariffs import load_tariffs
+
+
+class Command(BaseCommand):
+    help = (
+        "Posts batches of growing size to /api/bookings/bulk/ and checks the query count stays fixed. "
+        "Every booking starts in a different hour, so batches also touch more occupancy rollup buckets. "
+        "INSERTs are reported separately: bulk_create splits them by the backend's parameter limit."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 500])
+        parser.add_argument('--zones', type=int, default=3)
+
+    def handle(self, *args, **options):
+        user = User.objects.create_user(username=f"bench-{time.time_ns()}")
+        cars = [Car.objects.create(user=user, make='Bench', model='Bulk', plate_number=f"BULK{i}") for i in range(5)]
+        zones = [
+            ParkingZone.objects.create(name=f"Bulk zone {i}", location='-', total_spots=10_000, available_spots=10_000)
+            for i in range(options['zones'])
+        ]
+        client = APIClient()
+        client.force_authenticate(user)
+
+        base = datetime(2030, 1, 1, tzinfo=timezone.utc)
+
+        def payload(size, offset):
+            # Har bir bron boshqa soatda: rollup bucketlari soni partiya hajmi bilan o'sadi
+            return [
+                {
+                    'car': cars[i % len(cars)].pk,
+                    'parking_zone': zones[i % len(zones)].pk,
+                    'start_time': (base + timedelta(hours=offset + i)).isoformat(),
+                    'end_time': (base + timedelta(hours=offset + i + 2)).isoformat(),
+                }
+                for i in range(size)
+            ]
+
+        query_counts = set()
+        # Tarif qoidalari cache ga bir marta yuklanadi; bu so'rov partiya hajmiga bog'liq emas
+        load_tariffs()
+        try:
+            for offset, size in zip(itertools.accumulate(options['sizes'], initial=0), options['sizes']):
+                with CaptureQueriesContext(connection) as queries:
+                    began = time.perf_counter()
+                    response = client.post('/api/bookings/bulk/', payload(size, offset), format='json')
+                    elapsed = time.perf_counter() - began
+                if response.status_code != 201 or response.data['created'] != size:
+                    raise CommandError(f"batch of {size} failed: {response.status_code} {response.data}")
+                inserts = sum(q['sql'].startswith('INSERT') for q in queries.captured_queries)
+                query_counts.add(len(queries) - inserts)
+                self.stdout.write(
+                    f"batch={size:>5} queries={len(queries) - inserts:>3} inserts={inserts:>2} "
+                    f"{elapsed * 1000:.1f}ms {size / elapsed:.0f} bookings/sec"
+                )
+        finally:
+            user.delete()
+            ParkingZone.objects.filter(pk__in=[z.pk for z in zones]).delete()
+
+        if len(query_counts) != 1:
+            raise CommandError(f"Query count depends on batch size: {sorted(query_counts)}")
+        self.stdout.write(self.style.SUCCESS("OK: query count is independent of batch size"))
@@ -0,0 +1,75 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from models.models import Car, ParkingZone
+from models.reservations import create_booking
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulates clients watching zone availability while bookings come in: polling the full "
+        "/api/parking-zones/ list versus reading /api/async/parking-zones/changes/ since their last sequence."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--zones', type=int, default=300)
+        parser.add_argument('--clients', type=int, default=50)
+        parser.add_argument('--rounds', type=int, default=10)
+        parser.add_argument('--changes', type=int, default=5, help="Bookings created between poll rounds")
+
+    def handle(self, *args, **options):
+        user = User.objects.create_user(username=f"bench-feed-{time.time_ns()}")
+        car = Car.objects.create(user=user, make='Bench', model='Feed', plate_number='FEED')
+        zones = ParkingZone.objects.bulk_create(
+            ParkingZone(name=f"Feed zone {i}", location='-', total_spots=1000, available_spots=1000)
+            for i in range(options['zones'])
+        )
+        client = Client()
+        page_size = len(zones) + ParkingZone.objects.count()
+        now = timezone.now()
+        try:
+            sequences = [client.get('/api/async/parking-zones/changes/').json()['sequence']] * options['clients']
+            totals = {'poll': [0, 0, 0.0], 'feed': [0, 0, 0.0]}
+            changed = 0
+            for _ in range(options['rounds']):
+                for _ in range(options['changes']):
+                    create_booking(user=user, car=car, parking_zone=random.choice(zones),
+                                   start_time=now, end_time=now + timedelta(hours=1))
+
+                for i in range(options['clients']):
+                    self.measure(totals['poll'], client, f'/api/parking-zones/?page_size={page_size}')
+                    data = self.measure(totals['feed'], client, f'/api/async/parking-zones/changes/?since={sequences[i]}')
+                    if data['reset']:
+                        raise CommandError("Feed reset during the benchmark; raise CHANGEFEED_RETENTION")
+                    sequences[i] = data['sequence']
+                    changed += len(data['changes'])
+        finally:
+            user.delete()
+            ParkingZone.objects.filter(pk__in=[zone.pk for zone in zones]).delete()
+
+        polls = options['clients'] * options['rounds']
+        for name, (size, queries, elapsed) in totals.items():
+            self.stdout.write(
+                f"{name:<5} polls={polls} bytes/poll={size / polls:>9.0f} queries={queries:>5} "
+                f"{elapsed / polls * 1000:.2f}ms/poll"
+            )
+        self.stdout.write(f"feed delivered {changed / polls:.1f} zone changes per poll")
+
+    def measure(self, total, client, url):
+        with CaptureQueriesContext(connection) as queries:
+            began = time.perf_counter()
+            response = client.get(url)
+            total[2] += time.perf_counter() - began
+        if response.status_code != 200:
+            raise CommandError(f"{url}: {response.status_code}")
+        total[0] += len(response.content)
+        total[1] += len(queries)
+        return response.json()
@@ -0,0 +1,120 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.utils import timezone
+
+from models.models import Car, ParkingZone, Booking
+from models.reservations import NoSpotsAvailable, create_booking
+
+# Har bir profil alohida jarayonda, o'zining vaqtinchalik bazasida ishga tushadi
+PROFILES = {
+    'baseline': {
+        'SQLITE_PRAGMAS': 'PRAGMA journal_mode=DELETE',
+        'SQLITE_BUSY_TIMEOUT': '5',
+        'SQLITE_TRANSACTION_MODE': 'DEFERRED',
+        'DATABASE_CONN_MAX_AGE': '0',
+    },
+    'tuned': {},
+}
+
+
+class Command(BaseCommand):
+    help = ("Mixed read/write load against a fresh SQLite file: compares the default sqlite3 "
+            "configuration with the tuned one from settings (WAL, busy timeout, IMMEDIATE transactions).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--ops', type=int, default=200, help="Operations per thread")
+        parser.add_argument('--write-ratio', type=float, default=0.3)
+        parser.add_argument('--profile', choices=sorted(PROFILES), action='append')
+        parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            self.stdout.write(json.dumps(self.run_load(options)))
+            return
+
+        manage = Path(settings.BASE_DIR) / 'manage.py'
+        for name in options['profile'] or sorted(PROFILES):
+            with tempfile.TemporaryDirectory() as tmp:
+                env = {**os.environ, **PROFILES[name], 'DATABASE_NAME': str(Path(tmp) / 'bench.sqlite3')}
+                env.pop('DATABASE_REPLICA_NAME', None)
+                subprocess.run([sys.executable, manage, 'migrate', '-v', '0'], env=env, check=True)
+                worker = subprocess.run(
+                    [sys.executable, manage, 'bench_db_concurrency', '--worker',
+                     '--threads', str(options['threads']), '--ops', str(options['ops']),
+                     '--write-ratio', str(options['write_ratio'])],
+                    env=env, capture_output=True, text=True,
+                )
+            if worker.returncode:
+                raise CommandError(worker.stderr)
+            result = json.loads(worker.stdout.strip().splitlines()[-1])
+            self.stdout.write(
+                f"{name:<9} {result['ops_per_sec']:>8.0f} ops/s  "
+                f"writes={result['writes']} reads={result['reads']} "
+                f"locked={result['locked']} errors={result['errors']} "
+                f"(journal_mode={result['journal_mode']})"
+            )
+
+    def run_load(self, options):
+        threads = options['threads']
+        ops = options['ops']
+        write_every = max(int(round(1 / options['write_ratio'])), 1) if options['write_ratio'] > 0 else 0
+
+        user = User.objects.create_user(username=f"bench-db-{time.time_ns()}")
+        car = Car.objects.create(user=user, make='Bench', model='DB', plate_number='BENCHDB')
+        zone = ParkingZone.objects.create(
+            name='Bench zone', location='-', total_spots=threads * ops, available_spots=threads * ops
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            journal_mode = cursor.fetchone()[0]
+
+        start = timezone.now()
+        counts = {'writes': 0, 'reads': 0, 'locked': 0, 'errors': 0}
+        lock = threading.Lock()
+
+        def worker(offset):
+            try:
+                for i in range(ops):
+                    try:
+                        if write_every and (i + offset) % write_every == 0:
+                            create_booking(user=user, car=car, parking_zone=zone,
+                                           start_time=start, end_time=start + timedelta(hours=1))
+                            key = 'writes'
+                        else:
+                            list(ParkingZone.objects.all()[:50])
+                            Booking.objects.filter(parking_zone=zone).count()
+                            key = 'reads'
+                    except OperationalError as exc:
+                        key = 'locked' if 'locked' in str(exc) else 'errors'
+                    except NoSpotsAvailable:
+                        key = 'errors'
+                    with lock:
+                        counts[key] += 1
+            finally:
+                connection.close()
+
+        pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+        began = time.perf_counter()
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        elapsed = time.perf_counter() - began
+
+        done = counts['writes'] + counts['reads']
+        return {**counts, 'journal_mode': journal_mode, 'ops_per_sec': done / elapsed if elapsed else 0}
+
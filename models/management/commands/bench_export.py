@@ -0,0 +1,57 @@
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from models.exports import export_queryset, iter_export
+from models.models import Car, ParkingZone, Booking
+
+
+class Command(BaseCommand):
+    help = "Shows export memory stays flat as the number of exported bookings grows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[50_000, 250_000])
+        parser.add_argument('--chunk-size', type=int, default=10_000)
+        parser.add_argument('--keep', action='store_true', help="Keep the seeded rows")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        user = User.objects.create_user(username=f"bench-{time.time_ns()}")
+        car = Car.objects.create(user=user, make='Bench', model='Export', plate_number='EXPORT')
+        zone = ParkingZone.objects.create(name='Export zone', location='-', total_spots=0, available_spots=0)
+        seeded = 0
+        try:
+            for size in sorted(options['sizes']):
+                while seeded < size:
+                    batch = min(options['chunk_size'], size - seeded)
+                    Booking.objects.bulk_create(
+                        Booking(user=user, car=car, parking_zone=zone, start_time=now + timedelta(minutes=i),
+                                end_time=now + timedelta(minutes=i + 20), penalty=50.0)
+                        for i in range(seeded, seeded + batch)
+                    )
+                    seeded += batch
+
+                for export_format in ('csv', 'ndjson'):
+                    queryset = export_queryset().filter(user=user)
+                    tracemalloc.start()
+                    began = time.perf_counter()
+                    written = rows = 0
+                    for chunk in iter_export(export_format, queryset):
+                        written += len(chunk)
+                        rows += 1
+                    elapsed = time.perf_counter() - began
+                    _, peak = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+                    self.stdout.write(
+                        f"bookings={size:>9} {export_format:<6} peak={peak / 2 ** 20:6.2f}MiB "
+                        f"output={written / 2 ** 20:7.1f}MiB {rows / elapsed:,.0f} rows/sec"
+                    )
+        finally:
+            if not options['keep']:
+                Booking.objects.filter(user=user).delete()
+                zone.delete()
+                user.delete()
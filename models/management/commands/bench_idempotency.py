@@ -0,0 +1,92 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from models.authentication import issue_tokens
+from models.models import Booking, Car, ParkingZone
+
+NO_BUCKETS = {'bookings': (1e9, 10**9), 'register': (1e9, 10**9)}
+
+
+class Command(BaseCommand):
+    help = (
+        "Retries POST /api/bookings/ with one Idempotency-Key: sequentially, concurrently and with a "
+        "different body. Checks that each key makes one booking and that replays run no booking queries."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retries', type=int, default=200)
+        parser.add_argument('--threads', type=int, default=16)
+
+    def handle(self, *args, **options):
+        user = User.objects.create_user(username=f"bench-idempotency-{time.time_ns()}")
+        car = Car.objects.create(user=user, make='Bench', model='Idempotency', plate_number='IDEMP')
+        zone = ParkingZone.objects.create(name='Idempotency zone', location='-', total_spots=100, available_spots=100)
+        headers = {'Authorization': f"Bearer {issue_tokens(user)['access']}"}
+        payload = {'car': car.pk, 'parking_zone': zone.pk, 'start_time': '2031-01-01T10:00:00.000Z'}
+
+        try:
+            with override_settings(THROTTLE_BUCKETS=NO_BUCKETS):
+                self.sequential(payload, headers, options['retries'])
+                self.concurrent(payload, headers, options['threads'])
+                self.mismatch(payload, headers)
+            zone.refresh_from_db()
+            bookings = Booking.objects.filter(user=user).count()
+            self.stdout.write(f"bookings={bookings} available_spots={zone.available_spots}")
+            # Har bir ssenariy bitta yangi kalit bilan bitta bron qiladi
+            if bookings != 3 or zone.available_spots != 97:
+                raise CommandError("Idempotent retries created extra bookings")
+        finally:
+            user.delete()
+            zone.delete()
+
+    def post(self, client, payload, headers, key):
+        return client.post('/api/bookings/', payload, content_type='application/json',
+                           headers={**headers, 'Idempotency-Key': key})
+
+    def sequential(self, payload, headers, retries):
+        client = Client()
+        key = str(uuid.uuid4())
+        first = self.post(client, payload, headers, key)
+        if first.status_code != 201:
+            raise CommandError(f"First request failed: {first.status_code} {first.content!r}")
+
+        began = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            replays = [self.post(client, payload, headers, key) for _ in range(retries)]
+        elapsed = time.perf_counter() - began
+        booking_queries = [q['sql'] for q in queries if 'models_booking' in q['sql'] or 'models_parkingzone' in q['sql']]
+        same = all(r.status_code == 201 and r.content == first.content and r.get('Idempotent-Replayed')
+                   for r in replays)
+        self.stdout.write(
+            f"sequential retries={retries} identical={same} booking/zone queries={len(booking_queries)} "
+            f"{elapsed / retries * 1000:.2f}ms/replay"
+        )
+        if not same or booking_queries:
+            raise CommandError("Replays did not return the stored response without touching the booking tables")
+
+    def concurrent(self, payload, headers, threads):
+        key = str(uuid.uuid4())
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            responses = list(pool.map(lambda _: self.post(Client(), payload, headers, key), range(threads)))
+        codes = sorted(response.status_code for response in responses)
+        ids = {response.json().get('id') for response in responses if response.status_code == 201}
+        replayed = sum(1 for response in responses if response.get('Idempotent-Replayed'))
+        self.stdout.write(f"concurrent duplicates={threads} codes={set(codes)} booking ids={ids} replayed={replayed}")
+        if codes != [201] * threads or len(ids) != 1:
+            raise CommandError("Concurrent duplicates were not collapsed into one booking")
+
+    def mismatch(self, payload, headers):
+        client = Client()
+        key = str(uuid.uuid4())
+        self.post(client, payload, headers, key)
+        response = self.post(client, {**payload, 'start_time': '2031-01-02T10:00:00.000Z'}, headers, key)
+        self.stdout.write(f"same key, different body: {response.status_code}")
+        if response.status_code != 422:
+            raise CommandError("Key reuse with a different body was not rejected")
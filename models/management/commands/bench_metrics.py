@@ -0,0 +1,104 @@
+import logging
+import statistics
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from models.authentication import issue_tokens
+from models.metrics import MetricsMiddleware, registry
+from models.models import Booking, Car, ParkingZone
+
+MIDDLEWARE_PATH = f'{MetricsMiddleware.__module__}.{MetricsMiddleware.__name__}'
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares request time with and without MetricsMiddleware on hot endpoints, fails if the "
+        "overhead exceeds --max-overhead percent, and checks the recorded query counts and slow-request log."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--max-overhead', type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        user = User.objects.create_user(username=f"bench-metrics-{time.time_ns()}")
+        car = Car.objects.create(user=user, make='Bench', model='Metrics', plate_number='METRIC')
+        zone = ParkingZone.objects.create(name='Metrics zone', location='-', total_spots=1000, available_spots=1000)
+        now = timezone.now()
+        Booking.objects.bulk_create(
+            Booking(user=user, car=car, parking_zone=zone,
+                    start_time=now + timedelta(minutes=i), end_time=now + timedelta(minutes=i + 90))
+            for i in range(50)
+        )
+        headers = {'Authorization': f"Bearer {issue_tokens(user)['access']}"}
+        endpoints = [
+            ('parkingzone-detail', f'/api/parking-zones/{zone.pk}/'),
+            ('parkingzone-list', '/api/parking-zones/'),
+            ('booking-list', '/api/bookings/'),
+        ]
+        without = [path for path in settings.MIDDLEWARE if path != MIDDLEWARE_PATH]
+        profiles = {'off': without, 'on': [MIDDLEWARE_PATH, *without]}
+
+        try:
+            failures = []
+            for name, url in endpoints:
+                clients = {profile: self.client(middleware, url, headers) for profile, middleware in profiles.items()}
+                timings = {profile: [] for profile in profiles}
+                # Profillar har so'rovda almashadi: mashina shovqini ikkalasiga teng tushadi
+                for _ in range(options['requests']):
+                    for profile, client in clients.items():
+                        began = time.perf_counter()
+                        client.get(url, headers=headers)
+                        timings[profile].append(time.perf_counter() - began)
+                off, on = statistics.median(timings['off']), statistics.median(timings['on'])
+                overhead = (on - off) / off * 100
+                self.stdout.write(f"{name:<20} off={off * 1e6:>6.0f}us on={on * 1e6:>6.0f}us overhead={overhead:+.1f}%")
+                if overhead > options['max_overhead']:
+                    failures.append(f"{name} {overhead:.1f}%")
+
+            self.check_recorded(endpoints[-1][1], headers, profiles['on'])
+            if failures:
+                raise CommandError("Metrics overhead above budget: " + ", ".join(failures))
+        finally:
+            user.delete()
+            zone.delete()
+
+    def client(self, middleware, url, headers):
+        # Client middleware zanjirini birinchi so'rovda quradi va keyin settings ga qaramaydi
+        client = Client()
+        with override_settings(MIDDLEWARE=middleware):
+            client.get(url, headers=headers)
+        return client
+
+    def check_recorded(self, url, headers, middleware):
+        registry.reset()
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append
+        logger = logging.getLogger('models.metrics')
+        logger.addHandler(handler)
+        try:
+            with override_settings(MIDDLEWARE=middleware, METRICS_SLOW_REQUEST=0.0):
+                with CaptureQueriesContext(connection) as queries:
+                    Client().get(url, headers=headers)
+                # request_started connection.queries ni tozalaydi: keyingi so'rovdan oldin sanaladi
+                executed = len(queries)
+                exposition = Client().get('/metrics/').content.decode()
+        finally:
+            logger.removeHandler(handler)
+
+        expected = f'easy_parking_db_queries_total{{route="booking-list",method="GET"}} {executed}'
+        self.stdout.write(f"recorded: {expected}")
+        if expected not in exposition:
+            raise CommandError("Recorded query count does not match the executed queries")
+        if not records or 'FROM "models_booking"' not in records[0].getMessage():
+            raise CommandError("Slow-request log did not include the SQL")
+        self.stdout.write(f"slow-request log: {records[0].getMessage().splitlines()[0]}")
@@ -0,0 +1,61 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from models.geo import grid_cell, haversine_km, nearest_zones
+from models.models import ParkingZone
+
+CENTER = (41.3111, 69.2797)  # Toshkent
+
+
+class Command(BaseCommand):
+    help = "Times /nearby lookups (grid index vs full scan) as the zone count grows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+        parser.add_argument('--spread', type=float, default=0.5, help="Degrees around the city centre")
+        parser.add_argument('--k', type=int, default=5)
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--keep', action='store_true', help="Keep the seeded rows")
+
+    def handle(self, *args, **options):
+        spread, k = options['spread'], options['k']
+        seeded = []
+        try:
+            for size in sorted(options['sizes']):
+                self.seed(size - len(seeded), spread, seeded)
+                queryset = ParkingZone.objects.filter(available_spots__gt=0)
+                points = [self.random_point(spread) for _ in range(options['queries'])]
+
+                indexed = self.measure(lambda lat, lon: nearest_zones(queryset, lat, lon, k), points)
+                scan = self.measure(lambda lat, lon: sorted(
+                    (haversine_km(lat, lon, z.latitude, z.longitude), z.pk) for z in queryset.exclude(latitude=None)
+                )[:k], points[:5])
+                self.stdout.write(f"zones={size:>7} grid p50={indexed:7.2f}ms  full scan p50={scan:8.2f}ms")
+        finally:
+            if not options['keep']:
+                ParkingZone.objects.filter(pk__in=seeded).delete()
+
+    def random_point(self, spread):
+        return CENTER[0] + random.uniform(-spread, spread), CENTER[1] + random.uniform(-spread, spread)
+
+    def seed(self, count, spread, seeded):
+        zones = []
+        for i in range(count):
+            latitude, longitude = self.random_point(spread)
+            zones.append(ParkingZone(
+                name=f"Nearby bench {i}", location='-', total_spots=10, available_spots=random.randint(0, 10),
+                latitude=latitude, longitude=longitude, grid_cell=grid_cell(latitude, longitude),
+            ))
+        for start in range(0, len(zones), 5_000):
+            seeded.extend(z.pk for z in ParkingZone.objects.bulk_create(zones[start:start + 5_000]))
+
+    def measure(self, search, points):
+        timings = []
+        for latitude, longitude in points:
+            began = time.perf_counter()
+            search(latitude, longitude)
+            timings.append((time.perf_counter() - began) * 1000)
+        return statistics.median(timings)
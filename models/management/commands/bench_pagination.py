@@ -0,0 +1,76 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from models.models import Car, ParkingZone, Booking
+from models.pagination import BookingPagination
+
+
+class Command(BaseCommand):
+    help = "Compares /api/bookings/ latency on page 1 and a deep page (keyset vs OFFSET)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bookings', type=int, default=200_000)
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--page', type=int, default=10_000)
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--chunk-size', type=int, default=10_000)
+        parser.add_argument('--keep', action='store_true', help="Keep the seeded rows")
+
+    def handle(self, *args, **options):
+        page_size, page = options['page_size'], options['page']
+        now = timezone.now().replace(second=0, microsecond=0)
+        user = User.objects.create_user(username=f"bench-{time.time_ns()}")
+        car = Car.objects.create(user=user, make='Bench', model='Pagination', plate_number='BENCH')
+        zone = ParkingZone.objects.create(name='Bench zone', location='-', total_spots=0, available_spots=0)
+
+        began = time.perf_counter()
+        remaining = options['bookings']
+        while remaining > 0:
+            batch = []
+            for _ in range(min(options['chunk_size'], remaining)):
+                # Ko'p bronlar bir xil start_time ga ega bo'ladi (tie-break id orqali)
+                start = now - timedelta(minutes=random.randrange(options['bookings'] // 4))
+                batch.append(Booking(user=user, car=car, parking_zone=zone,
+                                     start_time=start, end_time=start + timedelta(hours=1)))
+            Booking.objects.bulk_create(batch)
+            remaining -= len(batch)
+        self.stdout.write(f"seeded {options['bookings']} bookings in {time.perf_counter() - began:.1f}s")
+
+        ordered = Booking.objects.order_by('start_time', 'id')
+        offset = (page - 1) * page_size
+        boundary = ordered[offset - 1]
+        cursor = BookingPagination().get_cursor(boundary)
+        client = APIClient()
+
+        def measure(fetch):
+            timings = []
+            for _ in range(options['repeat']):
+                began = time.perf_counter()
+                fetch()
+                timings.append((time.perf_counter() - began) * 1000)
+            return statistics.median(timings)
+
+        def keyset(params):
+            response = client.get('/api/bookings/', {'page_size': page_size, **params})
+            assert response.status_code == 200, response.status_code
+
+        rows = [
+            ('keyset page 1', measure(lambda: keyset({}))),
+            (f'keyset page {page}', measure(lambda: keyset({'cursor': cursor}))),
+            ('OFFSET page 1', measure(lambda: list(ordered[:page_size]))),
+            (f'OFFSET page {page}', measure(lambda: list(ordered[offset:offset + page_size]))),
+        ]
+        for name, median in rows:
+            self.stdout.write(f"{name:<22} p50={median:.2f}ms")
+
+        if not options['keep']:
+            Booking.objects.filter(user=user).delete()
+            zone.delete()
+            user.delete()
@@ -0,0 +1,80 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from models.authentication import issue_tokens
+from models.models import Booking, Car
+
+
+class Command(BaseCommand):
+    help = (
+        "Times GET /api/enforcement/plates/<plate>/ and a batch POST against the old icontains scan on "
+        "car__plate_number, and prints the query plan. Uses existing cars (run seed_data first)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--batch', type=int, default=500)
+
+    def handle(self, *args, **options):
+        plates = list(Car.objects.values_list('plate_number', flat=True)[:10_000])
+        if len(plates) < options['batch']:
+            raise CommandError(f"Need at least {options['batch']} cars; run seed_data first")
+        now = timezone.now()
+        active = set(Booking.objects.filter(start_time__lte=now, end_time__gt=now)
+                     .values_list('car__normalized_plate', flat=True)[:1000])
+
+        officer = User.objects.create_user(username=f"bench-plates-{time.time_ns()}", is_staff=True)
+        headers = {'Authorization': f"Bearer {issue_tokens(officer)['access']}"}
+        client = Client()
+        try:
+            sample = random.sample(plates, options['repeat'])
+            # Kamera raqamni bo'shliqsiz, kichik harflar bilan yuborishi mumkin
+            scanned = [plate.replace(' ', '').lower() for plate in sample]
+
+            def lookup():
+                found = 0
+                for plate in scanned:
+                    found += client.get(f'/api/enforcement/plates/{plate}/', headers=headers).json()['active']
+                return found
+
+            def legacy():
+                found = 0
+                for plate in sample:
+                    found += Booking.objects.filter(car__plate_number__icontains=plate,
+                                                    start_time__lte=now, end_time__gt=now).exists()
+                return found
+
+            def batch():
+                response = client.post('/api/enforcement/plates/', {'plates': plates[:options['batch']]},
+                                       content_type='application/json', headers=headers)
+                return sum(result['active'] for result in response.json()['results'])
+
+            self.measure('endpoint, one plate', lookup, options['repeat'])
+            self.measure('icontains scan, one plate', legacy, options['repeat'])
+            self.measure(f"endpoint, batch of {options['batch']}", batch, 1)
+            self.stdout.write(f"cars={Car.objects.count()} plates with an active booking (sample)={len(active)}")
+
+            plan = Booking.objects.active_for_plates(['01A123BC']).explain()
+            self.stdout.write(f"query plan:\n{plan}")
+            if 'booking_car_end_idx' not in plan and 'normalized_plate' not in plan:
+                raise CommandError("Plate lookup does not use the normalized plate index")
+        finally:
+            officer.delete()
+
+    def measure(self, name, call, requests):
+        call()
+        with CaptureQueriesContext(connection) as queries:
+            began = time.perf_counter()
+            found = call()
+            elapsed = time.perf_counter() - began
+        self.stdout.write(
+            f"{name:<28} {elapsed / requests * 1000:>8.2f}ms/request queries/request={len(queries) / requests:.1f} "
+            f"active={found}"
+        )
@@ -0,0 +1,66 @@
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Yangi jarayonda: WSGI ilovasini yuklash va birinchi so'rovga javob berish vaqti
+CHILD_SCRIPT = """
+import io, json, sys, time
+began = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+loaded = time.perf_counter()
+path, _, query = sys.argv[1].partition('?')
+environ = {
+    'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query, 'SERVER_NAME': 'localhost',
+    'SERVER_PORT': '80', 'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(),
+}
+status = []
+body = b''.join(application(environ, lambda s, h: status.append(s)))
+done = time.perf_counter()
+print(json.dumps({
+    'status': status[0], 'app_ms': (loaded - began) * 1000, 'first_response_ms': (done - began) * 1000,
+    'heavy': sorted(m for m in ('twilio', 'aiohttp', 'drf_yasg.views', 'yaml') if m in sys.modules),
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Measures WSGI time-to-first-response and per-module import time in fresh interpreters."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/parking-zones/', help="URL of the first request")
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--top', type=int, default=15, help="Number of slowest imports to show")
+
+    def run_child(self, *args):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'easy_parking.settings')}
+        return subprocess.run(
+            [sys.executable, *args], cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True
+        )
+
+    def handle(self, *args, **options):
+        runs = [json.loads(self.run_child('-c', CHILD_SCRIPT, options['path']).stdout.splitlines()[-1])
+                for _ in range(options['repeat'])]
+        self.stdout.write(
+            f"{options['path']} -> {runs[0]['status']} over {options['repeat']} fresh processes: "
+            f"app load p50={statistics.median(r['app_ms'] for r in runs):.0f}ms "
+            f"first response p50={statistics.median(r['first_response_ms'] for r in runs):.0f}ms"
+        )
+        self.stdout.write(f"heavy modules loaded: {', '.join(runs[0]['heavy']) or 'none'}")
+
+        # python -X importtime: "import time: self | cumulative | module"
+        stderr = self.run_child('-X', 'importtime', '-c', CHILD_SCRIPT, options['path']).stderr
+        imports = []
+        for line in stderr.splitlines():
+            match = re.match(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)', line)
+            if match and len(match.group(3)) <= 1:
+                imports.append((int(match.group(2)), match.group(4)))
+        self.stdout.write("slowest top-level imports (cumulative):")
+        for cumulative, module in sorted(imports, reverse=True)[:options['top']]:
+            self.stdout.write(f"  {cumulative / 1000:8.1f}ms  {module}")
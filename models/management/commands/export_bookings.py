@@ -0,0 +1,42 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import is_naive, make_aware
+
+from models.exports import EXPORT_FORMATS, export_queryset, iter_export
+
+
+class Command(BaseCommand):
+    help = "Streams bookings (with username, plate and zone name) to CSV or NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', dest='export_format', choices=list(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--from', dest='start', help="ISO 8601 start_time lower bound (inclusive)")
+        parser.add_argument('--to', dest='end', help="ISO 8601 start_time upper bound (exclusive)")
+        parser.add_argument('--penalties-only', action='store_true')
+        parser.add_argument('--output', help="File path (default: stdout)")
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def parse(self, value):
+        if value is None:
+            return None
+        try:
+            # To'g'ri formatdagi, lekin mavjud bo'lmagan sana (13-oy) ValueError beradi
+            parsed = parse_datetime(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise CommandError(f"Invalid datetime: {value}")
+        return make_aware(parsed) if is_naive(parsed) else parsed
+
+    def handle(self, *args, **options):
+        queryset = export_queryset(self.parse(options['start']), self.parse(options['end']),
+                                   penalties_only=options['penalties_only'])
+        output = open(options['output'], 'w', newline='') if options['output'] else sys.stdout
+        try:
+            for chunk in iter_export(options['export_format'], queryset, options['chunk_size']):
+                output.write(chunk)
+        finally:
+            if output is not sys.stdout:
+                output.close()
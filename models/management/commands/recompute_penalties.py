@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+
+from models.models import Booking
+from models.rollups import apply_deltas, penalty_deltas
+from models.tariffs import load_tariffs
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes Booking.penalty from the current tariff rules in fixed-size id ranges and moves "
+        "the change into the occupancy rollups in the same transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=20_000)
+        parser.add_argument('--zone', type=int, action='append', help="Only bookings in this zone (repeatable)")
+
+    def handle(self, *args, **options):
+        queryset = Booking.objects.all()
+        if options['zone']:
+            queryset = queryset.filter(parking_zone_id__in=options['zone'])
+        bounds = queryset.aggregate(first=Min('id'), last=Max('id'))
+        if bounds['first'] is None:
+            self.stdout.write("No bookings to recompute")
+            return
+
+        # Har bir bo'lak bitta UPDATE ... SET penalty = CASE ... (qatorlar Python ga yuklanmaydi)
+        penalty = load_tariffs().penalty_expression()
+        chunk_size = options['chunk_size']
+        began = time.perf_counter()
+        updated = 0
+        for start in range(bounds['first'], bounds['last'] + 1, chunk_size):
+            chunk = queryset.filter(id__gte=start, id__lt=start + chunk_size)
+            with transaction.atomic():
+                # Rollup farqi UPDATE dan oldin olinadi: eski penalty hali jadvalda
+                deltas = penalty_deltas(chunk, penalty)
+                updated += chunk.update(penalty=penalty)
+                apply_deltas(deltas)
+            if options['verbosity'] > 1:
+                self.stdout.write(f"  ids < {start + chunk_size}: {updated} rows")
+        elapsed = time.perf_counter() - began
+        self.stdout.write(f"Recomputed {updated} bookings in {elapsed:.1f}s ({updated / elapsed:,.0f} rows/sec)")
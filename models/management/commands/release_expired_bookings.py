@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from models.reservations import release_expired_bookings
+
+
+class Command(BaseCommand):
+    help = (
+        "Gives back the spots of bookings whose end_time has passed. Safe to run on several "
+        "nodes at once; each batch is one transaction grouped by zone."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--loop', action='store_true', help="Keep sweeping as bookings expire")
+        parser.add_argument('--interval', type=float, default=30.0, help="Seconds to sleep once caught up")
+
+    def handle(self, *args, **options):
+        while True:
+            began = time.perf_counter()
+            total = 0
+            while True:
+                released, seen = release_expired_bookings(timezone.now(), options['batch_size'])
+                total += released
+                if seen < options['batch_size']:
+                    break
+            if total:
+                elapsed = time.perf_counter() - began
+                self.stdout.write(f"Released {total} bookings in {elapsed:.1f}s ({total / elapsed:,.0f}/sec)")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
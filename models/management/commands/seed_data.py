@@ -0,0 +1,177 @@
+import itertools
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from models.caching import invalidate_zones
+from models.geo import grid_cell
+from models.models import Booking, Car, ParkingZone, Profile, normalize_plate
+from models.tariffs import load_tariffs
+
+CAR_MODELS = [
+    ('Chevrolet', 'Cobalt'), ('Chevrolet', 'Nexia'), ('Chevrolet', 'Spark'), ('Chevrolet', 'Malibu'),
+    ('Chevrolet', 'Gentra'), ('Chevrolet', 'Damas'), ('Kia', 'K5'), ('Hyundai', 'Elantra'), ('BYD', 'Chazor'),
+]
+DISTRICTS = [
+    'Chilonzor', 'Yunusobod', 'Mirzo Ulugbek', 'Yakkasaroy', 'Shayxontohur', 'Olmazor', 'Mirobod', 'Sergeli',
+    'Uchtepa', 'Yashnobod', 'Bektemir', 'Yangihayot',
+]
+# Toshkent markazi: zonalar shu atrofga tarqatiladi (nearby so'rovlari real ko'rinishda ishlaydi)
+CENTER = (41.3111, 69.2797)
+LETTERS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds users (with profiles), cars, parking zones and bookings with bulk_create in chunks and "
+        "reports rows/s per model. Seeded users share --password and are named <prefix>-<n>."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10_000)
+        parser.add_argument('--cars-per-user', type=int, default=1)
+        parser.add_argument('--zones', type=int, default=500)
+        parser.add_argument('--bookings', type=int, default=1_000_000)
+        parser.add_argument('--days', type=int, default=365, help="Bookings start within this many past days")
+        parser.add_argument('--chunk-size', type=int, default=10_000)
+        parser.add_argument('--prefix', default='seed')
+        parser.add_argument('--password', default='seed-password')
+        parser.add_argument('--random-seed', type=int, default=0)
+        parser.add_argument('--flush', action='store_true', help="Delete rows seeded earlier with --prefix first")
+        parser.add_argument('--rollups', action='store_true', help="Run backfill_occupancy_rollups afterwards")
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['random_seed'])
+        self.chunk_size = options['chunk_size']
+        prefix = options['prefix']
+        if options['flush']:
+            self.flush(prefix)
+        elif User.objects.filter(username__startswith=f'{prefix}-').exists():
+            raise CommandError(f"Rows with prefix '{prefix}' already exist; use --flush or another --prefix")
+
+        began = time.perf_counter()
+        user_ids = self.seed_users(prefix, options['users'], options['password'])
+        car_ids = self.seed_cars(user_ids, options['cars_per_user'])
+        zones = self.seed_zones(prefix, options['zones'])
+        self.seed_bookings(user_ids, car_ids, options['cars_per_user'], zones, options['bookings'], options['days'])
+        self.stdout.write(self.style.SUCCESS(f"seeded everything in {time.perf_counter() - began:.1f}s"))
+
+        if options['rollups']:
+            call_command('backfill_occupancy_rollups', zone=[zone.pk for zone in zones], stdout=self.stdout)
+
+    def flush(self, prefix):
+        began = time.perf_counter()
+        # User o'chirilsa profil, mashina va bronlar CASCADE bilan ketadi
+        User.objects.filter(username__startswith=f'{prefix}-').delete()
+        zone_ids = list(ParkingZone.objects.filter(name__startswith=f'{prefix} ').values_list('id', flat=True))
+        ParkingZone.objects.filter(id__in=zone_ids).delete()
+        invalidate_zones(*zone_ids)
+        self.stdout.write(f"flushed '{prefix}' rows in {time.perf_counter() - began:.1f}s")
+
+    def chunked_create(self, label, model, rows, total, keep=True):
+        """bulk_create in chunk_size transactions; returns the created objects (if keep) and reports rows/s."""
+        began = time.perf_counter()
+        created, batch = [], []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == self.chunk_size:
+                self.create_batch(model, batch, created if keep else None)
+                batch = []
+        if batch:
+            self.create_batch(model, batch, created if keep else None)
+        elapsed = time.perf_counter() - began
+        self.stdout.write(f"{label:<9} {total:>9} rows in {elapsed:6.1f}s ({total / elapsed if elapsed else 0:,.0f} rows/s)")
+        return created
+
+    def create_batch(self, model, batch, created):
+        with transaction.atomic():
+            model.objects.bulk_create(batch)
+        if created is not None:
+            created += batch
+
+    def seed_users(self, prefix, count, password):
+        # Parol bir marta hash qilinadi: PBKDF2 har user uchun seedingni soatlarga cho'zadi
+        password_hash = make_password(password)
+        users = self.chunked_create('users', User, (
+            User(username=f'{prefix}-{i}', password=password_hash, email=f'{prefix}-{i}@example.com')
+            for i in range(count)
+        ), count)
+        self.chunked_create('profiles', Profile, (
+            Profile(user_id=user.pk, phone_number=f'+99890{i:07d}'[:13], is_verified=self.random.random() < 0.8)
+            for i, user in enumerate(users)
+        ), count)
+        return [user.pk for user in users]
+
+    def seed_cars(self, user_ids, per_user):
+        def plate():
+            # O'zbekiston formati: 01 A 123 BC
+            letters = self.random.choices(LETTERS, k=3)
+            return f"{self.random.randint(1, 95):02d} {letters[0]} {self.random.randint(0, 999):03d} {letters[1]}{letters[2]}"
+
+        def car(user_id, make, model):
+            # bulk_create save() ni chaqirmaydi: normalized_plate shu yerda to'ldiriladi
+            plate_number = plate()
+            return Car(user_id=user_id, make=make, model=model, plate_number=plate_number,
+                       normalized_plate=normalize_plate(plate_number))
+
+        cars = self.chunked_create('cars', Car, (
+            car(user_id, make, model)
+            for user_id in user_ids for make, model in self.random.choices(CAR_MODELS, k=per_user)
+        ), len(user_ids) * per_user)
+        return [car.pk for car in cars]
+
+    def seed_zones(self, prefix, count):
+        def zone(i):
+            latitude = CENTER[0] + self.random.uniform(-0.12, 0.12)
+            longitude = CENTER[1] + self.random.uniform(-0.15, 0.15)
+            total = self.random.choice([20, 40, 60, 100, 150, 250, 500])
+            # bulk_create save() ni chaqirmaydi: grid_cell shu yerda hisoblanadi
+            return ParkingZone(
+                name=f'{prefix} zone {i}', location=f'{self.random.choice(DISTRICTS)} tumani',
+                total_spots=total, available_spots=total, latitude=latitude, longitude=longitude,
+                grid_cell=grid_cell(latitude, longitude),
+            )
+
+        return self.chunked_create('zones', ParkingZone, (zone(i) for i in range(count)), count)
+
+    def seed_bookings(self, user_ids, car_ids, cars_per_user, zones, count, days):
+        now = timezone.now().replace(microsecond=0)
+        # Markazdagi bir nechta zona bronlarning katta qismini oladi (issiq zonalar)
+        cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(zones))))
+        active = dict.fromkeys((zone.pk for zone in zones), 0)
+        # Jarima create_booking dagidek tarif qoidasidan hisoblanadi (qoidalar bir marta o'qiladi)
+        tariffs = load_tariffs()
+
+        def booking():
+            index = self.random.randrange(len(user_ids))
+            zone = self.random.choices(zones, cum_weights=cum_weights)[0]
+            duration = timedelta(minutes=self.random.choice([30, 60, 90, 120, 180, 240, 480]))
+            start = now - timedelta(seconds=self.random.uniform(0, days * 86400))
+            end = start + duration
+            if end > now:
+                if active[zone.pk] < zone.total_spots:
+                    active[zone.pk] += 1
+                else:
+                    # Zona to'la: bron o'tmishga suriladi, available_spots manfiy bo'lmasin
+                    start, end = start - duration, end - duration
+            return Booking(
+                user_id=user_ids[index], car_id=car_ids[index * cars_per_user + self.random.randrange(cars_per_user)],
+                parking_zone_id=zone.pk, start_time=start, end_time=end, spot_released=end <= now,
+                penalty=tariffs.penalty_for(zone.pk, start, end),
+            )
+
+        self.chunked_create('bookings', Booking, (booking() for _ in range(count)), count, keep=False)
+
+        # Faol bronlar zona hisoblagichidan ayiriladi (reserve_spot qilganidek)
+        with transaction.atomic():
+            for zone in zones:
+                if active[zone.pk]:
+                    ParkingZone.objects.filter(pk=zone.pk).update(available_spots=zone.total_spots - active[zone.pk])
+        invalidate_zones(*active)
@@ -0,0 +1,28 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from models.sms import get_backend, send_batch
+
+
+class Command(BaseCommand):
+    help = "Sends queued SMS messages in batches, retrying failures with exponential backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.SMS_BATCH_SIZE)
+        parser.add_argument('--max-attempts', type=int, default=settings.SMS_MAX_ATTEMPTS)
+        parser.add_argument('--loop', action='store_true', help="Keep polling the outbox")
+        parser.add_argument('--interval', type=float, default=2.0, help="Seconds to sleep when the outbox is empty")
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        while True:
+            sent, failed = send_batch(backend, options['batch_size'], options['max_attempts'])
+            if sent or failed:
+                self.stdout.write(f"sent={sent} failed={failed}")
+            if sent + failed < options['batch_size']:
+                # Navbatda hozircha yuboriladigan xabar qolmadi
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
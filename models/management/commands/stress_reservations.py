@@ -0,0 +1,82 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from models.models import Car, ParkingZone, Booking
+from models.reservations import NoSpotsAvailable, create_booking
+
+
+class Command(BaseCommand):
+    help = "Concurrent booking stress test: checks that spots are never oversold and reports bookings/sec."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--spots', type=int, default=200)
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--attempts', type=int, default=50, help="Booking attempts per thread")
+        parser.add_argument('--shards', type=int, nargs='+', default=[0],
+                            help="Counter shard counts to compare on the hot zone (0 = unsharded)")
+
+    def handle(self, *args, **options):
+        for counter_shards in options['shards']:
+            self.run(options['spots'], options['threads'], options['attempts'], counter_shards)
+
+    def run(self, spots, threads, attempts, counter_shards):
+        user = User.objects.create_user(username=f"stress-{time.time_ns()}")
+        car = Car.objects.create(user=user, make='Stress', model='Test', plate_number='STRESS')
+        zone = ParkingZone.objects.create(
+            name='Stress zone', location='-', total_spots=spots, available_spots=spots,
+            counter_shards=counter_shards,
+        )
+        start = timezone.now()
+        counts = {'booked': 0, 'rejected': 0, 'errors': 0}
+        failures = []
+        lock = threading.Lock()
+
+        def worker():
+            try:
+                for _ in range(attempts):
+                    try:
+                        create_booking(user=user, car=car, parking_zone=zone,
+                                       start_time=start, end_time=start + timedelta(hours=1))
+                        key = 'booked'
+                    except NoSpotsAvailable:
+                        key = 'rejected'
+                    except Exception as exc:
+                        key = 'errors'
+                        failures.append(exc)
+                    with lock:
+                        counts[key] += 1
+            finally:
+                connection.close()
+
+        pool = [threading.Thread(target=worker) for _ in range(threads)]
+        began = time.perf_counter()
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        elapsed = time.perf_counter() - began
+
+        zone.refresh_from_db()
+        rows = Booking.objects.filter(parking_zone=zone).count()
+        user.delete()
+        zone.delete()
+
+        self.stdout.write(
+            f"shards={counter_shards} threads={threads} attempts={threads * attempts} booked={counts['booked']} "
+            f"rejected={counts['rejected']} errors={counts['errors']} "
+            f"available_spots={zone.available_spots} booking_rows={rows}"
+        )
+        self.stdout.write(f"{counts['booked'] / elapsed:.1f} bookings/sec ({elapsed:.2f}s)")
+
+        if zone.available_spots < 0 or rows > spots or rows != spots - zone.available_spots:
+            raise CommandError("Overselling detected")
+        if counts['errors']:
+            # Xatolar bilan o'tgan sinov natijasi ishonchli emas
+            raise CommandError(f"{counts['errors']} booking attempts failed, first: {failures[0]!r}")
+        self.stdout.write(self.style.SUCCESS("OK: no overselling"))
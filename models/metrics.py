@@ -0,0 +1,220 @@
+"""
+Per-endpoint request metrics: latency histogram, DB query count and time, serializer
+time and response size, labelled by URL name and method and exposed in the Prometheus
+text format. Counters live in the worker process; each worker is scraped on its own.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+logger = logging.getLogger(__name__)
+
+current_request = ContextVar('metrics_request', default=None)
+
+METRIC_FAMILIES = [
+    ('request_duration_seconds', 'histogram', 'Request latency.'),
+    ('requests_total', 'counter', 'Requests by response status.'),
+    ('db_queries_total', 'counter', 'SQL queries run while handling requests.'),
+    ('db_query_duration_seconds_total', 'counter', 'Time spent in SQL queries.'),
+    ('serializer_duration_seconds_total', 'counter', 'Time spent in serializer validation and representation.'),
+    ('response_bytes_total', 'counter', 'Response body size; streaming responses are not counted.'),
+]
+
+
+class RequestMetrics:
+    __slots__ = ('queries', 'query_time', 'serializer_time', 'serializing', 'sql')
+
+    def __init__(self, keep_sql):
+        self.queries = 0
+        self.query_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+        self.sql = [] if keep_sql else None
+
+
+class EndpointStats:
+    __slots__ = ('buckets', 'count', 'latency', 'queries', 'query_time', 'serializer_time', 'response_bytes',
+                 'statuses')
+
+    def __init__(self):
+        self.buckets = [0] * (len(settings.METRICS_LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.latency = 0.0
+        self.queries = 0
+        self.query_time = 0.0
+        self.serializer_time = 0.0
+        self.response_bytes = 0
+        self.statuses = {}
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+
+    def observe(self, route, method, status_code, latency, request_metrics, response_bytes):
+        with self.lock:
+            stats = self.endpoints.get((route, method))
+            if stats is None:
+                stats = self.endpoints[(route, method)] = EndpointStats()
+            stats.buckets[bisect_left(settings.METRICS_LATENCY_BUCKETS, latency)] += 1
+            stats.count += 1
+            stats.latency += latency
+            stats.queries += request_metrics.queries
+            stats.query_time += request_metrics.query_time
+            stats.serializer_time += request_metrics.serializer_time
+            stats.response_bytes += response_bytes
+            stats.statuses[status_code] = stats.statuses.get(status_code, 0) + 1
+
+    def reset(self):
+        with self.lock:
+            self.endpoints = {}
+
+    def render(self):
+        with self.lock:
+            # Formatlash lock dan tashqarida: so'rovlar scrape ni kutib qolmasin
+            snapshot = sorted(
+                (key, list(stats.buckets), dict(stats.statuses), {
+                    'db_queries_total': stats.queries,
+                    'db_query_duration_seconds_total': stats.query_time,
+                    'serializer_duration_seconds_total': stats.serializer_time,
+                    'response_bytes_total': stats.response_bytes,
+                }, stats.count, stats.latency)
+                for key, stats in self.endpoints.items()
+            )
+
+        lines = []
+        for name, kind, help_text in METRIC_FAMILIES:
+            lines.append(f'# HELP easy_parking_{name} {help_text}')
+            lines.append(f'# TYPE easy_parking_{name} {kind}')
+            for (route, method), buckets, statuses, totals, count, latency in snapshot:
+                labels = f'route="{route}",method="{method}"'
+                if name == 'request_duration_seconds':
+                    cumulative = 0
+                    for bound, observed in zip(settings.METRICS_LATENCY_BUCKETS, buckets):
+                        cumulative += observed
+                        lines.append(f'easy_parking_{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                    lines.append(f'easy_parking_{name}_bucket{{{labels},le="+Inf"}} {count}')
+                    lines.append(f'easy_parking_{name}_sum{{{labels}}} {latency}')
+                    lines.append(f'easy_parking_{name}_count{{{labels}}} {count}')
+                elif name == 'requests_total':
+                    for status_code, observed in sorted(statuses.items()):
+                        lines.append(f'easy_parking_{name}{{{labels},status="{status_code}"}} {observed}')
+                else:
+                    lines.append(f'easy_parking_{name}{{{labels}}} {totals[name]}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper installed on every connection; a no-op outside an instrumented request."""
+    request_metrics = current_request.get()
+    if request_metrics is None:
+        return execute(sql, params, many, context)
+    began = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - began
+        request_metrics.queries += 1
+        request_metrics.query_time += duration
+        if request_metrics.sql is not None:
+            request_metrics.sql.append((duration, sql))
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    # connection_created: ulanish qayta ochilganda wrapper ikki marta qo'shilmasin
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class TimedSerializerMixin:
+    """Adds top-level validation and representation time to the current request's metrics."""
+
+    def timed(self, method, value):
+        request_metrics = current_request.get()
+        if request_metrics is None or request_metrics.serializing:
+            return method(value)
+        request_metrics.serializing = True
+        began = time.perf_counter()
+        try:
+            return method(value)
+        finally:
+            request_metrics.serializer_time += time.perf_counter() - began
+            request_metrics.serializing = False
+
+    def to_representation(self, instance):
+        return self.timed(super().to_representation, instance)
+
+    def run_validation(self, data):
+        return self.timed(super().run_validation, data)
+
+
+class MetricsMiddleware:
+    """Outermost middleware: times the whole request, including the other middleware."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request_metrics, token, began = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_request.reset(token)
+        self.finish(request, response, request_metrics, began)
+        return response
+
+    async def __acall__(self, request):
+        request_metrics, token, began = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_request.reset(token)
+        self.finish(request, response, request_metrics, began)
+        return response
+
+    def start(self):
+        request_metrics = RequestMetrics(keep_sql=settings.METRICS_SLOW_REQUEST is not None)
+        return request_metrics, current_request.set(request_metrics), time.perf_counter()
+
+    def finish(self, request, response, request_metrics, began):
+        latency = time.perf_counter() - began
+        match = request.resolver_match
+        route = match.url_name or match.route if match is not None else 'unmatched'
+        size = 0 if response.streaming else len(response.content)
+        registry.observe(route, request.method, response.status_code, latency, request_metrics, size)
+
+        if settings.METRICS_SLOW_REQUEST is not None and latency >= settings.METRICS_SLOW_REQUEST:
+            logger.warning(
+                "Slow request %s %s (%s): %.1fms, %d queries in %.1fms, serializer %.1fms\n%s",
+                request.method, request.get_full_path(), route, latency * 1000, request_metrics.queries,
+                request_metrics.query_time * 1000, request_metrics.serializer_time * 1000,
+                '\n'.join(f'  {duration * 1000:8.2f}ms  {sql}' for duration, sql in request_metrics.sql),
+            )
+
+
+def metrics_view(request):
+    if settings.METRICS_TOKEN:
+        expected = f'Bearer {settings.METRICS_TOKEN}'
+        if not constant_time_compare(request.headers.get('Authorization', ''), expected):
+            return HttpResponseForbidden()
+    elif not settings.DEBUG and not request.user.is_staff:
+        # Token berilmagan: production da metrikalar (URL lar, SQL hajmi) faqat staff sessiyasiga ochiq
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
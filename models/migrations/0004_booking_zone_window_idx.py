@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('models', '0003_parkingzone_remove_ordinaryusermodel_car_model_car_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['parking_zone', 'end_time', 'start_time'], name='booking_zone_window_idx'),
+        ),
+    ]
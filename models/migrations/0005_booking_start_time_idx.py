@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('models', '0004_booking_zone_window_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['start_time', 'id'], name='booking_start_time_idx'),
+        ),
+    ]
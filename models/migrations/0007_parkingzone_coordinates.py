@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('models', '0006_smsmessage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='parkingzone',
+            name='grid_cell',
+            field=models.BigIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='parkingzone',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='parkingzone',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('models', '0007_parkingzone_coordinates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TariffRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('short_booking_minutes', models.PositiveIntegerField(default=30)),
+                ('short_booking_penalty', models.FloatField(default=50.0)),
+                ('parking_zone', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='tariff', to='models.parkingzone')),
+            ],
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('models', '0008_tariffrule'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OccupancyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4)),
+                ('bucket_start', models.DateTimeField()),
+                ('bookings', models.IntegerField(default=0)),
+                ('occupied_minutes', models.FloatField(default=0)),
+                ('penalty_total', models.FloatField(default=0)),
+                ('parking_zone', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='models.parkingzone')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('parking_zone', 'period', 'bucket_start'), name='occupancy_rollup_bucket')],
+            },
+        ),
+    ]
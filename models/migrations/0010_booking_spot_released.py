@@ -0,0 +1,32 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:52
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mark_ended_bookings_released(apps, schema_editor):
+    # Tugagan bronlarning o'rinlari shu paytgacha qo'lda tuzatilgan, sweeper ularni qayta qaytarmasin
+    Booking = apps.get_model('models', 'Booking')
+    Booking.objects.filter(end_time__lte=timezone.now()).update(spot_released=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('models', '0009_occupancyrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='spot_released',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_ended_bookings_released, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('spot_released', False)), fields=['end_time'], name='booking_unreleased_end_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('models', '0010_booking_spot_released'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='parkingzone',
+            options={'base_manager_name': 'objects'},
+        ),
+        migrations.AddField(
+            model_name='parkingzone',
+            name='counter_shards',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='ZoneSpotShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveSmallIntegerField()),
+                ('available_spots', models.IntegerField()),
+                ('parking_zone', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='spot_shards', to='models.parkingzone')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('parking_zone', 'index'), name='zone_spot_shard_index')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:44
+
+from django.db import migrations, models
+
+
+def fill_normalized_plates(apps, schema_editor):
+    # models.normalize_plate bilan bir xil; migratsiya keyingi kod o'zgarishlariga bog'lanmasin
+    Car = apps.get_model('models', 'Car')
+    batch = []
+    for car in Car.objects.only('plate_number').iterator(chunk_size=2000):
+        car.normalized_plate = ''.join(car.plate_number.split()).replace('-', '').upper()
+        batch.append(car)
+        if len(batch) == 2000:
+            Car.objects.bulk_update(batch, ['normalized_plate'])
+            batch = []
+    Car.objects.bulk_update(batch, ['normalized_plate'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('models', '0011_zone_spot_shards'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='car',
+            name='normalized_plate',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=15),
+        ),
+        migrations.RunPython(fill_normalized_plates, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['car', 'end_time'], name='booking_car_end_idx'),
+        ),
+    ]
@@ -1,6 +1,10 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, F, OuterRef, Subquery, Sum, When
+from django.db.models.query import ModelIterable
 from django.contrib.auth.models import User
-from datetime import timedelta
+from django.utils import timezone
+from .caching import invalidate_tariffs, invalidate_zones
+from .geo import grid_cell
 
 
 class Profile(models.Model):
@@ -11,24 +15,197 @@ class Profile(models.Model):
     def __str__(self):
         return self.user.username
 
+def normalize_plate(value):
+    # Solishtirish uchun davlat raqami: katta harflar, bo'shliq va chiziqchasiz ("01 a-123 bc" -> "01A123BC")
+    return ''.join(value.split()).replace('-', '').upper()
+
+
 class Car(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     make = models.CharField(max_length=50)
     model = models.CharField(max_length=50)
     plate_number = models.CharField(max_length=15)
+    # normalize_plate(plate_number): inspektor qidiruvlari shu indeks bo'yicha ishlaydi
+    normalized_plate = models.CharField(max_length=15, editable=False, db_index=True, default='')
 
     def __str__(self):
         return f"{self.make} {self.model} ({self.plate_number})"
 
+    def save(self, *args, **kwargs):
+        self.normalized_plate = normalize_plate(self.plate_number)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'normalized_plate'}
+        super().save(*args, **kwargs)
+
+def spots_left_expression(zone_ref, prefix=''):
+    # Shardlangan zonada bo'sh o'rinlar shardlar yig'indisi, aks holda available_spots ustuni
+    shard_total = (
+        ZoneSpotShard.objects.filter(parking_zone=OuterRef(zone_ref))
+        .order_by().values('parking_zone').annotate(total=Sum('available_spots')).values('total')
+    )
+    return Case(
+        When(**{f'{prefix}counter_shards__gt': 0}, then=Subquery(shard_total)),
+        default=F(f'{prefix}available_spots'),
+    )
+
+
+# save() da available_spots qayta hisoblanadigan maydonlar
+SPOT_FIELDS = {'counter_shards', 'total_spots', 'available_spots'}
+
+
+class SpotsLeftIterable(ModelIterable):
+    """Copies the spots_left annotation into available_spots so serializers see the live value."""
+
+    def __iter__(self):
+        for obj in super().__iter__():
+            parking_zone = obj if isinstance(obj, ParkingZone) else obj.parking_zone
+            parking_zone.available_spots = parking_zone._loaded_available_spots = obj.spots_left
+            yield obj
+
+
+class ParkingZoneQuerySet(models.QuerySet):
+    def with_spots_left(self):
+        queryset = self.annotate(spots_left=spots_left_expression('pk'))
+        queryset._iterable_class = SpotsLeftIterable
+        return queryset
+
+
+class ParkingZoneManager(models.Manager.from_queryset(ParkingZoneQuerySet)):
+    def get_queryset(self):
+        return super().get_queryset().with_spots_left()
+
+
 class ParkingZone(models.Model):
     name = models.CharField(max_length=100)
     location = models.CharField(max_length=255)
     total_spots = models.IntegerField()
     available_spots = models.IntegerField()
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    grid_cell = models.BigIntegerField(null=True, blank=True, editable=False, db_index=True)
+    # 0 - oddiy rejim; N > 0 - available_spots N ta ZoneSpotShard qatoriga bo'linadi (band zonalar uchun)
+    counter_shards = models.PositiveSmallIntegerField(default=0)
+
+    objects = ParkingZoneManager()
+
+    class Meta:
+        base_manager_name = 'objects'
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # save() available_spots o'zgarishini shu qiymatga nisbatan (delta) qo'llaydi
+        instance._loaded_available_spots = instance.__dict__.get('available_spots')
+        return instance
+
+    def save(self, *args, **kwargs):
+        self.grid_cell = grid_cell(self.latitude, self.longitude)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'grid_cell'}
+            if SPOT_FIELDS & set(update_fields):
+                kwargs['update_fields'].add('available_spots')
+        with transaction.atomic():
+            resplit = self.sync_spot_counters(update_fields)
+            super().save(*args, **kwargs)
+            if resplit:
+                self.split_spots()
+        self._loaded_available_spots = self.available_spots
+        invalidate_zones(self.pk)
+
+    def sync_spot_counters(self, update_fields):
+        """
+        Recomputes available_spots from the locked live count before it is written, so a
+        save never undoes reservations made after this instance was loaded. An explicit
+        change of available_spots is applied as a delta to the live count, a change of
+        total_spots shifts it by the same amount. Returns True when the shard rows must be
+        rebuilt. Must be called inside the saving transaction.
+        """
+        if self._state.adding:
+            return bool(self.counter_shards)
+        if update_fields is not None and not SPOT_FIELDS & set(update_fields):
+            return False
+        current = ParkingZone.objects.select_for_update().filter(pk=self.pk).values_list(
+            'counter_shards', 'total_spots', 'spots_left'
+        ).first()
+        if current is None:
+            return bool(self.counter_shards)
+        counter_shards, total_spots, spots_left = current
+        loaded = getattr(self, '_loaded_available_spots', None)
+        if loaded is None:
+            # Bazadan o'qilmagan obyekt: qiymat to'g'ridan-to'g'ri berilgan deb olinadi
+            available_spots = self.available_spots
+        elif self.available_spots != loaded:
+            available_spots = spots_left + self.available_spots - loaded
+        else:
+            available_spots = spots_left + self.total_spots - total_spots
+        self.available_spots = min(max(available_spots, 0), self.total_spots)
+        if not (counter_shards or self.counter_shards):
+            return False
+        return (counter_shards, self.available_spots) != (self.counter_shards, spots_left)
+
+    def split_spots(self):
+        """Redistributes available_spots evenly over counter_shards shard rows."""
+        self.spot_shards.all().delete()
+        if self.counter_shards:
+            base, extra = divmod(max(self.available_spots, 0), self.counter_shards)
+            ZoneSpotShard.objects.bulk_create(
+                ZoneSpotShard(parking_zone=self, index=i, available_spots=base + (i < extra))
+                for i in range(self.counter_shards)
+            )
+
+    def delete(self, *args, **kwargs):
+        pk = self.pk
+        result = super().delete(*args, **kwargs)
+        # on_commit tranzaksiyadan tashqarida darhol ishlaydi: feed zona o'chirilganini ko'rishi kerak
+        invalidate_zones(pk)
+        return result
+
+class ZoneSpotShard(models.Model):
+    parking_zone = models.ForeignKey(ParkingZone, on_delete=models.CASCADE, related_name='spot_shards')
+    index = models.PositiveSmallIntegerField()
+    available_spots = models.IntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['parking_zone', 'index'], name='zone_spot_shard_index'),
+        ]
+
+    def __str__(self):
+        return f"{self.parking_zone_id}#{self.index}: {self.available_spots}"
+
+
+class BookingQuerySet(models.QuerySet):
+    def with_related(self):
+        # BookingReadSerializer va Booking.__str__ uchun kerakli ustunlar bitta JOIN bilan
+        queryset = self.select_related('user', 'parking_zone', 'car').annotate(
+            spots_left=spots_left_expression('parking_zone_id', prefix='parking_zone__'),
+        )
+        queryset._iterable_class = SpotsLeftIterable
+        return queryset.only(
+            'start_time', 'end_time', 'penalty', 'spot_released',
+            'user__username', 'user__email',
+            'car__user', 'car__make', 'car__model', 'car__plate_number',
+            'parking_zone__name', 'parking_zone__location',
+            'parking_zone__total_spots', 'parking_zone__available_spots', 'parking_zone__counter_shards',
+            'parking_zone__latitude', 'parking_zone__longitude',
+        )
+
+    def active_for_plates(self, plates, parking_zone=None, at=None):
+        """Bookings running at `at` (default now) for normalized plates, in one query over booking_car_end_idx."""
+        at = at or timezone.now()
+        queryset = self.filter(car__normalized_plate__in=plates, start_time__lte=at, end_time__gt=at)
+        if parking_zone is not None:
+            queryset = queryset.filter(parking_zone=parking_zone)
+        return queryset.select_related('car', 'parking_zone').only(
+            'start_time', 'end_time', 'car__normalized_plate', 'parking_zone__name',
+        ).order_by('start_time', 'id')
+
+
 class Booking(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     parking_zone = models.ForeignKey(ParkingZone, on_delete=models.CASCADE)
@@ -36,13 +213,94 @@ class Booking(models.Model):
     start_time = models.DateTimeField()
     end_time = models.DateTimeField()
     penalty = models.FloatField(default=0)
+    spot_released = models.BooleanField(default=False)  # end_time o'tgandan keyin o'rin qaytarildi
+
+    objects = BookingQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['end_time'], condition=models.Q(spot_released=False), name='booking_unreleased_end_idx'),
+            models.Index(fields=['parking_zone', 'end_time', 'start_time'], name='booking_zone_window_idx'),
+            models.Index(fields=['start_time', 'id'], name='booking_start_time_idx'),
+            models.Index(fields=['car', 'end_time'], name='booking_car_end_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.parking_zone.name} ({self.car.plate_number})"
 
+    def calculate_penalty(self, tariffs=None):
+        if tariffs is None:
+            from .tariffs import load_tariffs
+            tariffs = load_tariffs()
+        return tariffs.penalty_for(self.parking_zone_id, self.start_time, self.end_time)
+
     def save(self, *args, **kwargs):
-        if self.start_time < (self.end_time - timedelta(minutes=30)):
-            self.penalty = 0
-        else:
-            self.penalty = 50.0
-        super().save(*args, **kwargs)
\ No newline at end of file
+        self.penalty = self.calculate_penalty()
+        super().save(*args, **kwargs)
+
+class TariffRule(models.Model):
+    # Bron short_booking_minutes yoki undan qisqa bo'lsa jarima olinadi
+    parking_zone = models.OneToOneField(ParkingZone, on_delete=models.CASCADE, related_name='tariff')
+    short_booking_minutes = models.PositiveIntegerField(default=30)
+    short_booking_penalty = models.FloatField(default=50.0)
+
+    def __str__(self):
+        return f"{self.parking_zone}: {self.short_booking_penalty} <= {self.short_booking_minutes} min"
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        invalidate_tariffs()
+
+    def delete(self, *args, **kwargs):
+        invalidate_tariffs()
+        return super().delete(*args, **kwargs)
+
+class SmsMessage(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    phone_number = models.CharField(max_length=15)
+    body = models.CharField(max_length=320)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='sms_outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.phone_number} ({self.status})"
+
+class OccupancyRollup(models.Model):
+    PERIOD_HOUR = 'hour'
+    PERIOD_DAY = 'day'
+    PERIOD_CHOICES = [
+        (PERIOD_HOUR, 'Hour'),
+        (PERIOD_DAY, 'Day'),
+    ]
+
+    parking_zone = models.ForeignKey(ParkingZone, on_delete=models.CASCADE)
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    bucket_start = models.DateTimeField()
+    bookings = models.IntegerField(default=0)  # shu oraliqda boshlangan bronlar (turnover)
+    occupied_minutes = models.FloatField(default=0)
+    penalty_total = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['parking_zone', 'period', 'bucket_start'], name='occupancy_rollup_bucket'),
+        ]
+
+    def __str__(self):
+        return f"{self.parking_zone_id} {self.period} {self.bucket_start:%Y-%m-%d %H:%M}"
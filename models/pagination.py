@@ -0,0 +1,138 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max, Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Forward-only keyset pagination over a unique ordering such as ('start_time', 'id').
+
+    The cursor is the urlsafe base64 JSON list of the last row's ordering values, so
+    every page is a single index range scan with no OFFSET, however deep it is.
+    """
+    ordering = ('id',)
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_queryset = self.get_page_queryset(queryset, request)
+        if page_queryset is None:
+            return None
+        return self.set_page(list(page_queryset))
+
+    def get_page_queryset(self, queryset, request):
+        """The page_size + 1 slice for this request; async views evaluate it themselves."""
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self.get_keyset_filter(queryset.model, position))
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        self.page = results[:self.page_size]
+        self.has_next = len(results) > self.page_size
+        return self.page
+
+    def get_keyset_filter(self, model, position):
+        try:
+            values = [model._meta.get_field(field).to_python(value) for field, value in zip(self.ordering, position)]
+        except (ValidationError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        # (a, b) > (x, y)  =>  a >= x AND (a > x OR (a = x AND b > y)); a >= x indeks oralig'ini chegaralaydi
+        condition = Q(**{f'{self.ordering[-1]}__gt': values[-1]})
+        for field, value in zip(reversed(self.ordering[:-1]), reversed(values[:-1])):
+            condition = Q(**{f'{field}__gt': value}) | (Q(**{field: value}) & condition)
+        if len(self.ordering) > 1:
+            condition &= Q(**{f'{self.ordering[0]}__gte': values[0]})
+        return condition
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.get_cursor(self.page[-1]))
+
+    def get_previous_link(self):
+        return None
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            position = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def get_cursor(self, instance):
+        position = [instance._meta.get_field(field).value_to_string(instance) for field in self.ordering]
+        return urlsafe_b64encode(json.dumps(position, separators=(',', ':')).encode('ascii')).decode('ascii')
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        del response_schema['properties']['previous']
+        return response_schema
+
+
+class BookingPagination(KeysetPagination):
+    ordering = ('start_time', 'id')
+
+
+def estimate_row_count(queryset):
+    """Table size from planner statistics (PostgreSQL, MySQL) or the largest primary key (SQLite); None if unknown."""
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    if connection.vendor == 'postgresql':
+        sql, params = 'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table]
+    elif connection.vendor == 'mysql':
+        sql = 'SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s'
+        params = [table]
+    else:
+        # MAX(pk) indeksdan bitta qadam; o'chirilgan qatorlar hisobdan chiqmaydi, taxmin yuqoriroq bo'ladi
+        return queryset.model._default_manager.using(queryset.db).aggregate(last=Max('pk'))['last']
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    # PostgreSQL ANALYZE qilinmagan jadval uchun -1 qaytaradi
+    return row[0] if row and row[0] is not None and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Admin paginator that never runs a full COUNT(*): an unfiltered changelist uses
+    estimate_row_count, a filtered one counts at most count_limit rows.
+    """
+    count_limit = 10_000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_row_count(queryset)
+            if estimate is not None and estimate > self.count_limit:
+                return estimate
+        # SELECT COUNT(*) FROM (... LIMIT n): keng filtr ham butun jadvalni sanamaydi
+        return queryset.order_by()[:self.count_limit].count()
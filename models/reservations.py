@@ -0,0 +1,179 @@
+import random
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .caching import invalidate_zones
+from .models import ParkingZone, Booking, ZoneSpotShard
+from .rollups import record_bookings
+from .tariffs import load_tariffs
+
+
+class NoSpotsAvailable(Exception):
+    def __init__(self, parking_zone):
+        self.parking_zone = parking_zone
+        super().__init__(f"No available spots in {parking_zone}")
+
+
+def take_shard_spots(parking_zone, count):
+    """
+    Takes count units from a random shard of a sharded zone; if that shard is short,
+    collects them from the other shards inside a savepoint. Returns True on success.
+    """
+    shards = ZoneSpotShard.objects.filter(parking_zone_id=parking_zone.pk)
+    index = random.randrange(parking_zone.counter_shards)
+    if shards.filter(index=index, available_spots__gte=count).update(available_spots=F('available_spots') - count):
+        return True
+    remaining = count
+    with transaction.atomic():
+        for shard_index, available in shards.filter(available_spots__gt=0).values_list('index', 'available_spots'):
+            taken = min(remaining, available)
+            if shards.filter(index=shard_index, available_spots__gte=taken).update(
+                available_spots=F('available_spots') - taken
+            ):
+                remaining -= taken
+            if not remaining:
+                break
+        else:
+            # Yetarli o'rin topilmadi: olingan qismlar qaytariladi
+            transaction.set_rollback(True)
+    return not remaining
+
+
+def add_spots(parking_zone_id, counter_shards, count):
+    # Shardlangan zonada o'rinlar tasodifiy shardga qaytariladi
+    if counter_shards:
+        ZoneSpotShard.objects.filter(
+            parking_zone_id=parking_zone_id, index=random.randrange(counter_shards)
+        ).update(available_spots=F('available_spots') + count)
+    else:
+        ParkingZone.objects.filter(pk=parking_zone_id).update(available_spots=F('available_spots') + count)
+
+
+def reserve_spot(parking_zone, count=1):
+    if parking_zone.counter_shards:
+        reserved = take_shard_spots(parking_zone, count)
+    else:
+        # Bitta shartli UPDATE: o'rin faqat available_spots >= count bo'lsa kamayadi
+        reserved = ParkingZone.objects.filter(
+            pk=parking_zone.pk, available_spots__gte=count
+        ).update(available_spots=F('available_spots') - count)
+    if not reserved:
+        raise NoSpotsAvailable(parking_zone)
+    invalidate_zones(parking_zone.pk)
+
+
+def release_spot(parking_zone):
+    add_spots(parking_zone.pk, parking_zone.counter_shards, 1)
+    invalidate_zones(parking_zone.pk)
+
+
+def create_booking(**fields):
+    parking_zone = fields['parking_zone']
+    with transaction.atomic():
+        reserve_spot(parking_zone)
+        booking = Booking.objects.create(**fields)
+        record_bookings([booking])
+    return booking
+
+
+def reserve_available_spots(parking_zone, wanted):
+    """Reserves up to wanted spots, as many as the zone still has; returns how many were taken."""
+    count = min(wanted, max(parking_zone.available_spots, 0))
+    if count == wanted:
+        try:
+            reserve_spot(parking_zone, count)
+            return count
+        except NoSpotsAvailable:
+            pass
+    # Zona obyekti eskirgan bo'lishi mumkin: qolgan o'rinlar tranzaksiya ichida qayta o'qiladi
+    parking_zone = ParkingZone.objects.get(pk=parking_zone.pk)
+    count = min(wanted, max(parking_zone.available_spots, 0))
+    if count:
+        try:
+            reserve_spot(parking_zone, count)
+        except NoSpotsAvailable:
+            return 0
+    return count
+
+
+def create_bookings(bookings):
+    """
+    Inserts unsaved bookings with one bulk_create and one decrement per zone.
+    Returns (created, rejected); bookings that no longer fit in their zone are rejected.
+    """
+    by_zone = defaultdict(list)
+    for booking in bookings:
+        by_zone[booking.parking_zone_id].append(booking)
+
+    created, rejected = [], []
+    with transaction.atomic():
+        for zone_bookings in by_zone.values():
+            count = reserve_available_spots(zone_bookings[0].parking_zone, len(zone_bookings))
+            created.extend(zone_bookings[:count])
+            rejected.extend(zone_bookings[count:])
+
+        tariffs = load_tariffs()
+        for booking in created:
+            booking.penalty = booking.calculate_penalty(tariffs)
+        Booking.objects.bulk_create(created)
+        record_bookings(created)
+    return created, rejected
+
+
+def delete_booking(booking):
+    with transaction.atomic():
+        # Sweeper allaqachon bo'shatgan o'rin ikkinchi marta qaytarilmaydi
+        if Booking.objects.filter(pk=booking.pk, spot_released=False).update(spot_released=True):
+            release_spot(booking.parking_zone)
+        booking.delete()
+        record_bookings([booking], sign=-1)
+
+
+def move_booking(booking, new_parking_zone, new_end_time):
+    """
+    Must be called inside the transaction that saves the booking. A booking the sweeper
+    already released takes a spot again when its end_time moves into the future.
+    """
+    # Sweeper parallel ravishda bo'shatgan bo'lishi mumkin: bayroq tranzaksiya ichida qayta o'qiladi
+    booking.spot_released = Booking.objects.select_for_update().values_list(
+        'spot_released', flat=True
+    ).get(pk=booking.pk)
+    if booking.spot_released:
+        if new_end_time > timezone.now():
+            reserve_spot(new_parking_zone)
+            booking.spot_released = False
+        return
+    if booking.parking_zone_id == new_parking_zone.pk:
+        return
+    reserve_spot(new_parking_zone)
+    release_spot(booking.parking_zone)
+
+
+def release_expired_bookings(now, batch_size):
+    """
+    Releases the spots of up to batch_size bookings that ended before now, in one
+    transaction. The conditional spot_released update decides which rows this call
+    owns, so concurrent sweepers never release the same booking twice.
+    Returns the number of bookings released.
+    """
+    with transaction.atomic():
+        expired = list(
+            Booking.objects.filter(spot_released=False, end_time__lte=now)
+            .order_by('end_time')
+            .values_list('id', 'parking_zone_id', 'parking_zone__counter_shards')[:batch_size]
+        )
+        by_zone = defaultdict(list)
+        for booking_id, parking_zone_id, counter_shards in expired:
+            by_zone[parking_zone_id, counter_shards].append(booking_id)
+
+        released = 0
+        for (parking_zone_id, counter_shards), booking_ids in by_zone.items():
+            count = Booking.objects.filter(id__in=booking_ids, spot_released=False).update(spot_released=True)
+            if count:
+                add_spots(parking_zone_id, counter_shards, count)
+                released += count
+        invalidate_zones(*(parking_zone_id for parking_zone_id, _ in by_zone))
+    return released, len(expired)
@@ -0,0 +1,129 @@
+import operator
+from collections import defaultdict, namedtuple
+from datetime import timedelta, timezone
+from functools import reduce
+
+from django.db.models import F, Q, Sum
+from django.db.models.functions import TruncDay, TruncHour
+
+from .models import OccupancyRollup
+
+PERIODS = {
+    OccupancyRollup.PERIOD_HOUR: timedelta(hours=1),
+    OccupancyRollup.PERIOD_DAY: timedelta(days=1),
+}
+TRUNCATIONS = {
+    OccupancyRollup.PERIOD_HOUR: TruncHour,
+    OccupancyRollup.PERIOD_DAY: TruncDay,
+}
+
+# Bir SELECT dagi bucketlar soni (parametrlar SQLite/PostgreSQL chegarasidan past bo'lsin)
+ROLLUP_BATCH = 5000
+
+BookingSnapshot = namedtuple('BookingSnapshot', 'parking_zone_id start_time end_time penalty')
+
+
+def snapshot(booking):
+    return BookingSnapshot(booking.parking_zone_id, booking.start_time, booking.end_time, booking.penalty)
+
+
+def bucket_floor(moment, period):
+    if period == OccupancyRollup.PERIOD_DAY:
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def add_contribution(deltas, booking, sign=1):
+    """Adds a booking's turnover, occupied minutes and penalty to {(zone, period, bucket): [..]}."""
+    for period, length in PERIODS.items():
+        bucket = bucket_floor(booking.start_time, period)
+        start_delta = deltas[(booking.parking_zone_id, period, bucket)]
+        start_delta[0] += sign
+        start_delta[2] += sign * booking.penalty
+        while bucket < booking.end_time:
+            overlap = min(bucket + length, booking.end_time) - max(bucket, booking.start_time)
+            deltas[(booking.parking_zone_id, period, bucket)][1] += sign * overlap.total_seconds() / 60
+            bucket += length
+    return deltas
+
+
+def new_deltas():
+    return defaultdict(lambda: [0, 0.0, 0.0])
+
+
+def buckets_filter(keys):
+    # (zona, period) guruhlari bo'yicha IN: har bucket uchun OR zanjiri SQLite ifoda chuqurligi chegarasiga yetadi
+    buckets = defaultdict(list)
+    for parking_zone_id, period, bucket_start in keys:
+        buckets[parking_zone_id, period].append(bucket_start)
+    return reduce(operator.or_, (
+        Q(parking_zone_id=parking_zone_id, period=period, bucket_start__in=starts)
+        for (parking_zone_id, period), starts in buckets.items()
+    ))
+
+
+def apply_deltas(deltas):
+    """
+    Adds deltas to their buckets with a fixed number of statements per ROLLUP_BATCH
+    buckets: missing buckets are inserted as zeros, the batch is read with
+    select_for_update and the new totals are written back with one bulk upsert.
+    Must be called inside the transaction that writes the bookings.
+    """
+    deltas = {key: delta for key, delta in deltas.items() if any(delta)}
+    keys = list(deltas)
+    for start in range(0, len(keys), ROLLUP_BATCH):
+        batch = keys[start:start + ROLLUP_BATCH]
+        # Avval qatorlar mavjud bo'lishi kerak: aks holda ikki parallel yozuv ikkalasi ham 0 dan hisoblardi
+        OccupancyRollup.objects.bulk_create(
+            (OccupancyRollup(parking_zone_id=zone_id, period=period, bucket_start=bucket_start)
+             for zone_id, period, bucket_start in batch),
+            ignore_conflicts=True,
+        )
+        totals = []
+        for rollup in OccupancyRollup.objects.select_for_update().filter(buckets_filter(batch)):
+            bookings, minutes, penalty = deltas[rollup.parking_zone_id, rollup.period, rollup.bucket_start]
+            totals.append(OccupancyRollup(
+                parking_zone_id=rollup.parking_zone_id, period=rollup.period, bucket_start=rollup.bucket_start,
+                bookings=rollup.bookings + bookings, occupied_minutes=rollup.occupied_minutes + minutes,
+                penalty_total=rollup.penalty_total + penalty,
+            ))
+        OccupancyRollup.objects.bulk_create(
+            totals, update_conflicts=True, unique_fields=['parking_zone', 'period', 'bucket_start'],
+            update_fields=['bookings', 'occupied_minutes', 'penalty_total'],
+        )
+
+
+def penalty_deltas(queryset, penalty):
+    """
+    Per-bucket penalty_total changes if the bookings in queryset got the penalty
+    expression; summed in SQL, so the bookings themselves are not loaded.
+    """
+    deltas = new_deltas()
+    changed = queryset.annotate(new_penalty=penalty).exclude(new_penalty=F('penalty'))
+    for period, trunc in TRUNCATIONS.items():
+        rows = (
+            changed.annotate(bucket=trunc('start_time', tzinfo=timezone.utc))
+            .order_by().values('parking_zone_id', 'bucket')
+            .annotate(change=Sum(F('new_penalty') - F('penalty')))
+            .values_list('parking_zone_id', 'bucket', 'change')
+        )
+        for parking_zone_id, bucket_start, change in rows:
+            deltas[(parking_zone_id, period, bucket_start)][2] += change
+    return deltas
+
+
+def record_bookings(bookings, sign=1):
+    deltas = new_deltas()
+    for booking in bookings:
+        add_contribution(deltas, booking, sign)
+    apply_deltas(deltas)
+
+
+def record_booking_change(old, new):
+    """old/new are BookingSnapshots (or bookings) from before and after an update."""
+    if old == new:
+        return
+    deltas = new_deltas()
+    add_contribution(deltas, old, -1)
+    add_contribution(deltas, new, 1)
+    apply_deltas(deltas)
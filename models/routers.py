@@ -0,0 +1,49 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+REPLICA_ALIAS = 'replica'
+# Session, auth va contenttypes o'qishlari har doim primary dan: replica kechiksa login/logout ko'rinmay qolardi
+PRIMARY_ONLY_APPS = {'auth', 'sessions', 'contenttypes'}
+
+_use_replica = ContextVar('use_replica', default=False)
+
+
+@contextmanager
+def replica_reads():
+    token = _use_replica.set(REPLICA_ALIAS in settings.DATABASES)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Sends reads to the replica only inside replica_reads(); auth, session and content
+    type reads and all writes always use default.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return 'default'
+        return REPLICA_ALIAS if _use_replica.get() else None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+
+class ReplicaReadMixin:
+    replica_actions = {'list', 'retrieve'}
+
+    def dispatch(self, request, *args, **kwargs):
+        # self.action hali aniqlanmagan, shuning uchun HTTP metod va as_view() xaritasidan olinadi
+        action = getattr(self, 'action_map', {}).get(request.method.lower())
+        if action in self.replica_actions:
+            with replica_reads():
+                return super().dispatch(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
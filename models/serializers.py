@@ -1,10 +1,27 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth.models import User
-from .models import Profile, Car, ParkingZone, Booking
+from .models import Profile, Car, ParkingZone, Booking, normalize_plate
 from django.db import transaction  # Atomik tranzaksiyalar uchun
+from .reservations import NoSpotsAvailable, create_booking, move_booking
+from .rollups import record_booking_change, snapshot
+from .metrics import TimedSerializerMixin
 
 
-class UserSerializer(serializers.ModelSerializer):
+def validate_booking_window(data, instance=None):
+    # PATCH da yetishmayotgan vaqt mavjud brondan olinadi
+    start_time = data.get('start_time', getattr(instance, 'start_time', None))
+    end_time = data.get('end_time', getattr(instance, 'end_time', None))
+    if start_time is None or end_time is None:
+        return
+    if start_time >= end_time:
+        raise serializers.ValidationError({"end_time": "Tugash vaqti boshlanish vaqtidan keyin bo'lishi kerak."})
+    if end_time - start_time > settings.MAX_BOOKING_DURATION:
+        hours = int(settings.MAX_BOOKING_DURATION.total_seconds() // 3600)
+        raise serializers.ValidationError({"end_time": f"Bron {hours} soatdan uzun bo'lishi mumkin emas."})
+
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'password', 'email']
@@ -16,7 +33,7 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
 
-class ProfileSerializer(serializers.ModelSerializer):
+class ProfileSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     user = serializers.StringRelatedField(read_only=True)
 
     class Meta:
@@ -24,7 +41,7 @@ class ProfileSerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'phone_number', 'is_verified']
 
 
-class CarSerializer(serializers.ModelSerializer):
+class CarSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), write_only=False)
 
     class Meta:
@@ -39,13 +56,22 @@ class CarSerializer(serializers.ModelSerializer):
         return car
 
 
-class ParkingZoneSerializer(serializers.ModelSerializer):
+class ParkingZoneSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = ParkingZone
-        fields = ['id', 'name', 'location', 'total_spots', 'available_spots']
+        fields = ['id', 'name', 'location', 'total_spots', 'available_spots', 'latitude', 'longitude']
+
+    def validate(self, data):
+        latitude = data.get('latitude', getattr(self.instance, 'latitude', None))
+        longitude = data.get('longitude', getattr(self.instance, 'longitude', None))
+        if (latitude is None) != (longitude is None):
+            raise serializers.ValidationError("latitude va longitude birga berilishi kerak.")
+        if latitude is not None and not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise serializers.ValidationError("Koordinatalar noto'g'ri.")
+        return data
 
 
-class BookingSerializer(serializers.ModelSerializer):  # Variant 1
+class BookingSerializer(TimedSerializerMixin, serializers.ModelSerializer):  # Variant 1
     user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all())
     car = serializers.PrimaryKeyRelatedField(queryset=Car.objects.all())
     parking_zone = serializers.PrimaryKeyRelatedField(queryset=ParkingZone.objects.all())
@@ -65,56 +91,40 @@ class BookingSerializer(serializers.ModelSerializer):  # Variant 1
 
     def validate(self, data):
         if 'user' in data and 'car' in data:
-            if data['car'].user != data['user']:
+            if data['car'].user_id != data['user'].pk:
                 raise serializers.ValidationError(
                     {"car": "Bu mashina tanlangan foydalanuvchiga tegishli emas."}
                 )
 
-        # Vaqt validatsiyasi (masalan, start_time end_time dan oldin bo'lishi)
-        if 'start_time' in data and 'end_time' in data:
-            if data['start_time'] >= data['end_time']:
-                raise serializers.ValidationError(
-                    {"end_time": "Tugash vaqti boshlanish vaqtidan keyin bo'lishi kerak."}
-                )
+        # Vaqt validatsiyasi: start_time end_time dan oldin, davomiylik MAX_BOOKING_DURATION dan oshmaydi
+        validate_booking_window(data, self.instance)
         return data
 
     def create(self, validated_data):
-        parking_zone = validated_data.get('parking_zone')
-        if parking_zone.available_spots <= 0:
+        try:
+            return create_booking(**validated_data)
+        except NoSpotsAvailable:
             raise serializers.ValidationError({"parking_zone": "Bu joyda bo'sh o'rin yo'q."})
 
-        booking = Booking.objects.create(**validated_data)
-
-        parking_zone.available_spots -= 1
-        parking_zone.save(update_fields=['available_spots'])
-        return booking
-
     def update(self, instance, validated_data):
         old_parking_zone = instance.parking_zone
         new_parking_zone_from_data = validated_data.get('parking_zone', old_parking_zone)
 
-        parking_zone_changed = (old_parking_zone != new_parking_zone_from_data)
-
-        if parking_zone_changed:
-            if new_parking_zone_from_data.available_spots <= 0:
-                raise serializers.ValidationError(
-                    {"parking_zone": f"Yangi tanlangan joyda ({new_parking_zone_from_data.name}) bo'sh o'rin yo'q."}
-                )
-
-        updated_instance = super().update(instance, validated_data)
-
-        if parking_zone_changed:
+        try:
             with transaction.atomic():
-                old_parking_zone.available_spots += 1
-                old_parking_zone.save(update_fields=['available_spots'])
-
-                new_parking_zone_from_data.available_spots -= 1
-                new_parking_zone_from_data.save(update_fields=['available_spots'])
+                before = snapshot(instance)
+                move_booking(instance, new_parking_zone_from_data, validated_data.get('end_time', instance.end_time))
+                updated_instance = super().update(instance, validated_data)
+                record_booking_change(before, snapshot(updated_instance))
+        except NoSpotsAvailable:
+            raise serializers.ValidationError(
+                {"parking_zone": f"Yangi tanlangan joyda ({new_parking_zone_from_data.name}) bo'sh o'rin yo'q."}
+            )
 
         return updated_instance
 
 
-class BookingNestedWriteSerializer(serializers.ModelSerializer):  # Variant 2
+class BookingNestedWriteSerializer(TimedSerializerMixin, serializers.ModelSerializer):  # Variant 2
     user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all())
     car = CarSerializer()
     parking_zone = serializers.PrimaryKeyRelatedField(queryset=ParkingZone.objects.all())
@@ -124,6 +134,10 @@ class BookingNestedWriteSerializer(serializers.ModelSerializer):  # Variant 2
         fields = ['id', 'user', 'car', 'parking_zone', 'start_time', 'end_time', 'penalty']
         read_only_fields = ['penalty']
 
+    def validate(self, data):
+        validate_booking_window(data, self.instance)
+        return data
+
     def create(self, validated_data):
         car_data = validated_data.pop('car')
         current_user = validated_data.get('user')  # Bu user ViewSet da o'rnatilishi kerak yoki client yuborishi kerak
@@ -140,27 +154,24 @@ class BookingNestedWriteSerializer(serializers.ModelSerializer):  # Variant 2
 
         # Car ni olish yoki yaratish
         # Bu logikani aniqlashtirish kerak: har doim yangi car yaratiladimi yoki mavjudini ishlatadimi?
-        # Agar plate_number va user bilan unikal bo'lsa:
+        # Agar plate_number va user bilan unikal bo'lsa ("01 A 123" va "01A123" bitta mashina):
         car_instance, created = Car.objects.get_or_create(
             user=car_data['user'],  # Yoki car_data['user'].id agar u obyekt bo'lsa
-            plate_number=car_data['plate_number'],
-            defaults={'make': car_data['make'], 'model': car_data['model']}
+            normalized_plate=normalize_plate(car_data['plate_number']),
+            defaults={'plate_number': car_data['plate_number'], 'make': car_data['make'], 'model': car_data['model']}
         )
 
         parking_zone_instance = validated_data.get('parking_zone')
 
-        if parking_zone_instance.available_spots <= 0:
+        try:
+            booking = create_booking(car=car_instance, parking_zone=parking_zone_instance, user=current_user,
+                                     start_time=validated_data['start_time'], end_time=validated_data['end_time'])
+        except NoSpotsAvailable:
             raise serializers.ValidationError({"parking_zone": "Bu joyda bo'sh o'rin yo'q."})
-
-        booking = Booking.objects.create(car=car_instance, parking_zone=parking_zone_instance, user=current_user,
-                                         start_time=validated_data['start_time'], end_time=validated_data['end_time'])
-
-        parking_zone_instance.available_spots -= 1
-        parking_zone_instance.save(update_fields=['available_spots'])
         return booking
 
 
-class BookingReadSerializer(serializers.ModelSerializer):  # Variant 3 - O'qish uchun
+class BookingReadSerializer(TimedSerializerMixin, serializers.ModelSerializer):  # Variant 3 - O'qish uchun
     user = UserSerializer(read_only=True)
     car = CarSerializer(read_only=True)
     parking_zone = ParkingZoneSerializer(read_only=True)
@@ -170,7 +181,17 @@ class BookingReadSerializer(serializers.ModelSerializer):  # Variant 3 - O'qish
         fields = ['id', 'user', 'car', 'parking_zone', 'start_time', 'end_time', 'penalty']
 
 
-class BookingWriteSerializer(serializers.ModelSerializer):  # Variant 3 - Yozish uchun
+class ActivePlateBookingSerializer(TimedSerializerMixin, serializers.ModelSerializer):  # Inspektorlar uchun
+    plate = serializers.CharField(source='car.normalized_plate', read_only=True)
+    parking_zone_name = serializers.CharField(source='parking_zone.name', read_only=True)
+
+    class Meta:
+        model = Booking
+        fields = ['id', 'plate', 'car', 'parking_zone', 'parking_zone_name', 'start_time', 'end_time']
+        read_only_fields = fields
+
+
+class BookingWriteSerializer(TimedSerializerMixin, serializers.ModelSerializer):  # Variant 3 - Yozish uchun
     user = serializers.HiddenField(default=serializers.CurrentUserDefault())
     car = serializers.PrimaryKeyRelatedField(
         queryset=Car.objects.all(),
@@ -183,7 +204,7 @@ class BookingWriteSerializer(serializers.ModelSerializer):  # Variant 3 - Yozish
 
     def validate_car(self, car_instance):
         request_user = self.context['request'].user
-        if car_instance.user != request_user:
+        if car_instance.user_id != request_user.pk:
             raise serializers.ValidationError("Siz faqat o'zingizning mashinangizni tanlashingiz mumkin.")
         return car_instance
 
@@ -199,41 +220,38 @@ class BookingWriteSerializer(serializers.ModelSerializer):  # Variant 3 - Yozish
         return parking_zone_instance
 
     def validate(self, data):
-        if 'start_time' in data and 'end_time' in data:
-            if data['start_time'] >= data['end_time']:
-                raise serializers.ValidationError(
-                    {"end_time": "Tugash vaqti boshlanish vaqtidan keyin bo'lishi kerak."}
-                )
+        validate_booking_window(data, self.instance)
         return data
 
     def create(self, validated_data):
-        parking_zone = validated_data.get('parking_zone')
-        # validate_parking_zone da tekshirilgan
-
-        booking = Booking.objects.create(**validated_data)
-
-        parking_zone.available_spots -= 1
-        parking_zone.save(update_fields=['available_spots'])
-        return booking
+        # validate_parking_zone faqat tezkor tekshiruv, haqiqiy band qilish create_booking da
+        try:
+            return create_booking(**validated_data)
+        except NoSpotsAvailable:
+            raise serializers.ValidationError({"parking_zone": "Bu joyda bo'sh o'rin yo'q."})
 
     def update(self, instance, validated_data):
         old_parking_zone = instance.parking_zone
         new_parking_zone_from_data = validated_data.get('parking_zone', old_parking_zone)
 
-        parking_zone_changed = (old_parking_zone != new_parking_zone_from_data)
-
-        if parking_zone_changed:
-            pass
-
-        updated_instance = super().update(instance, validated_data)
-
-        if parking_zone_changed:
+        try:
             with transaction.atomic():
-                old_parking_zone.available_spots += 1
-                old_parking_zone.save(update_fields=['available_spots'])
+                before = snapshot(instance)
+                move_booking(instance, new_parking_zone_from_data, validated_data.get('end_time', instance.end_time))
+                updated_instance = super().update(instance, validated_data)
+                record_booking_change(before, snapshot(updated_instance))
+        except NoSpotsAvailable:
+            raise serializers.ValidationError({"parking_zone": "Bu joyda bo'sh o'rin yo'q."})
+
+        return updated_instance
 
-                # updated_instance.parking_zone bu yangi parking zona
-                updated_instance.parking_zone.available_spots -= 1
-                updated_instance.parking_zone.save(update_fields=['available_spots'])
+class BookingBulkItemSerializer(TimedSerializerMixin, serializers.Serializer):  # Bulk create uchun, DB so'rovlarisiz
+    user = serializers.IntegerField(required=False)
+    car = serializers.IntegerField()
+    parking_zone = serializers.IntegerField()
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
 
-        return updated_instance
\ No newline at end of file
+    def validate(self, data):
+        validate_booking_window(data)
+        return data
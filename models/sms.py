@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import SmsMessage
+
+
+class TwilioBackend:
+    def __init__(self):
+        # twilio faqat worker da, birinchi yuborishda import qilinadi
+        from twilio.http.http_client import TwilioHttpClient
+        from twilio.rest import Client
+
+        # Timeout siz so'rov claim_batch ijarasidan uzoq osilib qolishi mumkin
+        self.client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN,
+                             http_client=TwilioHttpClient(timeout=settings.SMS_SEND_TIMEOUT))
+
+    def send(self, phone_number, body):
+        self.client.messages.create(body=body, from_=settings.TWILIO_PHONE_NUMBER, to=phone_number)
+
+
+class LocMemBackend:
+    """Keeps sent messages in LocMemBackend.outbox, like Django's locmem email backend."""
+    outbox = []
+
+    def send(self, phone_number, body):
+        self.outbox.append((phone_number, body))
+
+
+def get_backend():
+    return import_string(settings.SMS_BACKEND)()
+
+
+def queue_sms(phone_number, body):
+    return SmsMessage.objects.create(phone_number=phone_number, body=body)
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(settings.SMS_RETRY_BASE_DELAY * 2 ** (attempts - 1), settings.SMS_RETRY_MAX_DELAY))
+
+
+def lease_duration(batch_size):
+    return timedelta(seconds=batch_size * settings.SMS_SEND_TIMEOUT + settings.SMS_LEASE_SECONDS)
+
+
+def claim_batch(batch_size):
+    """Leases due messages so that concurrent workers don't send the same message twice."""
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            SmsMessage.objects.select_for_update(skip_locked=True)
+            .filter(status=SmsMessage.STATUS_PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        # Batch ketma-ket yuboriladi: oxirgi xabar ham ijara tugashidan oldin yuborilib bo'lishi kerak
+        lease_until = now + lease_duration(len(ids))
+        SmsMessage.objects.filter(id__in=ids, next_attempt_at__lte=now).update(next_attempt_at=lease_until)
+    # Faqat shu worker ijaraga olgan xabarlar (lease_until har bir worker uchun boshqacha)
+    return list(SmsMessage.objects.filter(id__in=ids, next_attempt_at=lease_until))
+
+
+def send_batch(backend, batch_size, max_attempts):
+    """Sends one batch of due messages; returns (sent, failed) counts."""
+    sent = failed = 0
+    for message in claim_batch(batch_size):
+        message.attempts += 1
+        try:
+            backend.send(message.phone_number, message.body)
+        except Exception as exc:
+            message.last_error = str(exc)
+            if message.attempts >= max_attempts:
+                message.status = SmsMessage.STATUS_FAILED
+            else:
+                message.next_attempt_at = timezone.now() + retry_delay(message.attempts)
+            failed += 1
+        else:
+            message.status = SmsMessage.STATUS_SENT
+            message.sent_at = timezone.now()
+            sent += 1
+        message.save(update_fields=['attempts', 'status', 'next_attempt_at', 'last_error', 'sent_at'])
+    return sent, failed
@@ -0,0 +1,14 @@
+'use strict';
+// AutocompleteFilter: tanlangan qiymat bilan changelist qayta ochiladi (sahifa raqami tashlab yuboriladi)
+window.addEventListener('load', function() {
+    django.jQuery('.autocomplete-filter select').on('change', function() {
+        const params = new URLSearchParams(window.location.search);
+        params.delete('p');
+        if (this.value) {
+            params.set(this.name, this.value);
+        } else {
+            params.delete(this.name);
+        }
+        window.location.search = params.toString();
+    });
+});
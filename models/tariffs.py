@@ -0,0 +1,54 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, F, FloatField, Q, Value, When
+
+from .caching import TARIFFS_KEY
+from .models import TariffRule
+
+
+class Tariffs:
+    """
+    Per-zone short-booking penalty rules with a settings-level default.
+    The same rules are available per booking (penalty_for) and as a SQL
+    expression (penalty_expression) for set-based recomputation.
+    """
+
+    def __init__(self, rules, default_minutes, default_penalty):
+        self.rules = rules  # {parking_zone_id: (short_booking_minutes, short_booking_penalty)}
+        self.default = (default_minutes, default_penalty)
+
+    def penalty_for(self, parking_zone_id, start_time, end_time):
+        minutes, penalty = self.rules.get(parking_zone_id, self.default)
+        if start_time < end_time - timedelta(minutes=minutes):
+            return 0
+        return penalty
+
+    def penalty_expression(self):
+        def short_booking(minutes):
+            return Q(start_time__gte=F('end_time') - Value(timedelta(minutes=minutes)))
+
+        whens = [
+            When(Q(parking_zone_id=parking_zone_id) & short_booking(minutes), then=Value(penalty))
+            for parking_zone_id, (minutes, penalty) in self.rules.items()
+        ]
+        whens += [
+            When(parking_zone_id=parking_zone_id, then=Value(0.0))
+            for parking_zone_id in self.rules
+        ]
+        whens.append(When(short_booking(self.default[0]), then=Value(self.default[1])))
+        return Case(*whens, default=Value(0.0), output_field=FloatField())
+
+
+def load_tariffs():
+    rules = cache.get(TARIFFS_KEY)
+    if rules is None:
+        rules = {
+            parking_zone_id: (minutes, penalty)
+            for parking_zone_id, minutes, penalty in TariffRule.objects.values_list(
+                'parking_zone_id', 'short_booking_minutes', 'short_booking_penalty'
+            )
+        }
+        cache.set(TARIFFS_KEY, rules, None)
+    return Tariffs(rules, settings.PENALTY_SHORT_BOOKING_MINUTES, settings.PENALTY_SHORT_BOOKING_AMOUNT)
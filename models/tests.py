@@ -1,3 +1,912 @@
-from django.test import TestCase
+import csv
+import json
+import os
+import random
+import tempfile
+import warnings
+from base64 import urlsafe_b64encode
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.sessions.models import Session
+from django.core.cache import cache, caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.core.paginator import UnorderedObjectListWarning
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.views import APIView
+
+from .admin import IndexedDatetimesQuerySet
+from .authentication import issue_tokens
+from .caching import check_shared_cache
+from .exports import EXPORT_COLUMNS
+from .geo import haversine_km, nearest_zones
+from .models import Booking, Car, OccupancyRollup, ParkingZone, SmsMessage, TariffRule
+from .reservations import (NoSpotsAvailable, create_booking, create_bookings, delete_booking,
+                           release_expired_bookings, reserve_spot)
+from .routers import REPLICA_ALIAS, ReplicaRouter, replica_reads
+from .rollups import add_contribution, apply_deltas, new_deltas
+from .serializers import BookingReadSerializer
+from .sms import LocMemBackend, claim_batch, queue_sms, retry_delay, send_batch
+from .tariffs import load_tariffs
+from .throttling import AdmissionControlMixin, LoadShedder, get_shedder
+
+
+class ReservationTests(TestCase):
+    """Spots are taken with a conditional UPDATE, so a zone is never oversold."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='driver')
+        self.car = Car.objects.create(user=self.user, make='Chevrolet', model='Cobalt', plate_number='01 A 123 BC')
+        self.start = timezone.now() + timedelta(hours=1)
+
+    def book(self, parking_zone):
+        return create_booking(user=self.user, car=self.car, parking_zone=parking_zone,
+                              start_time=self.start, end_time=self.start + timedelta(hours=1))
+
+    def test_zone_is_never_oversold(self):
+        for counter_shards in (0, 4):
+            with self.subTest(counter_shards=counter_shards):
+                zone = ParkingZone.objects.create(name='Full', location='-', total_spots=10, available_spots=10,
+                                                  counter_shards=counter_shards)
+                for _ in range(10):
+                    self.book(zone)
+                with self.assertRaises(NoSpotsAvailable):
+                    self.book(zone)
+                self.assertEqual(ParkingZone.objects.get(pk=zone.pk).available_spots, 0)
+                self.assertEqual(Booking.objects.filter(parking_zone=zone).count(), 10)
+
+    def test_stale_instance_cannot_take_last_spot(self):
+        zone = ParkingZone.objects.create(name='Last', location='-', total_spots=1, available_spots=1)
+        # Ikkala so'rov ham zonani "1 ta bo'sh o'rin" holatida o'qigan
+        first, second = ParkingZone.objects.get(pk=zone.pk), ParkingZone.objects.get(pk=zone.pk)
+        self.book(first)
+        with self.assertRaises(NoSpotsAvailable):
+            self.book(second)
+        self.assertEqual(Booking.objects.filter(parking_zone=zone).count(), 1)
+
+    def test_zone_edit_keeps_concurrent_reservations(self):
+        zone = ParkingZone.objects.create(name='Hot', location='-', total_spots=20, available_spots=20, counter_shards=4)
+        stale = ParkingZone.objects.get(pk=zone.pk)
+        for _ in range(5):
+            self.book(zone)
+
+        stale.name = 'Hot (renamed)'
+        stale.save()
+        self.assertEqual(ParkingZone.objects.get(pk=zone.pk).available_spots, 15)
+
+        stale.counter_shards = 8
+        stale.total_spots = 30
+        stale.save()
+        zone = ParkingZone.objects.get(pk=zone.pk)
+        self.assertEqual(zone.spot_shards.count(), 8)
+        self.assertEqual(zone.available_spots, 25)
+
+        stale.counter_shards = 0
+        stale.save()
+        self.assertEqual(ParkingZone.objects.get(pk=zone.pk).available_spots, 25)
+
+    def test_stale_save_keeps_unsharded_reservations(self):
+        zone = ParkingZone.objects.create(name='Plain', location='-', total_spots=10, available_spots=10)
+        stale, stale_form = ParkingZone.objects.get(pk=zone.pk), ParkingZone.objects.get(pk=zone.pk)
+        for _ in range(3):
+            self.book(zone)
+        stale.name = 'Plain (renamed)'
+        stale.save()
+        self.assertEqual(ParkingZone.objects.get(pk=zone.pk).available_spots, 7)
+        # Eski sahifadagi forma 10 -> 8: o'zgarish joriy qiymatga delta sifatida qo'llanadi
+        stale_form.available_spots = 8
+        stale_form.save()
+        self.assertEqual(stale_form.available_spots, 5)
+        self.assertEqual(ParkingZone.objects.get(pk=zone.pk).available_spots, 5)
+
+    def test_admin_form_applies_only_its_own_change(self):
+        zone = ParkingZone.objects.create(name='Form', location='-', total_spots=10, available_spots=10)
+        self.client.force_login(User.objects.create_superuser(username='admin', password='-'))
+        url = f'/admin/models/parkingzone/{zone.pk}/change/'
+        self.assertContains(self.client.get(url), 'name="initial-available_spots"')
+        for _ in range(3):
+            self.book(zone)
+
+        # Forma bronlardan oldin ochilgan: unda hali 10 bo'sh o'rin ko'rinadi
+        form = {'name': 'Form', 'location': '-', 'total_spots': 10, 'counter_shards': 0,
+                'initial-available_spots': 10, 'latitude': '', 'longitude': ''}
+        self.client.post(url, {**form, 'available_spots': 10})
+        self.assertEqual(ParkingZone.objects.get(pk=zone.pk).available_spots, 7)
+        self.client.post(url, {**form, 'available_spots': 8})
+        self.assertEqual(ParkingZone.objects.get(pk=zone.pk).available_spots, 5)
+
+    def test_available_spots_edit_reaches_shards(self):
+        zone = ParkingZone.objects.create(name='Hot', location='-', total_spots=10, available_spots=10, counter_shards=4)
+        self.book(zone)
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        client = APIClient()
+        client.force_authenticate(staff)
+        response = client.patch(f'/api/parking-zones/{zone.pk}/', {'available_spots': 2}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['available_spots'], 2)
+        self.assertEqual(ParkingZone.objects.get(pk=zone.pk).available_spots, 2)
+        self.book(zone)
+        self.book(zone)
+        with self.assertRaises(NoSpotsAvailable):
+            self.book(zone)
+
+    def test_reserve_is_one_query(self):
+        zone = ParkingZone.objects.create(name='One', location='-', total_spots=5, available_spots=5)
+        with self.assertNumQueries(1):
+            reserve_spot(zone, 2)
+        self.assertEqual(ParkingZone.objects.get(pk=zone.pk).available_spots, 3)
+
+
+class ExpiredBookingTests(TestCase):
+    """The sweeper returns spots of ended bookings; extending a released booking takes a spot again."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='driver')
+        self.car = Car.objects.create(user=self.user, make='Chevrolet', model='Cobalt', plate_number='01 A 123 BC')
+        self.zone = ParkingZone.objects.create(name='Sweep', location='-', total_spots=2, available_spots=2)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        now = timezone.now()
+        self.booking = create_booking(user=self.user, car=self.car, parking_zone=self.zone,
+                                      start_time=now - timedelta(hours=2), end_time=now - timedelta(hours=1))
+
+    def spots(self):
+        return ParkingZone.objects.get(pk=self.zone.pk).available_spots
+
+    def test_sweeper_releases_once(self):
+        self.assertEqual(release_expired_bookings(timezone.now(), 100), (1, 1))
+        self.assertEqual(release_expired_bookings(timezone.now(), 100), (0, 0))
+        self.assertEqual(self.spots(), 2)
+
+    def test_extending_released_booking_reserves_again(self):
+        release_expired_bookings(timezone.now(), 100)
+        end_time = timezone.now() + timedelta(hours=1)
+        response = self.client.patch(f'/api/bookings/{self.booking.pk}/', {'end_time': end_time.isoformat()},
+                                     format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertFalse(Booking.objects.get(pk=self.booking.pk).spot_released)
+        self.assertEqual(self.spots(), 1)
+
+    def test_extending_released_booking_into_full_zone_fails(self):
+        release_expired_bookings(timezone.now(), 100)
+        ParkingZone.objects.filter(pk=self.zone.pk).update(available_spots=0)
+        end_time = timezone.now() + timedelta(hours=1)
+        response = self.client.patch(f'/api/bookings/{self.booking.pk}/', {'end_time': end_time.isoformat()},
+                                     format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(Booking.objects.get(pk=self.booking.pk).spot_released)
+
+
+class BulkBookingTests(TestCase):
+    """POST /api/bookings/bulk/ runs a fixed number of queries and never oversells a zone."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='fleet')
+        self.cars = [Car.objects.create(user=self.user, make='Kia', model='K5', plate_number=f'BULK{i}') for i in range(3)]
+        self.zones = [
+            ParkingZone.objects.create(name=f'Bulk zone {i}', location='-', total_spots=1000, available_spots=1000)
+            for i in range(3)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.base = timezone.now().replace(minute=0, second=0, microsecond=0) + timedelta(days=1)
+
+    def payload(self, size, offset=0, zones=None):
+        zones = zones or self.zones
+        return [
+            {
+                'car': self.cars[i % len(self.cars)].pk,
+                'parking_zone': zones[i % len(zones)].pk,
+                # Har bir bron boshqa soatda: rollup bucketlari ham partiya bilan o'sadi
+                'start_time': (self.base + timedelta(hours=offset + i)).isoformat(),
+                'end_time': (self.base + timedelta(hours=offset + i + 2)).isoformat(),
+            }
+            for i in range(size)
+        ]
+
+    def test_query_count_is_independent_of_batch_size(self):
+        load_tariffs()
+        counts = []
+        for offset, size in ((0, 5), (5, 50), (55, 200)):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post('/api/bookings/bulk/', self.payload(size, offset), format='json')
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(response.data['created'], size)
+            # INSERT lar bulk_create orqali parametr chegarasi bo'yicha bo'linadi
+            counts.append(sum(not q['sql'].startswith('INSERT') for q in queries))
+        self.assertEqual(len(set(counts)), 1, counts)
+
+    def test_full_zone_rejects_the_rest(self):
+        zone = ParkingZone.objects.create(name='Small', location='-', total_spots=3, available_spots=3)
+        response = self.client.post('/api/bookings/bulk/', self.payload(5, zones=[zone]), format='json')
+        self.assertEqual(response.data['created'], 3)
+        self.assertEqual([result['status'] for result in response.data['results']],
+                         ['created'] * 3 + ['error'] * 2)
+        self.assertEqual(ParkingZone.objects.get(pk=zone.pk).available_spots, 0)
+        self.assertEqual(Booking.objects.filter(parking_zone=zone).count(), 3)
+
+    def test_stale_zone_reserves_what_is_left(self):
+        for counter_shards in (0, 2):
+            with self.subTest(counter_shards=counter_shards):
+                zone = ParkingZone.objects.create(name=f'Stale {counter_shards}', location='-', total_spots=5,
+                                                  available_spots=5, counter_shards=counter_shards)
+                stale = ParkingZone.objects.get(pk=zone.pk)
+                reserve_spot(zone, 2)
+                bookings = [
+                    Booking(user=self.user, car=self.cars[0], parking_zone=stale,
+                            start_time=self.base, end_time=self.base + timedelta(hours=1))
+                    for _ in range(5)
+                ]
+                created, rejected = create_bookings(bookings)
+                self.assertEqual((len(created), len(rejected)), (3, 2))
+                self.assertEqual(ParkingZone.objects.get(pk=zone.pk).available_spots, 0)
+
+
+class RollupTests(TestCase):
+    """Incremental rollups match a rebuild from the booking table, with a fixed number of statements."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='driver')
+        self.car = Car.objects.create(user=self.user, make='Chevrolet', model='Cobalt', plate_number='01 A 123 BC')
+        self.zone = ParkingZone.objects.create(name='Rollups', location='-', total_spots=1000, available_spots=1000)
+        self.base = timezone.now().replace(minute=0, second=0, microsecond=0) + timedelta(days=1)
+
+    def bookings(self, count, hours_apart=1):
+        return [
+            Booking(user=self.user, car=self.car, parking_zone=self.zone,
+                    start_time=self.base + timedelta(hours=i * hours_apart, minutes=15),
+                    end_time=self.base + timedelta(hours=i * hours_apart + 2))
+            for i in range(count)
+        ]
+
+    def assertRollupsMatchBookings(self):
+        expected = new_deltas()
+        for booking in Booking.objects.filter(parking_zone=self.zone):
+            add_contribution(expected, booking)
+        expected = {key: tuple(delta) for key, delta in expected.items() if any(delta)}
+        actual = {
+            (rollup.parking_zone_id, rollup.period, rollup.bucket_start):
+                (rollup.bookings, rollup.occupied_minutes, rollup.penalty_total)
+            for rollup in OccupancyRollup.objects.filter(parking_zone=self.zone)
+            if rollup.bookings or rollup.occupied_minutes or rollup.penalty_total
+        }
+        self.assertEqual(actual, expected)
+
+    def test_writes_keep_rollups_in_sync(self):
+        create_bookings(self.bookings(20))
+        booking = Booking.objects.filter(parking_zone=self.zone).first()
+        delete_booking(booking)
+        self.assertRollupsMatchBookings()
+
+    def test_recomputed_penalties_move_into_rollups(self):
+        short = [
+            Booking(user=self.user, car=self.car, parking_zone=self.zone,
+                    start_time=self.base + timedelta(hours=i * 5), end_time=self.base + timedelta(hours=i * 5, minutes=20))
+            for i in range(6)
+        ]
+        create_bookings(short + self.bookings(3))
+        with self.captureOnCommitCallbacks(execute=True):
+            TariffRule.objects.create(parking_zone=self.zone, short_booking_minutes=90, short_booking_penalty=75.0)
+        call_command('recompute_penalties', stdout=StringIO())
+        self.assertEqual(Booking.objects.filter(parking_zone=self.zone, penalty=75.0).count(), 6)
+        self.assertRollupsMatchBookings()
+
+    def test_statements_do_not_grow_with_buckets(self):
+        for count in (5, 200):
+            with self.subTest(count=count):
+                deltas = new_deltas()
+                for booking in self.bookings(count, hours_apart=3):
+                    add_contribution(deltas, booking)
+                with CaptureQueriesContext(connection) as queries:
+                    apply_deltas(deltas)
+                # INSERT lar bulk_create orqali parametr chegarasi bo'yicha bo'linadi
+                self.assertEqual([q['sql'].split()[0] for q in queries if not q['sql'].startswith('INSERT')],
+                                 ['SELECT'])
+
+    def test_overlong_bookings_are_rejected(self):
+        booking = create_bookings(self.bookings(1))[0][0]
+        rollups = OccupancyRollup.objects.count()
+        far = (booking.start_time + settings.MAX_BOOKING_DURATION + timedelta(hours=1)).isoformat()
+        client = APIClient()
+        response = client.patch(f'/api/bookings/{booking.pk}/', {'end_time': far}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('end_time', response.data)
+
+        item = {'user': self.user.pk, 'car': self.car.pk, 'parking_zone': self.zone.pk,
+                'start_time': booking.start_time.isoformat(), 'end_time': far}
+        response = client.post('/api/bookings/bulk/', [item], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('end_time', response.data['results'][0]['errors'])
+        self.assertEqual(OccupancyRollup.objects.count(), rollups)
+
+
+class SharedCacheTests(TestCase):
+    def test_process_local_cache_is_refused_outside_debug(self):
+        with override_settings(DEBUG=False, ALLOW_PROCESS_LOCAL_CACHE=False):
+            with self.assertRaises(ImproperlyConfigured):
+                check_shared_cache()
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'cache'}}
+        with override_settings(DEBUG=False, ALLOW_PROCESS_LOCAL_CACHE=False, CACHES=shared):
+            check_shared_cache()
+
+
+class TokenRefreshTests(TestCase):
+    def refresh_and_export(self, refresh):
+        client = APIClient()
+        response = client.post('/auth/token/refresh/', {'refresh': refresh}, format='json')
+        if response.status_code != 200:
+            return response.status_code
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        return client.get('/api/bookings/export/').status_code
+
+    def test_refresh_reissues_claims_from_database(self):
+        admin = User.objects.create_user(username='admin', is_staff=True)
+        refresh = issue_tokens(admin)['refresh']
+        self.assertEqual(self.refresh_and_export(refresh), 200)
+
+        admin.is_staff = False
+        admin.save()
+        self.assertEqual(self.refresh_and_export(refresh), 403)
+
+        admin.is_active = False
+        admin.save()
+        self.assertEqual(self.refresh_and_export(refresh), 401)
+
+
+class BookingCreateTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='creator')
+        self.car = Car.objects.create(user=self.user, make='Chevrolet', model='Nexia', plate_number='01 B 777 AA')
+        self.zone = ParkingZone.objects.create(name='Create', location='-', total_spots=5, available_spots=5)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self, **fields):
+        return self.client.post('/api/bookings/', {'car': self.car.pk, 'parking_zone': self.zone.pk, **fields},
+                                format='json')
+
+    def test_start_time_accepts_iso_8601(self):
+        for start_time in ('2030-01-01T10:00:00Z', '2030-01-02T10:00:00.250Z', '2030-01-03T15:00:00+05:00'):
+            with self.subTest(start_time=start_time):
+                self.assertEqual(self.post(start_time=start_time).status_code, 201)
+        booking = Booking.objects.get(start_time__date='2030-01-01')
+        self.assertEqual(booking.end_time - booking.start_time, timedelta(hours=1))
+
+    def test_bad_start_time_is_400(self):
+        for fields in ({}, {'start_time': 'tomorrow'}, {'start_time': None}):
+            with self.subTest(fields=fields):
+                response = self.post(**fields)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('start_time', response.data)
+
+
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        caches[settings.IDEMPOTENCY_CACHE].clear()
+        self.user = User.objects.create_user(username=f'retry-{timezone.now().timestamp()}')
+        self.car = Car.objects.create(user=self.user, make='Chevrolet', model='Gentra', plate_number='01 C 555 DD')
+        self.zone = ParkingZone.objects.create(name='Retry', location='-', total_spots=5, available_spots=5)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self, key, start_time='2030-01-01T10:00:00Z'):
+        return self.client.post('/api/bookings/', {'car': self.car.pk, 'parking_zone': self.zone.pk,
+                                                   'start_time': start_time},
+                                format='json', headers={'Idempotency-Key': key})
+
+    @override_settings(THROTTLE_BUCKETS={'bookings': (0.001, 1)})
+    def test_retry_replays_stored_response_without_throttle_token(self):
+        first = self.post('once')
+        self.assertEqual(first.status_code, 201)
+        # Bucket bo'sh: yangi so'rov 429 oladi, takror esa saqlangan javobni
+        retry = self.post('once')
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(self.post('other').status_code, 429)
+        self.assertEqual(Booking.objects.filter(user=self.user).count(), 1)
+
+    def test_key_reused_with_other_payload_is_422(self):
+        self.assertEqual(self.post('same').status_code, 201)
+        self.assertEqual(self.post('same', start_time='2030-01-02T10:00:00Z').status_code, 422)
+
+    @override_settings(IDEMPOTENCY_WAIT=0.1)
+    def test_key_in_progress_is_409(self):
+        cache_key = f'idempotency:BookingViewSet:user:{self.user.pk}:busy'
+        caches[settings.IDEMPOTENCY_CACHE].add(f'{cache_key}:lock', 'original', timeout=30)
+        # Kutayotgan takror admission slotini egallamaydi
+        with mock.patch.object(LoadShedder, 'admit') as admit:
+            self.assertEqual(self.post('busy').status_code, 409)
+        admit.assert_not_called()
+        self.assertFalse(Booking.objects.filter(user=self.user).exists())
+
+
+class FailingSmsBackend:
+    def send(self, phone_number, body):
+        raise ConnectionError("provider unavailable")
+
+
+@override_settings(SMS_BACKEND='models.sms.LocMemBackend', SMS_MAX_ATTEMPTS=3, SMS_RETRY_BASE_DELAY=30)
+class SmsOutboxTests(TestCase):
+    def setUp(self):
+        LocMemBackend.outbox.clear()
+
+    def test_register_queues_sms_for_the_worker(self):
+        response = APIClient().post('/auth/register/', {
+            'username': 'newdriver', 'password': 'secret-pass', 'email': 'new@example.com',
+            'phone_number': '+998901234567',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        message = SmsMessage.objects.get()
+        self.assertEqual((message.phone_number, message.status), ('+998901234567', SmsMessage.STATUS_PENDING))
+        self.assertEqual(LocMemBackend.outbox, [])
+
+        call_command('send_sms_outbox', stdout=StringIO())
+        call_command('send_sms_outbox', stdout=StringIO())
+        self.assertEqual(len(LocMemBackend.outbox), 1)
+        self.assertIn('verification code', LocMemBackend.outbox[0][1])
+        self.assertEqual(SmsMessage.objects.get().status, SmsMessage.STATUS_SENT)
+
+    def test_failures_back_off_and_give_up(self):
+        message = queue_sms('+998900000000', 'code')
+        backend = FailingSmsBackend()
+        for attempt in range(1, 4):
+            began = timezone.now()
+            self.assertEqual(send_batch(backend, 10, settings.SMS_MAX_ATTEMPTS), (0, 1))
+            message.refresh_from_db()
+            self.assertEqual(message.attempts, attempt)
+            if attempt < 3:
+                self.assertEqual(message.status, SmsMessage.STATUS_PENDING)
+                self.assertGreaterEqual(message.next_attempt_at, began + retry_delay(attempt))
+                # Kechikish tugamaguncha qayta urinilmaydi
+                self.assertEqual(send_batch(backend, 10, settings.SMS_MAX_ATTEMPTS), (0, 0))
+                SmsMessage.objects.filter(pk=message.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(message.status, SmsMessage.STATUS_FAILED)
+        self.assertIn('provider unavailable', message.last_error)
+        self.assertEqual(retry_delay(2) - retry_delay(1), retry_delay(1))
+
+    def test_leased_message_is_not_sent_twice(self):
+        queue_sms('+998900000001', 'code')
+        # Boshqa worker batch ni ijaraga oldi, lekin hali yubormadi
+        self.assertEqual(len(claim_batch(10)), 1)
+        self.assertEqual(send_batch(LocMemBackend(), 10, settings.SMS_MAX_ATTEMPTS), (0, 0))
+        self.assertEqual(LocMemBackend.outbox, [])
+        lease = SmsMessage.objects.get().next_attempt_at - timezone.now()
+        self.assertGreater(lease.total_seconds(), settings.SMS_SEND_TIMEOUT)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='pager')
+        car = Car.objects.create(user=user, make='Kia', model='K5', plate_number='01 K 505 KA')
+        zone = ParkingZone.objects.create(name='Pages', location='-', total_spots=100, available_spots=100)
+        start = timezone.now().replace(microsecond=0) + timedelta(days=1)
+        # Bir xil start_time li bronlar: tartib id bo'yicha davom etadi
+        self.bookings = Booking.objects.bulk_create(
+            Booking(user=user, car=car, parking_zone=zone, start_time=start + timedelta(hours=i // 4),
+                    end_time=start + timedelta(hours=i // 4 + 1))
+            for i in range(11)
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def test_pages_cover_ties_without_duplicates_or_gaps(self):
+        seen, url = [], '/api/bookings/?page_size=3'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), 3)
+            seen += [booking['id'] for booking in response.data['results']]
+            url = response.data['next']
+        expected = sorted(self.bookings, key=lambda booking: (booking.start_time, booking.id))
+        self.assertEqual(seen, [booking.id for booking in expected])
+
+    def test_malformed_cursor_is_404(self):
+        def encode(value):
+            return urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+        for cursor in ('%%%', 'bm90IGpzb24', encode({'id': 1}), encode([1]), encode(['not a date', 1])):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.client.get('/api/bookings/', {'cursor': cursor}).status_code, 404)
+
+
+class NearbyZoneTests(TestCase):
+    def setUp(self):
+        rng = random.Random(7)
+        self.zones = [
+            ParkingZone.objects.create(name=f'Geo {i}', location='-', total_spots=5, available_spots=5,
+                                       latitude=41.31 + rng.uniform(-0.2, 0.2), longitude=69.28 + rng.uniform(-0.2, 0.2))
+            for i in range(60)
+        ]
+
+    def test_matches_brute_force(self):
+        for latitude, longitude in ((41.31, 69.28), (41.5, 69.0), (41.105, 69.4999), (41.3, 70.0)):
+            with self.subTest(latitude=latitude, longitude=longitude):
+                found = nearest_zones(ParkingZone.objects.all(), latitude, longitude, 5)
+                expected = sorted(self.zones, key=lambda zone: haversine_km(latitude, longitude,
+                                                                             zone.latitude, zone.longitude))[:5]
+                self.assertEqual([zone.pk for _, zone in found], [zone.pk for zone in expected])
+                self.assertEqual([distance for distance, _ in found], sorted(distance for distance, _ in found))
+
+    def test_endpoint_skips_full_zones_and_validates(self):
+        closest = nearest_zones(ParkingZone.objects.all(), 41.31, 69.28, 1)[0][1]
+        ParkingZone.objects.filter(pk=closest.pk).update(available_spots=0)
+        client = APIClient()
+        response = client.get('/api/parking-zones/nearby/', {'lat': 41.31, 'lon': 69.28, 'k': 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 3)
+        self.assertNotIn(closest.pk, [zone['id'] for zone in response.data])
+        self.assertIn('distance_km', response.data[0])
+        for params in ({'lat': 41.31}, {'lat': 'north', 'lon': 69}, {'lat': 91, 'lon': 0},
+                       {'lat': 41.31, 'lon': 69.28, 'k': 0}):
+            with self.subTest(params=params):
+                self.assertEqual(client.get('/api/parking-zones/nearby/', params).status_code, 400)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='exporter')
+        car = Car.objects.create(user=user, make='BYD', model='Chazor', plate_number='01 E 100 XP')
+        zone = ParkingZone.objects.create(name='Export, "quoted"', location='-', total_spots=5, available_spots=5)
+        self.start = timezone.now().replace(microsecond=0) + timedelta(days=1)
+        self.bookings = Booking.objects.bulk_create(
+            Booking(user=user, car=car, parking_zone=zone, start_time=self.start + timedelta(hours=i),
+                    end_time=self.start + timedelta(hours=i + 1), penalty=50.0 if i == 1 else 0)
+            for i in range(3)
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='auditor', is_staff=True))
+
+    def export(self, **params):
+        response = self.client.get('/api/bookings/export/', params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_and_ndjson_rows(self):
+        rows = list(csv.reader(StringIO(self.export())))
+        self.assertEqual(rows[0], [name for name, _ in EXPORT_COLUMNS])
+        self.assertEqual([int(row[0]) for row in rows[1:]], [booking.pk for booking in self.bookings])
+        self.assertEqual(rows[1][1:4], ['exporter', '01 E 100 XP', 'Export, "quoted"'])
+
+        lines = self.export(export_format='ndjson', penalties_only='true').splitlines()
+        self.assertEqual([json.loads(line)['id'] for line in lines], [self.bookings[1].pk])
+        self.assertEqual(json.loads(lines[0])['penalty'], 50.0)
+
+    def test_window_and_bad_params(self):
+        window = {'from': (self.start + timedelta(hours=1)).isoformat(), 'to': (self.start + timedelta(hours=2)).isoformat()}
+        rows = list(csv.reader(StringIO(self.export(**window))))
+        self.assertEqual([int(row[0]) for row in rows[1:]], [self.bookings[1].pk])
+        for params in ({'export_format': 'xml'}, {'from': 'yesterday'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get('/api/bookings/export/', params).status_code, 400)
+
+    def test_command_writes_file_and_rejects_bad_dates(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bookings.ndjson')
+            call_command('export_bookings', '--format', 'ndjson', '--output', path)
+            with open(path) as output:
+                self.assertEqual([json.loads(line)['id'] for line in output], [booking.pk for booking in self.bookings])
+        for value in ('yesterday', '2030-13-01T00:00:00'):
+            with self.subTest(value=value), self.assertRaises(CommandError):
+                call_command('export_bookings', '--from', value)
+
+
+class CrashingView(AdmissionControlMixin, APIView):
+    throttle_scope = 'crash-test'
+
+    def get(self, request):
+        raise RuntimeError("boom")
+
+
+class AdmissionControlTests(TestCase):
+    def test_crashed_request_releases_its_slot(self):
+        request = APIRequestFactory().get('/crash/')
+        for _ in range(3):
+            with self.assertRaises(RuntimeError):
+                CrashingView.as_view()(request)
+        self.assertEqual(get_shedder('crash-test').in_flight, 0)
+
+
+class MetricsAccessTests(TestCase):
+    @override_settings(DEBUG=False, METRICS_TOKEN='')
+    def test_metrics_without_token_need_staff(self):
+        client = APIClient()
+        self.assertEqual(client.get('/metrics/').status_code, 403)
+        client.force_login(User.objects.create_user(username='driver'))
+        self.assertEqual(client.get('/metrics/').status_code, 403)
+        client.force_login(User.objects.create_user(username='ops', is_staff=True))
+        self.assertEqual(client.get('/metrics/').status_code, 200)
+
+    @override_settings(DEBUG=False, METRICS_TOKEN='scrape-secret')
+    def test_metrics_token(self):
+        client = APIClient()
+        self.assertEqual(client.get('/metrics/').status_code, 403)
+        self.assertEqual(client.get('/metrics/', headers={'Authorization': 'Bearer scrape-secret'}).status_code, 200)
+
+
+class AdminSearchTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='admin', password='-')
+        driver = User.objects.create_user(username='user123')
+        car = Car.objects.create(user=driver, make='Chevrolet', model='Spark', plate_number='01 A 123 BC')
+        zone = ParkingZone.objects.create(name='Zone 5', location='-', total_spots=5, available_spots=5)
+        now = timezone.now()
+        Booking.objects.create(user=driver, car=car, parking_zone=zone,
+                               start_time=now, end_time=now + timedelta(hours=1))
+        self.client.force_login(self.admin)
+
+    def search(self, model, term):
+        response = self.client.get(f'/admin/models/{model}/', {'q': term})
+        self.assertEqual(response.status_code, 200)
+        return list(response.context['cl'].queryset)
+
+    def test_plate_and_text_terms(self):
+        for term in ('user123', 'Zone 5', '01a-123', '01 A 123 BC', '01A123BC'):
+            with self.subTest(term=term):
+                self.assertEqual(len(self.search('booking', term)), 1)
+        self.assertEqual(len(self.search('car', '01a-123')), 1)
+        self.assertEqual(len(self.search('car', 'spark')), 1)
+        self.assertEqual(self.search('booking', '01A124'), [])
+
+    def test_plate_shaped_term_still_searches_text_fields(self):
+        driver = User.objects.create_user(username='kia-driver')
+        car = Car.objects.create(user=driver, make='Kia', model='K5', plate_number='12 345 AAA')
+        zone = ParkingZone.objects.create(name='Block 12345', location='-', total_spots=5, available_spots=5)
+        now = timezone.now()
+        by_plate = Booking.objects.create(user=driver, car=car, parking_zone=ParkingZone.objects.get(name='Zone 5'),
+                                          start_time=now, end_time=now + timedelta(hours=1))
+        by_zone = Booking.objects.create(user=User.objects.get(username='user123'), car=Car.objects.get(model='Spark'),
+                                         parking_zone=zone, start_time=now, end_time=now + timedelta(hours=1))
+        self.assertCountEqual(self.search('booking', '12345'), [by_plate, by_zone])
+        self.assertEqual(self.search('car', '12345'), [car])
+
+
+class LargeTableAdminTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='archive')
+        car = Car.objects.create(user=user, make='Daewoo', model='Tico', plate_number='01 T 001 AA')
+        self.zone = ParkingZone.objects.create(name='Archive', location='-', total_spots=5, available_spots=5)
+        tz = timezone.get_current_timezone()
+        for year, month in ((2001, 3), (2001, 11), (2090, 6)):
+            start = timezone.make_aware(datetime(year, month, 15, 9), tz)
+            Booking.objects.create(user=user, car=car, parking_zone=self.zone,
+                                   start_time=start, end_time=start + timedelta(hours=1))
+        self.client.force_login(User.objects.create_superuser(username='admin', password='-'))
+
+    def test_datetimes_probe_only_periods_with_rows(self):
+        queryset = IndexedDatetimesQuerySet(model=Booking)
+        with CaptureQueriesContext(connection) as queries:
+            years = queryset.datetimes('start_time', 'year')
+        # Bo'sh 88 yil tekshirilmaydi: har bir yil uchun bitta so'rov va oxirgi bo'sh qidiruv
+        self.assertEqual(len(queries), 3)
+        self.assertEqual([value.year for value in years], [2001, 2090])
+        months = queryset.filter(start_time__year=2001).datetimes('start_time', 'month', order='DESC')
+        self.assertEqual([value.month for value in months], [11, 3])
+        self.assertEqual(self.client.get('/admin/models/booking/', {'start_time__year': 2001}).status_code, 200)
+
+    def test_zone_autocomplete_is_ordered(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', UnorderedObjectListWarning)
+            response = self.client.get('/admin/autocomplete/', {
+                'app_label': 'models', 'model_name': 'booking', 'field_name': 'parking_zone', 'term': 'Arch',
+            })
+        self.assertEqual([result['text'] for result in response.json()['results']], ['Archive'])
+
+
+class PlateLookupTests(TestCase):
+    def setUp(self):
+        driver = User.objects.create_user(username='driver')
+        car = Car.objects.create(user=driver, make='Chevrolet', model='Nexia', plate_number='01 A 123 BC')
+        self.zone = ParkingZone.objects.create(name='Lookup zone', location='-', total_spots=5, available_spots=5)
+        self.other_zone = ParkingZone.objects.create(name='Other zone', location='-', total_spots=5, available_spots=5)
+        now = timezone.now()
+        self.booking = Booking.objects.create(user=driver, car=car, parking_zone=self.zone,
+                                              start_time=now - timedelta(minutes=30), end_time=now + timedelta(hours=1))
+        # Tugagan bron faol hisoblanmaydi
+        Booking.objects.create(user=driver, car=car, parking_zone=self.other_zone,
+                               start_time=now - timedelta(hours=3), end_time=now - timedelta(hours=2))
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='inspector', is_staff=True))
+
+    def test_mixed_format_plate_finds_active_booking(self):
+        response = self.client.get('/api/enforcement/plates/01 a-123 bc/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['plate'], '01A123BC')
+        self.assertTrue(response.data['active'])
+        self.assertEqual(response.data['booking']['id'], self.booking.pk)
+        self.assertEqual(response.data['booking']['parking_zone_name'], 'Lookup zone')
+
+        response = self.client.get('/api/enforcement/plates/01a123bc/', {'zone': self.other_zone.pk})
+        self.assertEqual(response.data, {'plate': '01A123BC', 'active': False, 'booking': None})
+        self.assertEqual(self.client.get('/api/enforcement/plates/01A123BC/', {'zone': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/enforcement/plates/ - /').status_code, 400)
+
+    def test_batch_keeps_request_order(self):
+        response = self.client.post('/api/enforcement/plates/', {'plates': ['10 B 777 AA', '01-a-123-bc']}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(item['plate'], item['active']) for item in response.data['results']],
+                         [('10B777AA', False), ('01A123BC', True)])
+        response = self.client.post('/api/enforcement/plates/', {'plates': '01A123BC'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_drivers_cannot_look_up_plates(self):
+        self.client.force_authenticate(User.objects.get(username='driver'))
+        self.assertEqual(self.client.get('/api/enforcement/plates/01A123BC/').status_code, 403)
+
+
+class ReplicaRouterTests(TestCase):
+    def test_auth_and_sessions_stay_on_primary(self):
+        router = ReplicaRouter()
+        # replica_reads() faqat alias sozlanganini tekshiradi, ulanish ochilmaydi
+        with mock.patch.dict(settings.DATABASES, {REPLICA_ALIAS: settings.DATABASES['default']}), replica_reads():
+            self.assertEqual(router.db_for_read(Booking), REPLICA_ALIAS)
+            for model in (User, Session, ContentType):
+                self.assertEqual(router.db_for_read(model), 'default')
+        self.assertIsNone(router.db_for_read(Booking))
+
+
+class QueryBudgetTests(TestCase):
+    """List/detail endpoints run the same number of queries for small and large data sets."""
+    sizes = (5, 50)
+
+    def setUp(self):
+        cache.clear()
+
+    def seed(self, rows):
+        now = timezone.now()
+        user = User.objects.create_user(username=f'budget-{rows}')
+        zones = ParkingZone.objects.bulk_create(
+            ParkingZone(name=f'Budget zone {i}', location='-', total_spots=rows, available_spots=rows)
+            for i in range(rows)
+        )
+        cars = Car.objects.bulk_create(
+            Car(user=user, make='Budget', model='Check', plate_number=f'B{i}') for i in range(rows)
+        )
+        bookings = Booking.objects.bulk_create(
+            Booking(user=user, car=cars[i], parking_zone=zones[i], start_time=now, end_time=now + timedelta(hours=1))
+            for i in range(rows)
+        )
+        return user, cars[0], zones[0], bookings[0]
+
+    def assertBudget(self, budget, url, client, params=None):
+        with self.assertNumQueries(budget):
+            response = client.get(url, params or {})
+        self.assertEqual(response.status_code, 200, url)
+
+    def test_endpoints_within_budget(self):
+        for rows in self.sizes:
+            with self.subTest(rows=rows):
+                # Zona javoblari ETag keshida: har o'lchamda haqiqiy so'rovlar sanalishi uchun tozalanadi
+                cache.clear()
+                user, car, zone, booking = self.seed(rows)
+                client = APIClient()
+                client.force_authenticate(user)
+                now = timezone.now()
+                window = {'from': now.isoformat(), 'to': (now + timedelta(hours=2)).isoformat()}
+
+                self.assertBudget(1, '/api/bookings/', client)
+                self.assertBudget(1, f'/api/bookings/{booking.pk}/', client)
+                self.assertBudget(1, '/api/cars/', client)
+                self.assertBudget(1, f'/api/cars/{car.pk}/', client)
+                self.assertBudget(1, '/api/parking-zones/', client)
+                self.assertBudget(1, f'/api/parking-zones/{zone.pk}/', client)
+                self.assertBudget(2, f'/api/parking-zones/{zone.pk}/availability/', client, window)
+
+                queryset = Booking.objects.with_related().filter(user=user)
+                with self.assertNumQueries(1):
+                    BookingReadSerializer(queryset, many=True).data
+                with self.assertNumQueries(1):
+                    [str(booking) for booking in queryset.all()]
+
+    def test_cached_zone_list_skips_database(self):
+        self.seed(5)
+        client = APIClient()
+        response = client.get('/api/parking-zones/')
+        with self.assertNumQueries(0):
+            cached = client.get('/api/parking-zones/', headers={'If-None-Match': response['ETag']})
+        self.assertEqual(cached.status_code, 304)
+
+    def test_zone_write_changes_etag(self):
+        user, car, zone, booking = self.seed(5)
+        user.is_staff = True
+        user.save()
+        client = APIClient()
+        client.force_authenticate(user)
+        etag = client.get(f'/api/parking-zones/{zone.pk}/')['ETag']
+
+        # Versiya on_commit da oshiriladi
+        with self.captureOnCommitCallbacks(execute=True):
+            client.patch(f'/api/parking-zones/{zone.pk}/', {'name': 'Renamed'}, format='json')
+
+        response = client.get(f'/api/parking-zones/{zone.pk}/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['name'], 'Renamed')
+
+
+class AsyncReadTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.zones = [
+            ParkingZone.objects.create(name=f'Async {i}', location='-', total_spots=5, available_spots=5)
+            for i in range(2)
+        ]
+        self.user = User.objects.create_user(username='async-driver')
+        self.client = APIClient()
+
+    def test_zone_list_and_detail_match_sync_views(self):
+        for path in ('/api/parking-zones/', f'/api/parking-zones/{self.zones[0].pk}/'):
+            with self.subTest(path=path):
+                response = self.client.get(path.replace('/api/', '/api/async/'))
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json(), self.client.get(path).json())
+
+    def test_missing_zone_and_writes(self):
+        response = self.client.get('/api/async/parking-zones/999999/')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'detail': 'No ParkingZone matches the given query.'})
+        self.assertEqual(self.client.post('/api/async/parking-zones/').status_code, 405)
+
+    def test_my_bookings_requires_login(self):
+        self.assertEqual(self.client.get('/api/async/bookings/mine/').status_code, 401)
+        self.client.force_authenticate(self.user)
+        response = self.client.get('/api/async/bookings/mine/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [])
+
+
+class ChangeFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_changes_since_sequence(self):
+        client = APIClient()
+        user = User.objects.create_user(username='feed-driver')
+        car = Car.objects.create(user=user, make='Chevrolet', model='Cobalt', plate_number='01 F 100 EE')
+        busy, quiet = (ParkingZone.objects.create(name=f'Feed {i}', location='-', total_spots=5, available_spots=5)
+                       for i in range(2))
+        sequence = client.get('/api/async/parking-zones/changes/').json()['sequence']
+        now = timezone.now()
+        with self.captureOnCommitCallbacks(execute=True):
+            for zone in (busy, busy, quiet):
+                create_booking(user=user, car=car, parking_zone=zone,
+                               start_time=now + timedelta(hours=1), end_time=now + timedelta(hours=2))
+
+        body = client.get('/api/async/parking-zones/changes/', {'since': sequence}).json()
+        self.assertFalse(body['reset'])
+        self.assertGreater(body['sequence'], sequence)
+        # Zona bir necha marta o'zgarsa ham faqat oxirgi holati keladi
+        self.assertEqual([(change['parking_zone'], change['available_spots']) for change in body['changes']],
+                         [(busy.pk, 3), (quiet.pk, 4)])
+
+        response = client.get('/api/async/parking-zones/changes/', {'since': body['sequence']})
+        self.assertEqual(response.json(), {'sequence': body['sequence'], 'reset': False, 'changes': []})
+        quiet_pk = quiet.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            quiet.delete()
+        changes = client.get('/api/async/parking-zones/changes/', {'since': body['sequence']}).json()['changes']
+        self.assertEqual([(change['parking_zone'], change.get('deleted')) for change in changes], [(quiet_pk, True)])
+
+    def test_sequence_from_the_future_is_a_reset(self):
+        response = APIClient().get('/api/async/parking-zones/changes/', {'since': 10 ** 6})
+        self.assertEqual(response.json(), {'sequence': 0, 'reset': True, 'changes': []})
+
+    def test_wait_must_be_finite(self):
+        client = APIClient()
+        sequence = client.get('/api/async/parking-zones/changes/').json()['sequence']
+        for wait in ('nan', 'inf', '-inf', 'soon'):
+            with self.subTest(wait=wait):
+                response = client.get('/api/async/parking-zones/changes/', {'since': sequence, 'wait': wait})
+                self.assertEqual(response.status_code, 400)
+        # Manfiy kutish 0 ga tenglashtiriladi: javob darhol qaytadi
+        response = client.get('/api/async/parking-zones/changes/', {'since': sequence, 'wait': -5})
+        self.assertEqual(response.json(), {'sequence': sequence, 'reset': False, 'changes': []})
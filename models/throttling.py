@@ -0,0 +1,151 @@
+"""
+Admission control for expensive write endpoints: per-client token buckets plus
+per-worker load shedding. Both answer 429 with Retry-After through DRF's Throttled.
+"""
+import math
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import Throttled
+from rest_framework.throttling import BaseThrottle
+
+
+def refill(state, now, rate, burst):
+    """Takes one token from a (tokens, updated_at) bucket; returns (new_state, wait_seconds)."""
+    tokens, updated_at = state if state is not None else (burst, now)
+    tokens = min(burst, tokens + max(now - updated_at, 0) * rate)
+    if tokens >= 1:
+        return (tokens - 1, now), 0
+    return (tokens, now), (1 - tokens) / rate
+
+
+class LocMemBucketStore:
+    """Exact, per-process buckets (tests, single worker)."""
+    max_buckets = 10_000
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = {}
+
+    def take(self, key, rate, burst):
+        now = time.monotonic()
+        with self.lock:
+            if len(self.buckets) >= self.max_buckets:
+                # To'lib qolgan bucketlar yangi bucket bilan bir xil, ularni saqlash shart emas
+                self.buckets = {
+                    k: (tokens, updated_at) for k, (tokens, updated_at) in self.buckets.items()
+                    if tokens + (now - updated_at) * rate < burst
+                }
+            self.buckets[key], wait = refill(self.buckets.get(key), now, rate, burst)
+        return wait
+
+
+class CacheBucketStore:
+    """
+    Buckets shared between workers through the Django cache. Read-modify-write is not
+    atomic, so concurrent workers may let a few extra requests through at the edge.
+    """
+
+    def take(self, key, rate, burst):
+        state, wait = refill(cache.get(key), time.time(), rate, burst)
+        # Bucket shu vaqtdan keyin to'la bo'ladi: kalit o'chsa ham natija o'zgarmaydi
+        cache.set(key, state, timeout=math.ceil(burst / rate) + 1)
+        return wait
+
+
+@lru_cache(maxsize=None)
+def get_bucket_store():
+    return import_string(settings.THROTTLE_STORE)()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Token bucket per (view.throttle_scope, user or IP); scopes are set in THROTTLE_BUCKETS."""
+
+    def allow_request(self, request, view):
+        bucket = settings.THROTTLE_BUCKETS.get(getattr(view, 'throttle_scope', None))
+        if bucket is None:
+            return True
+        rate, burst = bucket
+        user = request.user
+        ident = f'user:{user.pk}' if user and user.is_authenticated else f'ip:{self.get_ident(request)}'
+        self.retry_after = get_bucket_store().take(f'throttle:{view.throttle_scope}:{ident}', rate, burst)
+        return not self.retry_after
+
+    def wait(self):
+        return self.retry_after
+
+
+class LoadShedder:
+    """
+    Per-worker in-flight count and latency EWMA of one scope. New requests are refused
+    while too many are in flight or recent ones were too slow; with nothing in flight
+    one request is always let through so the EWMA can recover.
+    """
+    smoothing = 0.2
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.latency = 0.0
+
+    def admit(self):
+        with self.lock:
+            overloaded = self.in_flight >= settings.LOAD_SHED_MAX_IN_FLIGHT or (
+                self.in_flight and self.latency > settings.LOAD_SHED_LATENCY
+            )
+            if overloaded:
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self, latency):
+        with self.lock:
+            self.in_flight -= 1
+            self.latency += self.smoothing * (latency - self.latency)
+
+
+@lru_cache(maxsize=None)
+def get_shedder(scope):
+    return LoadShedder()
+
+
+class AdmissionControlMixin:
+    """
+    Throttles and sheds load for throttle_scope; throttled_actions limits it to some
+    viewset actions (None means every request of the view).
+    """
+    throttle_scope = None
+    throttled_actions = None
+    throttle_classes = [TokenBucketThrottle]
+
+    def is_admission_controlled(self):
+        return self.throttled_actions is None or getattr(self, 'action', None) in self.throttled_actions
+
+    def get_throttles(self):
+        return super().get_throttles() if self.is_admission_controlled() else []
+
+    def initial(self, request, *args, **kwargs):
+        self.admitted_at = None
+        super().initial(request, *args, **kwargs)
+        if self.is_admission_controlled():
+            if not get_shedder(self.throttle_scope).admit():
+                raise Throttled(wait=settings.LOAD_SHED_RETRY_AFTER, detail="Server is busy, retry later.")
+            self.admitted_at = time.perf_counter()
+
+    def raise_uncaught_exception(self, exc):
+        # View yiqildi: finalize_response chaqirilmaydi, o'rin shu yerda bo'shatiladi
+        self.release_admission()
+        super().raise_uncaught_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        self.release_admission()
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    def release_admission(self):
+        if getattr(self, 'admitted_at', None) is not None:
+            get_shedder(self.throttle_scope).release(time.perf_counter() - self.admitted_at)
+            self.admitted_at = None
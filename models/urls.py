@@ -3,12 +3,17 @@ from .views import (
     CarViewSet,
     ParkingZoneViewSet,
     BookingViewSet,
+    PlateLookupViewSet,
     RegisterView,
     LoginView,
     LogoutView,
     ChangePasswordView,
     ResetPasswordView
 )
+from . import async_views
+from .authentication import ClaimsTokenRefreshSerializer
+from .metrics import metrics_view
+from rest_framework_simplejwt.views import TokenRefreshView
 
 urlpatterns = [
 
@@ -29,6 +34,10 @@ urlpatterns = [
         'post': 'create'
     }), name='parkingzone-list'),
 
+    path('api/parking-zones/nearby/', ParkingZoneViewSet.as_view({
+        'get': 'nearby'
+    }), name='parkingzone-nearby'),
+
     path('api/parking-zones/<int:pk>/', ParkingZoneViewSet.as_view({
         'get': 'retrieve',
         'put': 'update',
@@ -36,11 +45,27 @@ urlpatterns = [
         'delete': 'destroy'
     }), name='parkingzone-detail'),
 
+    path('api/parking-zones/<int:pk>/availability/', ParkingZoneViewSet.as_view({
+        'get': 'availability'
+    }), name='parkingzone-availability'),
+
+    path('api/parking-zones/<int:pk>/occupancy/', ParkingZoneViewSet.as_view({
+        'get': 'occupancy'
+    }), name='parkingzone-occupancy'),
+
     path('api/bookings/', BookingViewSet.as_view({
         'get': 'list',
         'post': 'create'
     }), name='booking-list'),
 
+    path('api/bookings/bulk/', BookingViewSet.as_view({
+        'post': 'bulk_create'
+    }), name='booking-bulk'),
+
+    path('api/bookings/export/', BookingViewSet.as_view({
+        'get': 'export'
+    }), name='booking-export'),
+
     path('api/bookings/<int:pk>/', BookingViewSet.as_view({
         'get': 'retrieve',
         'put': 'update',
@@ -48,9 +73,31 @@ urlpatterns = [
         'delete': 'destroy'
     }), name='booking-detail'),
 
+    # Inspektorlar: davlat raqami bo'yicha faol bron (kameralar uchun batch)
+    path('api/enforcement/plates/', PlateLookupViewSet.as_view({
+        'post': 'batch'
+    }), name='plate-batch'),
+
+    path('api/enforcement/plates/<str:plate>/', PlateLookupViewSet.as_view({
+        'get': 'lookup'
+    }), name='plate-lookup'),
+
+    # ASGI uchun native async read endpointlar
+    path('api/async/parking-zones/', async_views.zone_list, name='async-parkingzone-list'),
+    path('api/async/parking-zones/<int:pk>/', async_views.zone_detail, name='async-parkingzone-detail'),
+    path('api/async/parking-zones/<int:pk>/availability/', async_views.zone_availability,
+         name='async-parkingzone-availability'),
+    path('api/async/parking-zones/changes/', async_views.zone_changes, name='async-parkingzone-changes'),
+    path('api/async/parking-zones/stream/', async_views.zone_stream, name='async-parkingzone-stream'),
+    path('api/async/bookings/mine/', async_views.my_bookings, name='async-booking-mine'),
+
     path('auth/register/', RegisterView.as_view(), name='register'),
     path('auth/login/', LoginView.as_view(), name='login'),
+    path('auth/token/refresh/', TokenRefreshView.as_view(serializer_class=ClaimsTokenRefreshSerializer),
+         name='token-refresh'),
     path('auth/logout/', LogoutView.as_view(), name='logout'),
     path('auth/change-password/', ChangePasswordView.as_view(), name='change-password'),
     path('auth/reset-password/', ResetPasswordView.as_view(), name='reset-password'),
+
+    path('metrics/', metrics_view, name='metrics'),
 ]
\ No newline at end of file
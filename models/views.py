@@ -1,11 +1,81 @@
-from rest_framework import viewsets, status
+from rest_framework import serializers, viewsets, status
+from rest_framework.fields import empty
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny
-from .models import Car, ParkingZone, Booking
-from .serializers import CarSerializer, ParkingZoneSerializer, BookingSerializer
-from datetime import datetime
+from rest_framework.permissions import AllowAny, IsAdminUser
+from .models import Car, ParkingZone, Booking, OccupancyRollup, normalize_plate
+from .rollups import PERIODS, bucket_floor
+from .serializers import (CarSerializer, ParkingZoneSerializer, BookingSerializer, BookingBulkItemSerializer,
+                          ActivePlateBookingSerializer)
+from .reservations import create_bookings, delete_booking
+from .caching import ZONE_LIST_VERSION_KEY, get_version, zone_version_key
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import parse_etags
+from .pagination import BookingPagination
+from .routers import ReplicaReadMixin
+from .throttling import AdmissionControlMixin
+from .idempotency import IdempotencyMixin
+from django.contrib.auth.models import User
+from .availability import peak_occupancy
+from .geo import nearest_zones
+from .exports import EXPORT_FORMATS, export_queryset, iter_export
+from django.http import StreamingHttpResponse
+from datetime import timedelta
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import is_naive, make_aware
+
+def parse_window(request, required=True):
+    """Reads ISO 8601 'from'/'to' query params; raises ValueError with a client-facing message."""
+    bounds = []
+    for param in ('from', 'to'):
+        value = request.query_params.get(param)
+        if value is None and not required:
+            bounds.append(None)
+            continue
+        parsed = parse_datetime(value or '')
+        if parsed is None:
+            raise ValueError(f"'{param}' must be an ISO 8601 datetime")
+        bounds.append(make_aware(parsed) if is_naive(parsed) else parsed)
+    start, end = bounds
+    if start is not None and end is not None and start >= end:
+        raise ValueError("'to' must be after 'from'")
+    return start, end
+
+
+def parse_zone(value):
+    """Optional parking zone id from a query param or body; raises ValueError with a client-facing message."""
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError("'zone' must be an integer") from None
+
+
+def cached_response(request, version_key, render):
+    """
+    Serves a GET from the cache while version_key is unchanged.
+    If-None-Match with the current ETag gets a 304 without touching the database.
+    """
+    etag = f'"{get_version(version_key)}"'
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match and (etag in parse_etags(if_none_match) or if_none_match.strip() == '*'):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+    cache_key = f'response:{request.build_absolute_uri()}:{etag}'
+    data = cache.get(cache_key)
+    if data is None:
+        response = render()
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        cache.set(cache_key, response.data, settings.ZONE_CACHE_TIMEOUT)
+    else:
+        response = Response(data)
+    response['ETag'] = etag
+    return response
 
-class CarViewSet(viewsets.ModelViewSet):
+
+class CarViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = Car.objects.all()
     serializer_class = CarSerializer
     permission_classes = [AllowAny]
@@ -13,33 +83,259 @@ class CarViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
-class ParkingZoneViewSet(viewsets.ModelViewSet):
+class ParkingZoneViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = ParkingZone.objects.all()
     serializer_class = ParkingZoneSerializer
+    # list/retrieve versiyalangan keshga yoziladi: replica kechikkan bo'lsa eski ma'lumot yangi versiya ostida keshlanib qolardi
+    replica_actions = {'nearby', 'availability', 'occupancy'}
 
-class BookingViewSet(viewsets.ModelViewSet):
-    queryset = Booking.objects.all()
+    def list(self, request, *args, **kwargs):
+        return cached_response(request, ZONE_LIST_VERSION_KEY,
+                               lambda: super(ParkingZoneViewSet, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return cached_response(request, zone_version_key(kwargs['pk']),
+                               lambda: super(ParkingZoneViewSet, self).retrieve(request, *args, **kwargs))
+
+    def nearby(self, request, *args, **kwargs):
+        try:
+            latitude = float(request.query_params['lat'])
+            longitude = float(request.query_params['lon'])
+            k = int(request.query_params.get('k', 5))
+        except (KeyError, ValueError):
+            return Response({'error': "'lat' and 'lon' are required numbers, 'k' an integer"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            return Response({'error': 'Coordinates out of range'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= k <= settings.ZONE_NEARBY_MAX_K:
+            return Response({'error': f"'k' must be between 1 and {settings.ZONE_NEARBY_MAX_K}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.get_queryset().filter(spots_left__gt=0)
+        results = []
+        for distance, parking_zone in nearest_zones(queryset, latitude, longitude, k):
+            data = self.get_serializer(parking_zone).data
+            data['distance_km'] = round(distance, 3)
+            results.append(data)
+        return Response(results)
+
+    def availability(self, request, *args, **kwargs):
+        parking_zone = self.get_object()
+        try:
+            start, end = parse_window(request)
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        occupied = peak_occupancy(parking_zone, start, end)
+        return Response({
+            'parking_zone': parking_zone.id,
+            'from': start,
+            'to': end,
+            'total_spots': parking_zone.total_spots,
+            'occupied_spots': occupied,
+            'available_spots': max(parking_zone.total_spots - occupied, 0),
+        })
+
+    def occupancy(self, request, *args, **kwargs):
+        parking_zone = self.get_object()
+        period = request.query_params.get('period', OccupancyRollup.PERIOD_HOUR)
+        if period not in PERIODS:
+            return Response({'error': f"'period' must be one of: {', '.join(PERIODS)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            start, end = parse_window(request)
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        if (end - start) / PERIODS[period] > settings.OCCUPANCY_MAX_BUCKETS:
+            return Response({'error': f"At most {settings.OCCUPANCY_MAX_BUCKETS} {period} buckets per request"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        bucket_minutes = PERIODS[period].total_seconds() / 60
+        capacity_minutes = parking_zone.total_spots * bucket_minutes
+        rollups = OccupancyRollup.objects.filter(
+            parking_zone=parking_zone, period=period,
+            bucket_start__gte=bucket_floor(start, period), bucket_start__lt=end,
+        ).order_by('bucket_start')
+        return Response({
+            'parking_zone': parking_zone.id,
+            'period': period,
+            'results': [
+                {
+                    'bucket_start': rollup.bucket_start,
+                    'bookings': rollup.bookings,
+                    'occupied_minutes': round(rollup.occupied_minutes, 2),
+                    'occupancy': round(rollup.occupied_minutes / capacity_minutes, 4) if capacity_minutes else None,
+                    'penalty_total': rollup.penalty_total,
+                }
+                for rollup in rollups
+            ],
+        })
+
+class BookingViewSet(IdempotencyMixin, AdmissionControlMixin, ReplicaReadMixin, viewsets.ModelViewSet):
+    queryset = Booking.objects.with_related()
     serializer_class = BookingSerializer
     permission_classes = [AllowAny]
+    pagination_class = BookingPagination
+    bulk_max_items = 500
+    throttle_scope = 'bookings'
+    throttled_actions = {'create', 'bulk_create'}
+    idempotent_actions = {'create', 'update', 'partial_update'}
 
     def create(self, request, *args, **kwargs):
-        data = request.data
-        data['start_time'] = datetime.strptime(data['start_time'], '%Y-%m-%dT%H:%M:%S.%fZ')
-        data['end_time'] = data['start_time'] + timedelta(hours=1)
+        data = request.data.copy()
+        # Serializer bilan bir xil ISO 8601 tahlili: 'Z', offset, mikrosekundsiz vaqt; xato yoki yo'q bo'lsa 400
+        try:
+            start_time = serializers.DateTimeField().run_validation(data.get('start_time', empty))
+        except serializers.ValidationError as exc:
+            raise serializers.ValidationError({'start_time': exc.detail})
+        data['start_time'] = start_time
+        data['end_time'] = start_time + timedelta(hours=1)
+        if isinstance(data.get('parking_zone'), dict):
+            data['parking_zone'] = data['parking_zone']['id']
+        if request.user.is_authenticated:
+            data['user'] = request.user.pk
+
+        serializer = self.get_serializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-        parking_zone = ParkingZone.objects.get(id=data['parking_zone']['id'])
+    def get_permissions(self):
+        if self.action == 'export':
+            return [IsAdminUser()]
+        return super().get_permissions()
 
-        if parking_zone.available_spots <= 0:
-            return Response({'error': 'No available spots'}, status=status.HTTP_400_BAD_REQUEST)
+    def perform_destroy(self, instance):
+        delete_booking(instance)
 
-        booking = Booking(user=request.user, parking_zone=parking_zone, **data)
-        booking.save()
+    def export(self, request, *args, **kwargs):
+        export_format = request.query_params.get('export_format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response({'error': f"'export_format' must be one of: {', '.join(EXPORT_FORMATS)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            start, end = parse_window(request, required=False)
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response(BookingSerializer(booking).data, status=status.HTTP_201_CREATED)
+        queryset = export_queryset(start, end, penalties_only=request.query_params.get('penalties_only') == 'true')
+        response = StreamingHttpResponse(iter_export(export_format, queryset),
+                                         content_type=EXPORT_FORMATS[export_format])
+        response['Content-Disposition'] = f'attachment; filename="bookings.{export_format}"'
+        return response
+
+    def bulk_create(self, request, *args, **kwargs):
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response({'error': 'Expected a non-empty list of bookings'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.bulk_max_items:
+            return Response({'error': f'At most {self.bulk_max_items} bookings per request'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        results = [None] * len(items)
+        valid = []
+        for index, item in enumerate(items):
+            serializer = BookingBulkItemSerializer(data=item)
+            if serializer.is_valid():
+                if request.user.is_authenticated:
+                    serializer.validated_data['user'] = request.user.pk
+                valid.append((index, serializer.validated_data))
+            else:
+                results[index] = {'index': index, 'status': 'error', 'errors': serializer.errors}
+
+        # Barcha mashina, zona va foydalanuvchilar bitta so'rovda olinadi
+        cars = Car.objects.in_bulk({data['car'] for _, data in valid})
+        parking_zones = ParkingZone.objects.in_bulk({data['parking_zone'] for _, data in valid})
+        users = User.objects.in_bulk({data['user'] for _, data in valid if 'user' in data})
+
+        bookings = {}
+        for index, data in valid:
+            car = cars.get(data['car'])
+            parking_zone = parking_zones.get(data['parking_zone'])
+            user = users.get(data.get('user'))
+            errors = {}
+            if user is None:
+                errors['user'] = "Foydalanuvchi topilmadi."
+            if car is None:
+                errors['car'] = "Mashina topilmadi."
+            elif user is not None and car.user_id != user.pk:
+                errors['car'] = "Bu mashina tanlangan foydalanuvchiga tegishli emas."
+            if parking_zone is None:
+                errors['parking_zone'] = "Parking zona topilmadi."
+            if errors:
+                results[index] = {'index': index, 'status': 'error', 'errors': errors}
+                continue
+            bookings[index] = Booking(user=user, car=car, parking_zone=parking_zone,
+                                      start_time=data['start_time'], end_time=data['end_time'])
+
+        created, rejected = create_bookings(list(bookings.values()))
+        created, rejected = set(map(id, created)), set(map(id, rejected))
+        for index, booking in bookings.items():
+            if id(booking) in created:
+                results[index] = {'index': index, 'status': 'created', 'id': booking.id}
+            else:
+                results[index] = {'index': index, 'status': 'error',
+                                  'errors': {'parking_zone': "Bu joyda bo'sh o'rin yo'q."}}
+
+        return Response({'created': len(created), 'results': results},
+                        status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST)
     
 
 
 
+class PlateLookupViewSet(viewsets.GenericViewSet):
+    """
+    Enforcement: the booking running right now for a scanned plate, optionally only in one zone.
+    Plates are normalized before lookup, so "01 a-123 bc" finds 01A123BC.
+    """
+    queryset = Booking.objects.all()
+    serializer_class = ActivePlateBookingSerializer
+    permission_classes = [IsAdminUser]
+    pagination_class = None
+    batch_max_plates = 500
+
+    def active_bookings(self, plates, parking_zone):
+        bookings = {}
+        for booking in Booking.objects.active_for_plates(plates, parking_zone=parking_zone):
+            # Bir raqamga bir nechta faol bron bo'lsa eng oldin boshlangani
+            bookings.setdefault(booking.car.normalized_plate, booking)
+        return bookings
+
+    def result(self, plate, booking):
+        return {
+            'plate': plate,
+            'active': booking is not None,
+            'booking': self.get_serializer(booking).data if booking is not None else None,
+        }
+
+    def lookup(self, request, plate=None):
+        try:
+            parking_zone = parse_zone(request.query_params.get('zone'))
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        plate = normalize_plate(plate)
+        if not plate:
+            return Response({'error': 'Plate number is empty'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.result(plate, self.active_bookings([plate], parking_zone).get(plate)))
+
+    def batch(self, request):
+        plates = request.data.get('plates')
+        if not isinstance(plates, list) or not all(isinstance(plate, str) for plate in plates):
+            return Response({'error': "'plates' must be a list of strings"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(plates) > self.batch_max_plates:
+            return Response({'error': f"At most {self.batch_max_plates} plates per request"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            parking_zone = parse_zone(request.data.get('zone'))
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        plates = [normalize_plate(plate) for plate in plates]
+        bookings = self.active_bookings({plate for plate in plates if plate}, parking_zone)
+        return Response({'results': [self.result(plate, bookings.get(plate)) for plate in plates]})
+
+
 from rest_framework import generics, status
 from rest_framework.response import Response
 from django.contrib.auth import authenticate, login, logout
@@ -48,44 +344,43 @@ from .serializers import UserSerializer, ProfileSerializer
 from .models import Profile
 from rest_framework.permissions import IsAuthenticated
 from django.utils.crypto import get_random_string
-from twilio.rest import Client
-
-TWILIO_ACCOUNT_SID = 'your_account_sid'
-TWILIO_AUTH_TOKEN = 'your_auth_token'
-TWILIO_PHONE_NUMBER = 'your_twilio_phone_number'
-
-client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+from django.db import transaction
+from .sms import queue_sms
+from .authentication import issue_tokens
 
-class RegisterView(generics.CreateAPIView):
+class RegisterView(IdempotencyMixin, AdmissionControlMixin, generics.CreateAPIView):
     serializer_class = UserSerializer
+    permission_classes = [AllowAny]
+    throttle_scope = 'register'
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        user = serializer.save()
-        
-        # SMS verification
-        verification_code = get_random_string(length=6, allowed_chars='0123456789')
-        profile = Profile.objects.get(user=user)
-        profile.phone_number = request.data.get('phone_number')
-        profile.save()
-        
-        client.messages.create(
-            body=f"Your verification code is: {verification_code}",
-            from_=TWILIO_PHONE_NUMBER,
-            to=profile.phone_number
-        )
+
+        with transaction.atomic():
+            user = serializer.save()
+
+            # SMS verification (send_sms_outbox worker orqali yuboriladi)
+            verification_code = get_random_string(length=6, allowed_chars='0123456789')
+            profile = Profile.objects.get(user=user)
+            profile.phone_number = request.data.get('phone_number')
+            profile.save()
+
+            queue_sms(profile.phone_number, f"Your verification code is: {verification_code}")
 
         return Response({"message": "User created. Verify your phone number."}, status=status.HTTP_201_CREATED)
 
 class LoginView(generics.GenericAPIView):
+    permission_classes = [AllowAny]
+
     def post(self, request):
         username = request.data.get('username')
         password = request.data.get('password')
         user = authenticate(username=username, password=password)
         if user is not None:
-            login(request, user)
-            return Response({"message": "Logged in successfully."}, status=status.HTTP_200_OK)
+            if settings.AUTH_LOGIN_SESSION:
+                login(request, user)
+            return Response({"message": "Logged in successfully.", **issue_tokens(user)}, status=status.HTTP_200_OK)
         return Response({"error": "Invalid credentials."}, status=status.HTTP_400_BAD_REQUEST)
 
 class LogoutView(generics.GenericAPIView):
@@ -104,7 +399,8 @@ class ChangePasswordView(generics.GenericAPIView):
         new_password = request.data.get('new_password')
         if user.check_password(old_password):
             user.set_password(new_password)
-            user.save()
+            # request.user token claimlaridan qurilgan bo'lishi mumkin: faqat parol yoziladi
+            user.save(update_fields=['password'])
             return Response({"message": "Password changed successfully."}, status=status.HTTP_200_OK)
         return Response({"error": "Old password is incorrect."}, status=status.HTTP_400_BAD_REQUEST)
 